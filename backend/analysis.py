@@ -1,100 +1,172 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import json
+import os
 import re
 from collections import Counter
+from phrase_matcher import PhraseMatcher
+import keyphrases
+
+LEXICON_PATH = os.getenv('LEXICON_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'lexicons.json'))
+
+# Populated by load_lexicons(); kept as module attributes for callers that inspect the lexicons
+POSITIVE_WORDS = frozenset()
+NEGATIVE_WORDS = frozenset()
+TOPIC_KEYWORDS: Dict[str, List[str]] = {}
+
+# Active lexicon, swapped as one object so a concurrent reload never mixes old and new terms
+_lexicon: Dict[str, Any] = {"matcher": PhraseMatcher({}), "topics": []}
+
+STOP_WORDS = keyphrases.STOP_WORDS
+
+_WORD_RE = re.compile(r'\w+')
+# Words, plus sentence punctuation as an empty token so phrases never match across it
+_TOKEN_RE = re.compile(r'(\w+)|[.!?;:,]')
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens shared by every analysis"""
+    return _WORD_RE.findall(text.lower())
+
+def scan_tokens(text: str) -> List[str]:
+    """Lowercase word tokens with '' marking sentence punctuation"""
+    return _TOKEN_RE.findall(text.lower())
+
+def load_lexicons(path: Optional[str] = None) -> Dict[str, Any]:
+    """Load sentiment and topic lexicons from a JSON file and compile them into one phrase matcher"""
+    global POSITIVE_WORDS, NEGATIVE_WORDS, TOPIC_KEYWORDS, _lexicon
+    path = path or LEXICON_PATH
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    sentiment = data.get("sentiment", {})
+    topics = data.get("topics", {})
+    phrases: Dict[tuple, List[tuple]] = {}
+
+    def add(phrase: str, label: tuple):
+        # Lexicon entries go through the same tokenizer as the text they are matched against
+        pattern = tuple(tokenize(phrase))
+        labels = phrases.setdefault(pattern, [])
+        if pattern and label not in labels:
+            labels.append(label)
+
+    for polarity in ("positive", "negative"):
+        for phrase in sentiment.get(polarity, []):
+            add(phrase, ("sentiment", polarity))
+    for topic, keywords in topics.items():
+        for keyword in keywords:
+            add(keyword, ("topic", topic))
+
+    matcher = PhraseMatcher(phrases)
+    POSITIVE_WORDS = frozenset(sentiment.get("positive", []))
+    NEGATIVE_WORDS = frozenset(sentiment.get("negative", []))
+    TOPIC_KEYWORDS = {topic: list(keywords) for topic, keywords in topics.items()}
+    _lexicon = {"matcher": matcher, "topics": list(topics)}
+
+    print(f"📚 Loaded {len(matcher.patterns)} lexicon phrases from {path}")
+    return {
+        "path": path,
+        "phrases": len(matcher.patterns),
+        "max_phrase_words": matcher.max_phrase_length,
+        "topics": len(topics)
+    }
+
+def current_lexicon() -> Dict[str, Any]:
+    """The active compiled lexicon: {"matcher": PhraseMatcher, "topics": [topic, ...]}"""
+    return _lexicon
+
+def iter_lexicon_hits(tokens: List[str]):
+    """Yield (end_token_index, label) for every lexicon hit, in token order"""
+    matcher = _lexicon["matcher"]
+    for end, pattern_id in matcher.iter_matches(tokens):
+        for label in matcher.labels[pattern_id]:
+            yield end, label
+
+def match_lexicons(tokens: List[str]) -> Counter:
+    """Count sentiment and topic lexicon hits, keyed by ('sentiment'|'topic', name), in one scan"""
+    return _lexicon["matcher"].count_labels(tokens)
+
+def _sentiment_from_hits(hits: Counter, total_words: int) -> Dict[str, Any]:
+    positive_count = hits[("sentiment", "positive")]
+    negative_count = hits[("sentiment", "negative")]
+
+    total_sentiment_words = positive_count + negative_count
+    if total_sentiment_words == 0:
+        sentiment_score = 0
+    else:
+        sentiment_score = (positive_count - negative_count) / total_sentiment_words
+
+    # Determine sentiment label
+    if sentiment_score > 0.1:
+        label = "POSITIVE"
+    elif sentiment_score < -0.1:
+        label = "NEGATIVE"
+    else:
+        label = "NEUTRAL"
+
+    return {
+        "compound_score": sentiment_score,
+        "pos": positive_count / total_words if total_words else 0,
+        "neg": negative_count / total_words if total_words else 0,
+        # Multi-word phrases can cover more words than they count as, so clamp at zero
+        "neu": max(0, total_words - total_sentiment_words) / total_words if total_words else 1,
+        "sentiment_label": label,
+        "sentiment_confidence": abs(sentiment_score)
+    }
+
+def _topics_from_hits(hits: Counter, topic_order: List[str]) -> List[Dict[str, Any]]:
+    # Return top 3 topics, keeping lexicon order for ties
+    ordered = [(topic, hits[("topic", topic)]) for topic in topic_order if hits[("topic", topic)]]
+    sorted_topics = sorted(ordered, key=lambda x: x[1], reverse=True)
+    topics = []
+    for topic, score in sorted_topics[:3]:
+        confidence = min(score / 10, 1.0)  # Normalize confidence
+        topics.append({
+            "topic": topic,
+            "confidence": confidence
+        })
+
+    # If no topics found, add general
+    if not topics:
+        topics = [{"topic": "general", "confidence": 0.5}]
+
+    return topics
+
+def analyze_text(text: str) -> Dict[str, Any]:
+    """Tokenize once and derive sentiment, topics and key phrases from the same token stream"""
+    tokens = scan_tokens(text)
+    lexicon = _lexicon
+    hits = lexicon["matcher"].count_labels(tokens)
+    total_words = len(tokens) - tokens.count('')
+    return {
+        "sentiment": _sentiment_from_hits(hits, total_words),
+        "topics": _topics_from_hits(hits, lexicon["topics"]),
+        "key_phrases": keyphrases.extract_key_phrases(text, tokens, keyphrases.df_index)
+    }
+
+def add_to_corpus(video_id: str, text: str) -> int:
+    """Count a fetched transcript into the key phrase corpus, once per video; analyses only read it"""
+    return keyphrases.index_document(keyphrases.df_index, f"video:{video_id}", scan_tokens(text))
 
 def analyze_sentiment(text: str) -> Dict[str, Any]:
     """Analyze sentiment using simple text analysis"""
     try:
-        positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic', 'love', 'like', 'best', 'perfect', 'awesome']
-        negative_words = ['bad', 'terrible', 'awful', 'hate', 'worst', 'horrible', 'disappointing', 'poor', 'fail', 'wrong']
-
-        words = text.lower().split()
-        positive_count = sum(1 for word in words if word in positive_words)
-        negative_count = sum(1 for word in words if word in negative_words)
-
-        total_sentiment_words = positive_count + negative_count
-        if total_sentiment_words == 0:
-            sentiment_score = 0
-        else:
-            sentiment_score = (positive_count - negative_count) / total_sentiment_words
-
-        # Determine sentiment label
-        if sentiment_score > 0.1:
-            label = "POSITIVE"
-        elif sentiment_score < -0.1:
-            label = "NEGATIVE"
-        else:
-            label = "NEUTRAL"
-
-        return {
-            "compound_score": sentiment_score,
-            "pos": positive_count / len(words) if words else 0,
-            "neg": negative_count / len(words) if words else 0,
-            "neu": (len(words) - total_sentiment_words) / len(words) if words else 1,
-            "sentiment_label": label,
-            "sentiment_confidence": abs(sentiment_score)
-        }
+        tokens = scan_tokens(text)
+        return _sentiment_from_hits(match_lexicons(tokens), len(tokens) - tokens.count(''))
     except Exception as e:
         return {"error": f"Sentiment analysis failed: {str(e)}"}
 
 def extract_topics(text: str) -> List[Dict[str, Any]]:
     """Extract key topics using keyword analysis"""
     try:
-        # Define topic keywords
-        topic_keywords = {
-            "technology": ["tech", "software", "computer", "digital", "app", "web", "code", "programming", "ai", "machine learning"],
-            "business": ["business", "company", "market", "finance", "money", "profit", "sales", "customer", "strategy"],
-            "education": ["learn", "study", "course", "tutorial", "teach", "school", "university", "knowledge", "skill"],
-            "entertainment": ["fun", "game", "movie", "music", "show", "entertainment", "celebrity", "hollywood"],
-            "health": ["health", "medical", "doctor", "disease", "treatment", "fitness", "exercise", "diet"],
-            "science": ["science", "research", "experiment", "discovery", "theory", "physics", "chemistry", "biology"]
-        }
-
-        words = text.lower().split()
-        topic_scores = {}
-
-        for topic, keywords in topic_keywords.items():
-            score = sum(1 for word in words if word in keywords)
-            if score > 0:
-                topic_scores[topic] = score
-
-        # Return top 3 topics
-        sorted_topics = sorted(topic_scores.items(), key=lambda x: x[1], reverse=True)
-        topics = []
-        for topic, score in sorted_topics[:3]:
-            confidence = min(score / 10, 1.0)  # Normalize confidence
-            topics.append({
-                "topic": topic,
-                "confidence": confidence
-            })
-
-        # If no topics found, add general
-        if not topics:
-            topics = [{"topic": "general", "confidence": 0.5}]
-
-        return topics
+        lexicon = _lexicon
+        return _topics_from_hits(lexicon["matcher"].count_labels(scan_tokens(text)), lexicon["topics"])
     except Exception as e:
         return [{"topic": "general", "confidence": 0.5}]
 
 def extract_key_phrases(text: str) -> List[Dict[str, Any]]:
     """Extract key phrases and important terms"""
     try:
-        # Simple keyword extraction using frequency
-        words = re.findall(r'\b\w+\b', text.lower())
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them'}
-
-        filtered_words = [word for word in words if len(word) > 3 and word not in stop_words]
-        word_freq = Counter(filtered_words)
-
-        # Get top keywords
-        keywords = []
-        for word, freq in word_freq.most_common(8):
-            keywords.append({
-                "word": word,
-                "frequency": freq,
-                "importance_score": freq / len(filtered_words) if filtered_words else 0
-            })
-
-        return keywords
+        return keyphrases.extract_key_phrases(text, scan_tokens(text), keyphrases.df_index)
     except Exception as e:
         return []
+
+load_lexicons()
@@ -1,68 +1,362 @@
 import asyncio
 import aiohttp
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable, Awaitable, AsyncIterator
 import json
 from datetime import datetime, timedelta
 import os
+import time
+from collections import OrderedDict
+from quota import QuotaLedger
 
 class YouTubeAnalytics:
     def __init__(self):
         self.api_key = os.getenv('YOUTUBE_API_KEY', '')
-        self.base_url = 'https://www.googleapis.com/youtube/v3'
+        # Overridable so tests and benchmarks can point at a local stub server
+        self.base_url = os.getenv('YOUTUBE_API_BASE_URL', 'https://www.googleapis.com/youtube/v3').rstrip('/')
+        self.pool_size = int(os.getenv('YOUTUBE_HTTP_POOL_SIZE', '100'))
+        self.pool_size_per_host = int(os.getenv('YOUTUBE_HTTP_POOL_PER_HOST', '32'))
+        self.keepalive_seconds = float(os.getenv('YOUTUBE_HTTP_KEEPALIVE', '60'))
+        self.timeout_seconds = float(os.getenv('YOUTUBE_HTTP_TIMEOUT', '10'))
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+        self.pool_stats = {
+            "requests": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "peak_in_flight": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "queued_for_connection": 0,
+            "total_latency_ms": 0.0
+        }
+        # The `videos` endpoint takes up to 50 ids per call
+        self.batch_window = float(os.getenv('YOUTUBE_BATCH_WINDOW_MS', '10')) / 1000
+        self.max_batch_ids = max(1, min(50, int(os.getenv('YOUTUBE_BATCH_MAX_IDS', '50'))))
+        self._pending_ids: Dict[str, List[asyncio.Future]] = {}
+        self._batch_timer: Optional[asyncio.TimerHandle] = None
+        self._background_tasks = set()
+        self.batch_stats = {
+            "api_calls": 0,
+            "ids_fetched": 0,
+            "callers": 0,
+            "largest_batch": 0
+        }
+        # Stale-while-revalidate stats: fresh until the soft TTL, served stale (and refreshed) until the hard TTL
+        self.stats_soft_ttl = float(os.getenv('YOUTUBE_STATS_SOFT_TTL', '300'))
+        self.stats_hard_ttl = float(os.getenv('YOUTUBE_STATS_HARD_TTL', '3600'))
+        self.stats_cache_size = int(os.getenv('YOUTUBE_STATS_CACHE_SIZE', '10000'))
+        self._stats_cache: "OrderedDict[str, tuple]" = OrderedDict()  # video_id -> (stats, fetched_at, soft_ttl, hard_ttl)
+        self._refreshing = set()
+        self.cache_stats = {
+            "fresh_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "quota_rejections": 0
+        }
+        # Called with (video_id, stats) for every fresh stats fetch (e.g. to record growth snapshots)
+        self.listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        self.quota = QuotaLedger(
+            daily_budget=int(os.getenv('YOUTUBE_DAILY_QUOTA', '10000')),
+            path=os.getenv('YOUTUBE_QUOTA_LEDGER_PATH', 'youtube_quota.json'),
+            max_ttl_multiplier=float(os.getenv('YOUTUBE_QUOTA_MAX_TTL_MULTIPLIER', '24'))
+        )
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """Count new vs reused connections and waits for a free pool slot"""
+        trace = aiohttp.TraceConfig()
+
+        async def on_create(session, context, params):
+            self.pool_stats["connections_created"] += 1
+
+        async def on_reuse(session, context, params):
+            self.pool_stats["connections_reused"] += 1
+
+        async def on_queued(session, context, params):
+            self.pool_stats["queued_for_connection"] += 1
+
+        trace.on_connection_create_end.append(on_create)
+        trace.on_connection_reuseconn.append(on_reuse)
+        trace.on_connection_queued_start.append(on_queued)
+        return trace
+
+    async def start(self):
+        """Open the shared session; one pool of keep-alive connections serves every API call"""
+        async with self._session_lock:
+            if self._session is not None and not self._session.closed:
+                return
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size_per_host,
+                keepalive_timeout=self.keepalive_seconds,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds),
+                trace_configs=[self._trace_config()]
+            )
+            print(f"🌐 YouTube API session ready ({self.base_url}, pool {self.pool_size})")
+
+    async def close(self):
+        async with self._session_lock:
+            if self._session is not None:
+                await self._session.close()
+                self._session = None
+        self.quota.save()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # Normally opened on app startup; scripts calling the API directly get one lazily
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
+
+    async def _get_json(self, path: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """GET an API endpoint through the pooled session; None on a non-200 response"""
+        session = await self._get_session()
+        self.quota.spend(path)
+        stats = self.pool_stats
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+        started_at = time.perf_counter()
+        try:
+            async with session.get(f"{self.base_url}/{path}", params=params) as response:
+                if response.status == 200:
+                    return await response.json()
+                stats["errors"] += 1
+                return None
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            stats["errors"] += 1
+            raise
+        finally:
+            stats["in_flight"] -= 1
+            stats["total_latency_ms"] += (time.perf_counter() - started_at) * 1000
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Connection pool utilization and request counters"""
+        stats = dict(self.pool_stats)
+        connections = stats["connections_created"] + stats["connections_reused"]
+        stats.update({
+            "base_url": self.base_url,
+            "open": self._session is not None and not self._session.closed,
+            "limit": self.pool_size,
+            "limit_per_host": self.pool_size_per_host,
+            "utilization": round(stats["in_flight"] / self.pool_size, 3) if self.pool_size else 0,
+            "reuse_ratio": round(stats["connections_reused"] / connections, 3) if connections else 0,
+            "avg_latency_ms": round(stats["total_latency_ms"] / stats["requests"], 2) if stats["requests"] else 0
+        })
+        stats["total_latency_ms"] = round(stats["total_latency_ms"], 1)
+        stats["batching"] = self.get_batch_stats()
+        return stats
 
     async def get_video_stats(self, video_id: str) -> Dict[str, Any]:
         """Get real-time video statistics from YouTube API"""
         if not self.api_key:
             return {"error": "YouTube API key not configured"}
 
-        url = f"{self.base_url}/videos"
+        cached = self._cached_stats(video_id)
+        if cached is not None:
+            return cached
+        if not self.quota.can_afford('videos'):
+            self.cache_stats["quota_rejections"] += 1
+            return {"error": "YouTube API daily quota exhausted"}
+        self.cache_stats["misses"] += 1
+        return await self._load_video_stats(video_id)
+
+    async def refresh_video_stats(self, video_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Current statistics straight from the API, skipping (and then updating) the stats cache"""
+        if not self.api_key:
+            return {video_id: {"error": "YouTube API key not configured"} for video_id in video_ids}
+        results = await asyncio.gather(*(self._load_video_stats(video_id) for video_id in video_ids),
+                                       return_exceptions=True)
+        return {video_id: {"error": str(result)} if isinstance(result, Exception) else result
+                for video_id, result in zip(video_ids, results)}
+
+    async def _load_video_stats(self, video_id: str) -> Dict[str, Any]:
+        # Joins the open batch; one `videos` call answers every id queued within the window
+        future = asyncio.get_running_loop().create_future()
+        self._pending_ids.setdefault(video_id, []).append(future)
+        if len(self._pending_ids) >= self.max_batch_ids:
+            self._dispatch_batch()
+        elif self._batch_timer is None:
+            self._batch_timer = asyncio.get_running_loop().call_later(self.batch_window, self._dispatch_batch)
+        return await future
+
+    def _dispatch_batch(self):
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        pending, self._pending_ids = self._pending_ids, {}
+        # Skip ids whose every caller has already given up (e.g. a closed comparison stream)
+        video_ids = [video_id for video_id, futures in pending.items()
+                     if not all(future.cancelled() for future in futures)]
+        for i in range(0, len(video_ids), self.max_batch_ids):
+            chunk = {video_id: pending[video_id] for video_id in video_ids[i:i + self.max_batch_ids]}
+            self._run_in_background(self._fetch_video_batch(chunk))
+
+    def _run_in_background(self, coroutine):
+        task = asyncio.ensure_future(coroutine)
+        # The loop only keeps weak references to tasks
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _fetch_video_batch(self, waiters: Dict[str, List[asyncio.Future]]):
+        """One multi-id `videos` call, fanned back out to every waiting caller"""
+        stats = self.batch_stats
+        stats["api_calls"] += 1
+        stats["ids_fetched"] += len(waiters)
+        stats["callers"] += sum(len(futures) for futures in waiters.values())
+        stats["largest_batch"] = max(stats["largest_batch"], len(waiters))
+
         params = {
             'part': 'statistics,snippet',
-            'id': video_id,
+            'id': ','.join(waiters),
             'key': self.api_key
         }
+        try:
+            data = await self._get_json('videos', params)
+            items = {item['id']: item for item in data['items']} if data else {}
+            results = {video_id: self._parse_video(items[video_id]) if video_id in items
+                       else {"error": "Failed to fetch video stats"} for video_id in waiters}
+        except Exception as e:
+            for futures in waiters.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data['items']:
-                        item = data['items'][0]
-                        return {
-                            'title': item['snippet']['title'],
-                            'channel': item['snippet']['channelTitle'],
-                            'views': int(item['statistics'].get('viewCount', 0)),
-                            'likes': int(item['statistics'].get('likeCount', 0)),
-                            'comments': int(item['statistics'].get('commentCount', 0)),
-                            'duration': item['snippet'].get('duration', ''),
-                            'published_at': item['snippet']['publishedAt']
-                        }
-        return {"error": "Failed to fetch video stats"}
+        for video_id, futures in waiters.items():
+            if "error" not in results[video_id]:
+                self._store_stats(video_id, results[video_id])
+            for future in futures:
+                if not future.done():
+                    # Callers get their own copy so one can't mutate another's result
+                    future.set_result(dict(results[video_id]))
+
+    def _entry_ttls(self, stats: Dict[str, Any]) -> tuple:
+        """Soft and hard TTL for one video; counts on older videos barely move, so they keep longer"""
+        try:
+            published = datetime.fromisoformat(stats['published_at'].replace('Z', '+00:00'))
+            settled = (datetime.now(published.tzinfo) - published).days >= 7
+        except (KeyError, ValueError, AttributeError):
+            settled = False
+        scale = 4 if settled else 1
+        return self.stats_soft_ttl * scale, self.stats_hard_ttl * scale
+
+    def _store_stats(self, video_id: str, stats: Dict[str, Any]):
+        soft_ttl, hard_ttl = self._entry_ttls(stats)
+        self._stats_cache[video_id] = (stats, time.monotonic(), soft_ttl, hard_ttl)
+        self._stats_cache.move_to_end(video_id)
+        while len(self._stats_cache) > self.stats_cache_size:
+            self._stats_cache.popitem(last=False)
+        for listener in self.listeners:
+            try:
+                listener(video_id, stats)
+            except Exception as e:
+                print(f"⚠️ Video stats listener failed for {video_id}: {e}")
+
+    def _cached_stats(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """A copy of the cached stats if still servable, starting a background refresh once stale"""
+        entry = self._stats_cache.get(video_id)
+        if entry is None:
+            return None
+        stats, fetched_at, soft_ttl, hard_ttl = entry
+        age = time.monotonic() - fetched_at
+        # TTLs stretch as the day's quota runs low
+        scale = self.quota.ttl_multiplier()
+        if age < soft_ttl * scale:
+            self.cache_stats["fresh_hits"] += 1
+        elif age < hard_ttl * scale or not self.quota.can_afford('videos'):
+            # Past the hard TTL only when out of quota: old numbers beat an error
+            self.cache_stats["stale_hits"] += 1
+            self._revalidate(video_id)
+        else:
+            return None
+        self._stats_cache.move_to_end(video_id)
+        return dict(stats)
+
+    def _revalidate(self, video_id: str):
+        if video_id in self._refreshing or not self.quota.can_afford('videos'):
+            return
+        self._refreshing.add(video_id)
+        self._run_in_background(self._refresh_stats(video_id))
+
+    async def _refresh_stats(self, video_id: str):
+        self.cache_stats["refreshes"] += 1
+        try:
+            # Goes through the batcher, so concurrent refreshes share a call too
+            result = await self._load_video_stats(video_id)
+            if "error" in result:
+                self.cache_stats["refresh_failures"] += 1
+        except Exception as e:
+            self.cache_stats["refresh_failures"] += 1
+            print(f"⚠️ Background refresh of {video_id} stats failed: {e}")
+        finally:
+            self._refreshing.discard(video_id)
+
+    def get_stats_cache_stats(self) -> Dict[str, Any]:
+        """Stats cache hit rates and the TTLs currently in force"""
+        stats = dict(self.cache_stats)
+        lookups = stats["fresh_hits"] + stats["stale_hits"] + stats["misses"]
+        scale = self.quota.ttl_multiplier()
+        stats.update({
+            "entries": len(self._stats_cache),
+            "max_entries": self.stats_cache_size,
+            "refreshing": len(self._refreshing),
+            "hit_rate": round((stats["fresh_hits"] + stats["stale_hits"]) / lookups, 3) if lookups else 0,
+            "soft_ttl_seconds": round(self.stats_soft_ttl * scale, 1),
+            "hard_ttl_seconds": round(self.stats_hard_ttl * scale, 1)
+        })
+        return stats
+
+    def _parse_video(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'title': item['snippet']['title'],
+            'channel': item['snippet']['channelTitle'],
+            'views': int(item['statistics'].get('viewCount', 0)),
+            'likes': int(item['statistics'].get('likeCount', 0)),
+            'comments': int(item['statistics'].get('commentCount', 0)),
+            'duration': item['snippet'].get('duration', ''),
+            'published_at': item['snippet']['publishedAt']
+        }
+
+    def get_batch_stats(self) -> Dict[str, Any]:
+        """How well `videos` lookups are being coalesced"""
+        stats = dict(self.batch_stats)
+        stats.update({
+            "window_ms": self.batch_window * 1000,
+            "max_batch_ids": self.max_batch_ids,
+            "pending": len(self._pending_ids),
+            "avg_ids_per_call": round(stats["ids_fetched"] / stats["api_calls"], 2) if stats["api_calls"] else 0,
+            "calls_saved": stats["callers"] - stats["api_calls"]
+        })
+        return stats
 
     async def get_channel_info(self, channel_id: str) -> Dict[str, Any]:
         """Get channel information and subscriber count"""
         if not self.api_key:
             return {"error": "YouTube API key not configured"}
+        if not self.quota.can_afford('channels'):
+            return {"error": "YouTube API daily quota exhausted"}
 
-        url = f"{self.base_url}/channels"
         params = {
             'part': 'statistics,snippet',
             'id': channel_id,
             'key': self.api_key
         }
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data['items']:
-                        item = data['items'][0]
-                        return {
-                            'name': item['snippet']['title'],
-                            'subscribers': int(item['statistics'].get('subscriberCount', 0)),
-                            'videos': int(item['statistics'].get('videoCount', 0)),
-                            'description': item['snippet']['description'][:200]
-                        }
+        data = await self._get_json('channels', params)
+        if data and data['items']:
+            item = data['items'][0]
+            return {
+                'name': item['snippet']['title'],
+                'subscribers': int(item['statistics'].get('subscriberCount', 0)),
+                'videos': int(item['statistics'].get('videoCount', 0)),
+                'description': item['snippet']['description'][:200]
+            }
         return {"error": "Failed to fetch channel info"}
 
     def calculate_engagement_rate(self, views: int, likes: int, comments: int) -> float:
@@ -127,3 +421,77 @@ class YouTubeAnalytics:
                 'recent_content': days_old < 30 if 'days_old' in locals() else False
             }
         }
+
+class ComparisonInsights:
+    """Comparison aggregates, updated in O(1) as each video's analytics arrive"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_views = 0
+        self.engagement_sum = 0.0
+        self.best_performer: Optional[str] = None
+        self.best_engagement = float('-inf')
+        self.viral_candidates: List[str] = []
+
+    def add(self, video_id: str, data: Dict[str, Any]):
+        rate = data['engagement']['rate']
+        self.count += 1
+        self.total_views += data['video_stats']['views']
+        self.engagement_sum += rate
+        if rate > self.best_engagement:
+            self.best_performer, self.best_engagement = video_id, rate
+        if data['viral_analysis']['potential'] == 'High':
+            self.viral_candidates.append(video_id)
+
+    def to_dict(self, include_candidates: bool = True) -> Dict[str, Any]:
+        # A single video has nothing to be compared against
+        if self.count < 2:
+            return {}
+        return {
+            "total_views": self.total_views,
+            "avg_engagement": round(self.engagement_sum / self.count, 2),
+            "best_performer": self.best_performer,
+            "viral_candidates": self.viral_candidates if include_candidates else len(self.viral_candidates)
+        }
+
+async def iter_comparison(video_ids: List[str], fetch: Callable[[str], Awaitable[Dict[str, Any]]],
+                          concurrency: int = 50) -> AsyncIterator[Dict[str, Any]]:
+    """Fetch every video with at most `concurrency` in flight, yielding each result as it lands.
+
+    Each event carries the running insights; a final `summary` event has the complete comparison.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch_one(video_id: str):
+        async with semaphore:
+            try:
+                return video_id, await fetch(video_id)
+            except Exception as e:
+                return video_id, {"error": str(e)}
+
+    tasks = [asyncio.ensure_future(fetch_one(video_id)) for video_id in video_ids]
+    insights = ComparisonInsights()
+    failed = {}
+    try:
+        for completed, next_result in enumerate(asyncio.as_completed(tasks), start=1):
+            video_id, data = await next_result
+            event = {"type": "video", "video_id": video_id, "completed": completed, "total": len(tasks)}
+            if "error" in data:
+                failed[video_id] = data["error"]
+                event["error"] = data["error"]
+            else:
+                insights.add(video_id, data)
+                event["analytics"] = data
+            event["insights"] = insights.to_dict(include_candidates=False)
+            yield event
+
+        yield {
+            "type": "summary",
+            "insights": insights.to_dict(),
+            "compared_count": insights.count,
+            "failed": failed
+        }
+    finally:
+        # Client went away mid-stream; don't keep spending quota on the rest
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,158 @@
+from typing import List, Dict, Any, Tuple
+import numpy as np
+from scipy import sparse
+import analysis
+import keyphrases
+
+# Multiplier for the rolling n-gram hash; uint64 arithmetic wraps, candidates are verified exactly
+_HASH_BASE = np.uint64(1000003)
+
+def _encode(texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+    """Concatenate every document's tokens into one id array, ending each document with a boundary"""
+    vocab = keyphrases.Vocabulary()
+    ids: List[int] = []
+    lengths = np.empty(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        tokens = analysis.scan_tokens(text)
+        tokens.append('')
+        ids.extend(map(vocab.__getitem__, tokens))
+        lengths[i] = len(tokens)
+    doc_of = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+    return np.fromiter(ids, dtype=np.int64, count=len(ids)), doc_of, lengths, list(vocab)
+
+def _ngram_hashes(ids: np.ndarray, n: int) -> np.ndarray:
+    """Rolling hash of every n-token window starting at each position"""
+    hashes = ids[:len(ids) - n + 1].astype(np.uint64)
+    for offset in range(1, n):
+        hashes = hashes * _HASH_BASE + ids[offset:len(ids) - n + 1 + offset].astype(np.uint64)
+    return hashes
+
+def _term_matrix(ids: np.ndarray, doc_of: np.ndarray, n_docs: int, vocab_size: int, columns: np.ndarray):
+    """Document x term count matrix over the vocabulary columns marked in `columns`"""
+    positions = np.flatnonzero(columns[ids])
+    return sparse.csr_matrix(
+        (np.ones(len(positions), dtype=np.int64), (doc_of[positions], ids[positions])),
+        shape=(n_docs, vocab_size)
+    )
+
+def _compile_lexicon(matcher, vocab: List[str], labels: List[tuple]):
+    """Map lexicon phrases onto this batch's vocabulary: a term x label matrix for single words
+    and, per phrase length, the token ids and label columns of multi-word phrases"""
+    term_id = {term: i for i, term in enumerate(vocab)}
+    label_id = {label: i for i, label in enumerate(labels)}
+
+    rows, cols = [], []
+    multi: Dict[int, List[Tuple[np.ndarray, List[int]]]] = {}
+    for pattern, pattern_labels in zip(matcher.patterns, matcher.labels):
+        pattern_ids = [term_id.get(token) for token in pattern]
+        if None in pattern_ids:
+            continue  # A token that never occurs cannot be part of a hit
+        label_cols = [label_id[label] for label in pattern_labels]
+        if len(pattern) == 1:
+            rows.extend(pattern_ids * len(label_cols))
+            cols.extend(label_cols)
+        else:
+            multi.setdefault(len(pattern), []).append((np.array(pattern_ids, dtype=np.int64), label_cols))
+
+    term_labels = sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)),
+                                    shape=(len(vocab), len(labels)))
+    return term_labels, multi
+
+def _lexicon_hits(ids: np.ndarray, doc_of: np.ndarray, term_counts, term_labels,
+                  multi: Dict[int, List[Tuple[np.ndarray, List[int]]]], n_docs: int, n_labels: int) -> np.ndarray:
+    """Document x label hit counts for every lexicon phrase, overlapping hits included"""
+    # Single-word phrases: one sparse product against the term x label matrix
+    hits = (term_counts @ term_labels).toarray()
+
+    # Multi-word phrases: hash every window of each phrase length, then verify candidate windows
+    for n, patterns in multi.items():
+        pattern_hashes = np.array([_ngram_hashes(pattern_ids, n)[0] for pattern_ids, _ in patterns], dtype=np.uint64)
+        by_hash = np.argsort(pattern_hashes)
+        sorted_hashes = pattern_hashes[by_hash]
+
+        window_hashes = _ngram_hashes(ids, n)
+        positions = np.flatnonzero(np.isin(window_hashes, sorted_hashes))
+        if not len(positions):
+            continue
+        candidates = by_hash[np.searchsorted(sorted_hashes, window_hashes[positions])]
+        expected = np.stack([pattern_ids for pattern_ids, _ in patterns])[candidates]
+        windows = ids[positions[:, None] + np.arange(n)]
+        verified = (windows == expected).all(axis=1)
+
+        pair_counts = sparse.coo_matrix(
+            (np.ones(verified.sum(), dtype=np.int64), (doc_of[positions[verified]], candidates[verified])),
+            shape=(n_docs, len(patterns))
+        ).tocsr()
+        pattern_labels = sparse.lil_matrix((len(patterns), n_labels), dtype=np.int64)
+        for index, (_, label_cols) in enumerate(patterns):
+            for col in label_cols:
+                pattern_labels[index, col] = 1
+        hits += (pair_counts @ pattern_labels.tocsr()).toarray()
+
+    return hits
+
+def _sentiments(positive: np.ndarray, negative: np.ndarray, total_words: np.ndarray) -> List[Dict[str, Any]]:
+    sentiment_words = positive + negative
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = np.where(sentiment_words > 0, (positive - negative) / sentiment_words, 0.0)
+        pos = np.where(total_words > 0, positive / total_words, 0.0)
+        neg = np.where(total_words > 0, negative / total_words, 0.0)
+        neu = np.where(total_words > 0, np.maximum(0, total_words - sentiment_words) / total_words, 1.0)
+    sentiment_labels = np.select([scores > 0.1, scores < -0.1], ["POSITIVE", "NEGATIVE"], "NEUTRAL")
+
+    return [
+        {
+            "compound_score": score,
+            "pos": p,
+            "neg": n,
+            "neu": u,
+            "sentiment_label": label,
+            "sentiment_confidence": abs(score)
+        }
+        for score, p, n, u, label in zip(scores.tolist(), pos.tolist(), neg.tolist(), neu.tolist(),
+                                         sentiment_labels.tolist())
+    ]
+
+def _topics(topic_scores: np.ndarray, topic_names: List[str]) -> List[List[Dict[str, Any]]]:
+    # Stable sort keeps lexicon order for ties, like the single-document path
+    top = np.argsort(-topic_scores, axis=1, kind='stable')[:, :3]
+    top_scores = np.take_along_axis(topic_scores, top, axis=1)
+    confidences = np.minimum(top_scores / 10, 1.0)
+
+    results = []
+    for doc_top, doc_scores, doc_confidences in zip(top.tolist(), top_scores.tolist(), confidences.tolist()):
+        topics = [
+            {"topic": topic_names[t], "confidence": confidence}
+            for t, score, confidence in zip(doc_top, doc_scores, doc_confidences) if score > 0
+        ]
+        results.append(topics or [{"topic": "general", "confidence": 0.5}])
+    return results
+
+def analyze_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    """Analyze many documents at once from one sparse term-count matrix; matches analyze_text per document"""
+    if not texts:
+        return []
+    n_docs = len(texts)
+    ids, doc_of, lengths, vocab = _encode(texts)
+
+    # One snapshot, so a concurrent lexicon reload cannot pair these topics with another matcher
+    lexicon = analysis.current_lexicon()
+    topic_names = list(lexicon["topics"])
+    labels = [("sentiment", "positive"), ("sentiment", "negative")] + [("topic", topic) for topic in topic_names]
+    term_labels, multi = _compile_lexicon(lexicon["matcher"], vocab, labels)
+
+    # Only single-word lexicon terms need columns in the count matrix
+    columns = term_labels.getnnz(axis=1) > 0
+    term_counts = _term_matrix(ids, doc_of, n_docs, len(vocab), columns)
+    hits = _lexicon_hits(ids, doc_of, term_counts, term_labels, multi, n_docs, len(labels))
+
+    # Token id 0 is the sentence/document boundary, which is not a word
+    total_words = lengths - np.bincount(doc_of[ids == 0], minlength=n_docs)
+    sentiments = _sentiments(hits[:, 0], hits[:, 1], total_words)
+    topics = _topics(hits[:, 2:], topic_names)
+    key_phrases = keyphrases.rank_key_phrases(texts, ids, doc_of, vocab, keyphrases.df_index)
+
+    return [
+        {"sentiment": sentiment, "topics": doc_topics, "key_phrases": phrases}
+        for sentiment, doc_topics, phrases in zip(sentiments, topics, key_phrases)
+    ]
@@ -0,0 +1,122 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Dict, Any, List, Callable
+
+class _GenerationRequest:
+    def __init__(self, text: str, generate_kwargs: Dict[str, Any]):
+        self.text = text
+        self.generate_kwargs = generate_kwargs
+        self.group_key = tuple(sorted(generate_kwargs.items()))
+        self.future: Future = Future()
+
+class BatchingSummarizer:
+    """Gathers concurrent summarization calls into padded, batched pipeline passes"""
+
+    def __init__(self, get_pipeline: Callable[[], Any], max_batch_size: int = 8, max_wait_ms: float = 20):
+        self._get_pipeline = get_pipeline
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[_GenerationRequest]" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.fallbacks = 0
+        self.batch_sizes: Counter = Counter()
+
+    def __call__(self, text: str, **generate_kwargs) -> List[Dict[str, str]]:
+        """Summarize one input; same return shape as calling the pipeline directly"""
+        return self.submit(text, **generate_kwargs).result()
+
+    def summarize_many(self, texts: List[str], **generate_kwargs) -> List[List[Dict[str, str]]]:
+        """Queue several inputs at once so they can share a batch"""
+        futures = [self.submit(text, **generate_kwargs) for text in texts]
+        return [future.result() for future in futures]
+
+    def submit(self, text: str, **generate_kwargs) -> Future:
+        """Queue one input for the next batch"""
+        self._ensure_started()
+        request = _GenerationRequest(text, generate_kwargs)
+        self._queue.put(request)
+        return request.future
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="summary-batcher", daemon=True)
+                    self._thread.start()
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            # Keep gathering until the batch is full or the wait window closes
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Only requests with identical decoding settings can share a forward pass
+            groups: Dict[tuple, List[_GenerationRequest]] = {}
+            for request in batch:
+                groups.setdefault(request.group_key, []).append(request)
+
+            for requests in groups.values():
+                self._run_group(requests)
+
+    def _run_group(self, requests: List[_GenerationRequest]):
+        generate_kwargs = requests[0].generate_kwargs
+        with self._stats_lock:
+            self.batches += 1
+            self.items += len(requests)
+            self.batch_sizes[len(requests)] += 1
+
+        try:
+            outputs = self._get_pipeline()(
+                [request.text for request in requests],
+                batch_size=len(requests),
+                truncation=True,
+                **generate_kwargs
+            )
+            for request, output in zip(requests, outputs):
+                request.future.set_result([output])
+        except Exception as batch_error:
+            if len(requests) == 1:
+                requests[0].future.set_exception(batch_error)
+                return
+
+            # Isolate the failing input instead of failing every caller in the batch
+            print(f"⚠️ Batched summarization failed, retrying individually: {batch_error}")
+            with self._stats_lock:
+                self.fallbacks += 1
+            for request in requests:
+                try:
+                    request.future.set_result(
+                        self._get_pipeline()(request.text, truncation=True, **generate_kwargs)
+                    )
+                except Exception as e:
+                    request.future.set_exception(e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get achieved batch size metrics"""
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "pending": self._queue.qsize(),
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+                "fallbacks": self.fallbacks
+            }
@@ -0,0 +1,58 @@
+"""Compare the single-pass analyzer against the previous three-scan implementation.
+
+Usage (from backend/): python benchmarks/bench_analysis.py [--words 100000] [--runs 5]
+"""
+import argparse
+import re
+import time
+from collections import Counter
+from common import load_fixtures
+
+import analysis
+
+# Previous implementation: three separate tokenizations with list-based lexicon lookups
+_LEGACY_POSITIVE = list(analysis.POSITIVE_WORDS)
+_LEGACY_NEGATIVE = list(analysis.NEGATIVE_WORDS)
+_LEGACY_STOP = set(analysis.STOP_WORDS)
+
+def legacy_analyze(text: str):
+    words = text.lower().split()
+    positive = sum(1 for word in words if word in _LEGACY_POSITIVE)
+    negative = sum(1 for word in words if word in _LEGACY_NEGATIVE)
+
+    words = text.lower().split()
+    topic_scores = {}
+    for topic, keywords in analysis.TOPIC_KEYWORDS.items():
+        score = sum(1 for word in words if word in keywords)
+        if score > 0:
+            topic_scores[topic] = score
+
+    tokens = re.findall(r'\b\w+\b', text.lower())
+    filtered = [word for word in tokens if len(word) > 3 and word not in _LEGACY_STOP]
+    return positive, negative, topic_scores, Counter(filtered).most_common(8)
+
+def best_of(fn, text: str, runs: int) -> float:
+    best = float('inf')
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started_at)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, default=100000)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    text = load_fixtures({"bench": args.words})["bench"]
+    legacy = best_of(legacy_analyze, text, args.runs)
+    single_pass = best_of(analysis.analyze_text, text, args.runs)
+
+    print(f"words: {args.words}")
+    print(f"legacy three-scan:  {legacy * 1000:8.1f} ms")
+    print(f"single-pass:        {single_pass * 1000:8.1f} ms")
+    print(f"speedup:            {legacy / single_pass:8.1f}x")
+
+if __name__ == "__main__":
+    main()
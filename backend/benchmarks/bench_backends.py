@@ -0,0 +1,70 @@
+"""Benchmark summarization inference backends (torch, int8, onnx) on the fixture transcripts.
+
+Each backend runs in its own subprocess so peak RSS is measured independently.
+Usage (from backend/): python benchmarks/bench_backends.py [--backends torch,int8,onnx] [--runs 5]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from common import load_fixtures, percentile
+
+def run_backend(backend: str, runs: int) -> dict:
+    """Load one backend and time repeated single-chunk generations on every fixture"""
+    from models import model_registry
+    from summarization import get_model_name
+
+    summarizer = model_registry.get(get_model_name(), device=-1, dtype="float32", backend=backend)
+    tokenizer = summarizer.tokenizer
+
+    latencies = []
+    generated_tokens = 0
+    generation_seconds = 0.0
+    for text in load_fixtures().values():
+        # Warm-up so one-time graph/kernel setup is not counted
+        summarizer(text, max_length=100, min_length=30, do_sample=False, truncation=True)
+        for _ in range(runs):
+            started_at = time.perf_counter()
+            result = summarizer(text, max_length=100, min_length=30, do_sample=False, truncation=True)
+            elapsed = time.perf_counter() - started_at
+            latencies.append(elapsed)
+            generation_seconds += elapsed
+            generated_tokens += len(tokenizer.encode(result[0]['summary_text']))
+
+    return {
+        "backend": backend,
+        "tokens_per_sec": round(generated_tokens / generation_seconds, 1) if generation_seconds else 0.0,
+        "p50_seconds": round(percentile(latencies, 0.50), 3),
+        "p95_seconds": round(percentile(latencies, 0.95), 3),
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--backends', default='torch,int8,onnx')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_backend(args.child, args.runs)))
+        return
+
+    print(f"{'backend':<8} {'tok/s':>8} {'p50 (s)':>8} {'p95 (s)':>8} {'peak RSS (MB)':>14}")
+    for backend in args.backends.split(','):
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', backend, '--runs', str(args.runs)],
+            capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            print(f"{backend:<8} failed: {completed.stderr.strip().splitlines()[-1] if completed.stderr else 'unknown error'}")
+            continue
+        stats = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(f"{backend:<8} {stats['tokens_per_sec']:>8} {stats['p50_seconds']:>8} {stats['p95_seconds']:>8} {stats['peak_rss_mb']:>14}")
+
+if __name__ == "__main__":
+    main()
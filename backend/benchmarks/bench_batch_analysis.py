@@ -0,0 +1,50 @@
+"""Compare per-document analyze_text calls against one analyze_batch call.
+
+Usage (from backend/): python benchmarks/bench_batch_analysis.py [--docs 1000] [--words 1500] [--runs 3]
+"""
+import argparse
+import random
+import time
+from common import load_fixtures
+
+import analysis
+from batch_analysis import analyze_batch
+
+def make_corpus(docs: int, words: int):
+    """Documents of varying length cut from the fixture at random offsets"""
+    source = load_fixtures({"corpus": words * 4})["corpus"].split()
+    rng = random.Random(0)
+    corpus = []
+    for _ in range(docs):
+        size = rng.randint(words // 2, words * 3 // 2)
+        start = rng.randint(0, len(source) - size)
+        corpus.append(" ".join(source[start:start + size]))
+    return corpus
+
+def best_of(fn, runs: int):
+    best, result = float('inf'), None
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started_at)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--docs', type=int, default=1000)
+    parser.add_argument('--words', type=int, default=1500)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.docs, args.words)
+    single, single_results = best_of(lambda: [analysis.analyze_text(text) for text in corpus], args.runs)
+    batch, batch_results = best_of(lambda: analyze_batch(corpus), args.runs)
+
+    print(f"documents: {args.docs} (~{args.words} words each)")
+    print(f"per-document: {single * 1000:8.1f} ms")
+    print(f"batch:        {batch * 1000:8.1f} ms")
+    print(f"speedup:      {single / batch:8.2f}x")
+    print(f"results match: {single_results == batch_results}")
+
+if __name__ == "__main__":
+    main()
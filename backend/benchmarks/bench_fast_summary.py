@@ -0,0 +1,32 @@
+"""Time the extractive fast path (mode=fast) on the fixture transcripts; no model is loaded.
+
+Usage (from backend/): python benchmarks/bench_fast_summary.py [--runs 5]
+"""
+import argparse
+import time
+from common import load_fixtures
+
+from summarization import generate_fast_summaries
+
+STYLES = ["paragraph", "bullets", "detailed"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    for name, text in load_fixtures().items():
+        timings = {}
+        for style in STYLES + ["all"]:
+            styles = STYLES if style == "all" else [style]
+            best = float('inf')
+            for _ in range(args.runs):
+                started_at = time.perf_counter()
+                generate_fast_summaries(text, styles)
+                best = min(best, time.perf_counter() - started_at)
+            timings[style] = best * 1000
+        print(f"{name:12s} ({len(text.split()):5d} words) " +
+              "  ".join(f"{style}: {ms:6.1f} ms" for style, ms in timings.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Build a search index over synthetic transcripts and time word and phrase queries.
+
+Usage (from backend/): python benchmarks/bench_search.py [--videos 10000] [--words 1500] [--queries 50]
+"""
+import argparse
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+from common import load_fixtures
+
+import numpy as np
+from search_index import SearchIndex
+from transcripts import Transcript
+
+def make_transcripts(videos: int, words: int):
+    """Fixture spans mixed with Zipf-distributed filler words, cut into short timed snippets"""
+    source = load_fixtures({"corpus": words * 4})["corpus"].split()
+    rng = random.Random(0)
+    np_rng = np.random.default_rng(0)
+    for v in range(videos):
+        size = rng.randint(words // 2, words * 3 // 2)
+        start = rng.randint(0, len(source) - size)
+        tokens = source[start:start + size]
+        filler = np_rng.zipf(1.3, size // 3) % 200000
+        for position, term in zip(np_rng.integers(0, size, len(filler)).tolist(), filler.tolist()):
+            tokens[position] = f"term{term}"
+        snippets = [
+            SimpleNamespace(text=" ".join(tokens[i:i + 8]), start=i * 0.4, duration=3.2)
+            for i in range(0, len(tokens), 8)
+        ]
+        yield Transcript.from_snippets(f"video{v}", "en", snippets)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--videos', type=int, default=10000)
+    parser.add_argument('--words', type=int, default=1500)
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="search_index_") as directory:
+        index = SearchIndex(directory, flush_every=1000, max_segments=8)
+        started_at = time.perf_counter()
+        for transcript in make_transcripts(args.videos, args.words):
+            index.add_transcript(transcript)
+        index.flush()
+        while index.get_stats()["pending"]:
+            index.flush()
+        build = time.perf_counter() - started_at
+        stats = index.get_stats()
+
+        # Reopen from disk so queries run against the memory-mapped segments
+        started_at = time.perf_counter()
+        index = SearchIndex(directory)
+        load = time.perf_counter() - started_at
+
+        rng = random.Random(1)
+        queries = {
+            "rare word": [f"term{rng.randint(1000, 100000)}" for _ in range(args.queries)],
+            "common word": ["learning", "people", "code", "first", "build"],
+            "phrase": ['"machine learning"', '"write code"', '"the first"', '"pull request"', '"you never"'],
+            "word + phrase": ['people "machine learning"', 'first "pull request"', 'code "the biggest one"']
+        }
+        print(f"videos: {stats['videos']}  segments: {stats['segments']}  positions: {stats['positions']}")
+        print(f"index size: {stats['bytes'] / 1024 / 1024:.1f} MB  build: {build:.1f} s  reopen: {load * 1000:.0f} ms")
+        for name, batch in queries.items():
+            timings = []
+            for query in batch:
+                started_at = time.perf_counter()
+                index.search(query, limit=10)
+                timings.append((time.perf_counter() - started_at) * 1000)
+            print(f"{name:14s} p50 {np.percentile(timings, 50):7.2f} ms   p95 {np.percentile(timings, 95):7.2f} ms")
+
+if __name__ == "__main__":
+    main()
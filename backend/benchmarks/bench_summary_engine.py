@@ -0,0 +1,37 @@
+"""Compare encoder passes and wall time of the shared multi-style engine against the legacy path.
+
+Usage (from backend/): python benchmarks/bench_summary_engine.py [--styles paragraph,bullets,detailed]
+"""
+import argparse
+from common import load_fixtures, CountingPipeline, timed
+
+import summarization
+
+def run_legacy(text: str):
+    base_summary = summarization.summarize_text(text, "medium")
+    return summarization.generate_multiple_summaries(text, base_summary)
+
+def run_engine(text: str, styles):
+    return summarization.generate_style_summaries(text, styles, "medium")[0]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--styles', default='paragraph,bullets,detailed',
+                        help='Comma separated styles requested from the engine')
+    args = parser.parse_args()
+    styles = args.styles.split(',')
+
+    # Route every generation through a counting proxy
+    counter = CountingPipeline(summarization.get_summarizer())
+    summarization.get_summarizer = lambda: counter
+    summarization.get_batched_summarizer()._get_pipeline = lambda: counter
+
+    print(f"{'fixture':<12} {'path':<8} {'passes':>7} {'calls':>6} {'seconds':>8}")
+    for name, text in load_fixtures().items():
+        for label, fn, fn_args in (("legacy", run_legacy, (text,)), ("engine", run_engine, (text, styles))):
+            counter.reset()
+            run = timed(fn, *fn_args)
+            print(f"{name:<12} {label:<8} {counter.encoder_passes:>7} {counter.calls:>6} {run['seconds']:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Count YouTube `videos` API calls for bursts of concurrent get_video_stats lookups, batched vs one id per call.
+
+Runs against the local stub server; each API call costs one quota unit however many ids it carries.
+
+Usage (from backend/): python benchmarks/bench_youtube_batching.py [--calls 500] [--concurrency 100] [--latency-ms 20]
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+import common  # noqa: F401  (puts the backend on sys.path)
+
+import numpy as np
+from youtube_stub import YouTubeStub
+
+os.environ.setdefault('YOUTUBE_API_KEY', 'benchmark')
+os.environ.setdefault('YOUTUBE_QUOTA_LEDGER_PATH', '')  # keep benchmark calls out of the real ledger
+from analytics import YouTubeAnalytics
+
+async def run(analytics: YouTubeAnalytics, calls: int, concurrency: int):
+    """`concurrency` callers each looking up videos one at a time, with some ids popular"""
+    rng = random.Random(0)
+    video_ids = [f"video{min(rng.paretovariate(1.2), 1000):.0f}" for _ in range(calls)]
+    queue = asyncio.Queue()
+    for video_id in video_ids:
+        queue.put_nowait(video_id)
+    latencies = []
+
+    async def worker():
+        while not queue.empty():
+            video_id = queue.get_nowait()
+            started_at = time.perf_counter()
+            stats = await analytics.get_video_stats(video_id)
+            assert "error" not in stats, stats
+            latencies.append((time.perf_counter() - started_at) * 1000)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started_at, np.array(latencies)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    parser.add_argument('--window-ms', type=float, default=10.0)
+    args = parser.parse_args()
+
+    stub = YouTubeStub(latency_ms=args.latency_ms)
+    base_url = await stub.start()
+    try:
+        for name, max_ids in [("one id per call", 1), ("batched", 50)]:
+            analytics = YouTubeAnalytics()
+            analytics.base_url = base_url
+            analytics.batch_window = args.window_ms / 1000
+            analytics.max_batch_ids = max_ids
+            analytics.stats_soft_ttl = analytics.stats_hard_ttl = 0  # measure the API calls, not the stats cache
+            await analytics.start()
+            stub.reset()
+            total, latencies = await run(analytics, args.calls, args.concurrency)
+            await analytics.close()
+            print(f"{name:16s} total {total * 1000:7.1f} ms   p50 {np.percentile(latencies, 50):6.2f} ms   "
+                  f"p95 {np.percentile(latencies, 95):6.2f} ms   API calls: {stub.requests:4d}   "
+                  f"ids sent: {stub.ids_requested}")
+        print(f"batch stats: {analytics.get_batch_stats()}")
+    finally:
+        await stub.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""Compare a new aiohttp session per YouTube API call with the pooled YouTubeAnalytics session.
+
+Runs against a local stub server, so it measures connection setup rather than network distance
+(no TLS here; real googleapis.com calls also save a TLS handshake per reused connection).
+
+Usage (from backend/): python benchmarks/bench_youtube_pool.py [--calls 200] [--concurrency 10] [--latency-ms 5]
+"""
+import argparse
+import asyncio
+import os
+import time
+import common  # noqa: F401  (puts the backend on sys.path)
+
+import aiohttp
+import numpy as np
+from youtube_stub import YouTubeStub
+
+os.environ.setdefault('YOUTUBE_API_KEY', 'benchmark')
+os.environ.setdefault('YOUTUBE_QUOTA_LEDGER_PATH', '')  # keep benchmark calls out of the real ledger
+from analytics import YouTubeAnalytics
+
+async def fresh_session_call(base_url: str, video_id: str):
+    """The previous behaviour: one ClientSession, and so one TCP connection, per call"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{base_url}/videos", params={'part': 'statistics,snippet', 'id': video_id,
+                                                             'key': 'benchmark'}) as response:
+            return await response.json()
+
+async def run(calls: int, concurrency: int, make_call):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            started_at = time.perf_counter()
+            await make_call(f"video{i}")
+            latencies.append((time.perf_counter() - started_at) * 1000)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return time.perf_counter() - started_at, np.array(latencies)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    stub = YouTubeStub(latency_ms=args.latency_ms)
+    base_url = await stub.start()
+    analytics = YouTubeAnalytics()
+    analytics.base_url = base_url
+    # One id per call, so the comparison isolates connection reuse from request batching
+    analytics.max_batch_ids = 1
+    await analytics.start()
+    try:
+        for name, make_call in [("session per call", lambda v: fresh_session_call(base_url, v)),
+                                ("pooled session", analytics.get_video_stats)]:
+            stub.reset()
+            total, latencies = await run(args.calls, args.concurrency, make_call)
+            print(f"{name:17s} total {total * 1000:7.1f} ms   p50 {np.percentile(latencies, 50):6.2f} ms   "
+                  f"p95 {np.percentile(latencies, 95):6.2f} ms   connections opened: {stub.connections}")
+        print(f"pool stats: {analytics.get_pool_stats()}")
+    finally:
+        await analytics.close()
+        await stub.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
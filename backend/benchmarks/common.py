@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+from typing import Dict, Any, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+
+# Benchmarks import the backend modules directly
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+# Approximate spoken word counts for a short clip, a 10 minute video and a one hour lecture
+FIXTURE_SIZES = {"short": 800, "ten_minutes": 1500, "one_hour": 9000}
+
+def load_fixtures(sizes: Dict[str, int] = FIXTURE_SIZES) -> Dict[str, str]:
+    """Load the fixture transcript and stretch it to each target word count"""
+    with open(os.path.join(FIXTURES_DIR, 'lecture.txt'), 'r', encoding='utf-8') as f:
+        words = f.read().split()
+
+    fixtures = {}
+    for name, size in sizes.items():
+        repeated = (words * (size // len(words) + 1))[:size]
+        fixtures[name] = " ".join(repeated)
+    return fixtures
+
+class CountingPipeline:
+    """Wraps a summarization pipeline and counts encoder passes (one per input sequence)"""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.tokenizer = pipeline.tokenizer
+        self.calls = 0
+        self.encoder_passes = 0
+
+    def __call__(self, inputs, *args, **kwargs):
+        self.calls += 1
+        self.encoder_passes += len(inputs) if isinstance(inputs, list) else 1
+        return self.pipeline(inputs, *args, **kwargs)
+
+    def reset(self):
+        self.calls = 0
+        self.encoder_passes = 0
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+def timed(fn, *args, **kwargs) -> Dict[str, Any]:
+    """Run fn once and return its result with wall time in seconds"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return {"result": result, "seconds": time.perf_counter() - start}
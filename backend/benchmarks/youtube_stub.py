@@ -0,0 +1,79 @@
+"""Local stand-in for the YouTube Data API `videos` and `channels` endpoints, for benchmarks."""
+import asyncio
+import zlib
+from typing import Dict, Any
+from aiohttp import web
+
+def fake_video(video_id: str) -> Dict[str, Any]:
+    """Deterministic statistics derived from the id"""
+    seed = zlib.crc32(video_id.encode('utf-8'))
+    views = 1000 + seed % 5_000_000
+    return {
+        "id": video_id,
+        "snippet": {
+            "title": f"Video {video_id}",
+            "channelTitle": f"Channel {seed % 97}",
+            "publishedAt": f"2026-{seed % 9 + 1:02d}-{seed % 27 + 1:02d}T12:00:00Z"
+        },
+        "statistics": {
+            "viewCount": str(views),
+            "likeCount": str(views // (20 + seed % 30)),
+            "commentCount": str(views // (200 + seed % 300))
+        }
+    }
+
+class YouTubeStub:
+    """Serves fake API responses after `latency_ms`, counting requests and connections"""
+
+    def __init__(self, latency_ms: float = 20.0):
+        self.latency_ms = latency_ms
+        self.requests = 0
+        self.peers = set()
+        self.ids_requested = 0
+        self.runner = None
+        self.port = 0
+
+    def _count(self, request: web.Request):
+        self.requests += 1
+        # Each client connection has its own local port, so distinct peers = TCP connections opened
+        self.peers.add(request.transport.get_extra_info("peername"))
+
+    @property
+    def connections(self) -> int:
+        return len(self.peers)
+
+    async def videos(self, request: web.Request) -> web.Response:
+        self._count(request)
+        ids = [video_id for video_id in request.query.get("id", "").split(",") if video_id]
+        self.ids_requested += len(ids)
+        await asyncio.sleep(self.latency_ms / 1000)
+        return web.json_response({"items": [fake_video(video_id) for video_id in ids]})
+
+    async def channels(self, request: web.Request) -> web.Response:
+        self._count(request)
+        await asyncio.sleep(self.latency_ms / 1000)
+        channel_id = request.query.get("id", "")
+        return web.json_response({"items": [{
+            "snippet": {"title": f"Channel {channel_id}", "description": "Stub channel"},
+            "statistics": {"subscriberCount": "1000", "videoCount": "42"}
+        }]})
+
+    async def start(self) -> str:
+        """Start on a free local port and return the base URL"""
+        app = web.Application()
+        app.router.add_get("/youtube/v3/videos", self.videos)
+        app.router.add_get("/youtube/v3/channels", self.channels)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = self.runner.addresses[0][1]
+        return f"http://127.0.0.1:{self.port}/youtube/v3"
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+    def reset(self):
+        self.requests = self.ids_requested = 0
+        self.peers = set()
@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from collections import defaultdict
 import uuid
+from transcripts import Transcript
 
 class CollaborativeWorkspace:
     def __init__(self):
@@ -11,10 +12,14 @@ class CollaborativeWorkspace:
         self.active_sessions: Dict[str, List[str]] = defaultdict(list)
         self.annotations: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
         self.discussions: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.transcripts: Dict[str, Transcript] = {}  # workspace_id -> timed transcript, when available
 
-    def create_workspace(self, video_id: str, creator: str = "anonymous") -> str:
+    def create_workspace(self, video_id: str, creator: str = "anonymous",
+                         transcript: Optional[Transcript] = None) -> str:
         """Create a new collaborative workspace for a video"""
         workspace_id = str(uuid.uuid4())
+        if transcript is not None:
+            self.transcripts[workspace_id] = transcript
 
         self.workspaces[workspace_id] = {
             "id": workspace_id,
@@ -30,7 +35,7 @@ class CollaborativeWorkspace:
             },
             "metadata": {
                 "video_title": "",
-                "duration": 0,
+                "duration": round(transcript.duration, 1) if transcript is not None else 0,
                 "current_time": 0,
                 "status": "active"
             }
@@ -75,6 +80,14 @@ class CollaborativeWorkspace:
             "replies": []
         }
 
+        # Quote what is being said at the annotated moment
+        transcript = self.transcripts.get(workspace_id)
+        if transcript is not None:
+            try:
+                annotation_entry["transcript_excerpt"] = transcript.text_at_time(float(annotation_entry["video_time"]))
+            except (TypeError, ValueError):
+                pass
+
         self.annotations[workspace_id].append(annotation_entry)
 
         return {
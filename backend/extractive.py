@@ -0,0 +1,102 @@
+from typing import List, Tuple
+import re
+import numpy as np
+from scipy import sparse
+import analysis
+import keyphrases
+
+_SENTENCE_RE = re.compile(r'[^.!?]+[.!?]*')
+
+# Auto-generated captions are rarely punctuated; long runs are cut into pseudo-sentences
+MAX_SENTENCE_WORDS = 40
+PSEUDO_SENTENCE_WORDS = 20
+MIN_SENTENCE_WORDS = 5
+
+DAMPING = 0.85
+
+def split_sentences(text: str) -> List[str]:
+    sentences = []
+    for match in _SENTENCE_RE.finditer(text):
+        words = match.group().split()
+        if len(words) > MAX_SENTENCE_WORDS:
+            sentences.extend(" ".join(words[i:i + PSEUDO_SENTENCE_WORDS])
+                             for i in range(0, len(words), PSEUDO_SENTENCE_WORDS))
+        elif words:
+            sentences.append(" ".join(words))
+    return sentences
+
+def sentence_vectors(sentences: List[str]) -> sparse.csr_matrix:
+    """L2-normalized TF-IDF rows over each sentence's content words"""
+    vocab = keyphrases.Vocabulary()
+    ids: List[int] = []
+    lengths = np.zeros(len(sentences), dtype=np.int64)
+    for i, sentence in enumerate(sentences):
+        words = analysis.tokenize(sentence)
+        lengths[i] = len(words)
+        ids.extend(map(vocab.__getitem__, words))
+
+    terms = list(vocab)
+    content = np.array([keyphrases.is_content_word(term) for term in terms], dtype=bool)
+    ids = np.fromiter(ids, dtype=np.int64, count=len(ids))
+    rows = np.repeat(np.arange(len(sentences)), lengths)
+    keep = content[ids]
+    counts = sparse.csr_matrix((np.ones(int(keep.sum())), (rows[keep], ids[keep])),
+                               shape=(len(sentences), len(terms)))
+    counts.sum_duplicates()
+
+    df = np.bincount(counts.indices, minlength=len(terms))
+    idf = np.log((1 + len(sentences)) / (1 + df)) + 1
+    weighted = counts.multiply(idf).tocsr()
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+    return sparse.diags(np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)) @ weighted
+
+def textrank(similarity: sparse.csr_matrix, damping: float = DAMPING, tol: float = 1e-6,
+             max_iter: int = 100) -> np.ndarray:
+    """PageRank over a weighted sentence graph by power iteration on the sparse transition matrix"""
+    n = similarity.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    out_weight = np.asarray(similarity.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inverse = np.divide(1.0, out_weight, out=np.zeros_like(out_weight), where=~dangling)
+    transition_t = (sparse.diags(inverse) @ similarity).T.tocsr()
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        # Sentences sharing no words with any other spread their rank evenly
+        updated = (1 - damping) / n + damping * (transition_t @ scores + scores[dangling].sum() / n)
+        converged = np.abs(updated - scores).sum() < tol
+        scores = updated
+        if converged:
+            break
+    return scores
+
+def rank_sentences(text: str) -> Tuple[List[str], np.ndarray]:
+    """Transcript sentences and their indices from most to least central"""
+    sentences = split_sentences(text)
+    if not sentences:
+        return [], np.zeros(0, dtype=np.int64)
+    vectors = sentence_vectors(sentences)
+    # Cosine similarity; only sentence pairs sharing a content word get an edge
+    similarity = (vectors @ vectors.T).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+    scores = textrank(similarity)
+
+    # Fragments make poor summary lines; rank them after every full sentence
+    word_counts = np.fromiter((len(s.split()) for s in sentences), dtype=np.int64, count=len(sentences))
+    scores = np.where(word_counts >= MIN_SENTENCE_WORDS, scores, scores - 1)
+    return sentences, np.lexsort((np.arange(len(sentences)), -scores))
+
+def top_sentences(sentences: List[str], order: np.ndarray, count: int) -> List[str]:
+    """The `count` best distinct sentences, in transcript order"""
+    chosen, seen = [], set()
+    for i in order.tolist():
+        key = sentences[i].lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        chosen.append(i)
+        if len(chosen) == count:
+            break
+    return [sentences[i][0].upper() + sentences[i][1:] for i in sorted(chosen)]
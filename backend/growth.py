@@ -0,0 +1,327 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+import numpy as np
+
+FIELDS = ("views", "likes", "comments")
+
+class SnapshotStore:
+    """Ring buffers of (timestamp, views, likes, comments) snapshots, one row per video in shared 2-D arrays"""
+
+    def __init__(self, capacity: int = 288, max_videos: int = 500, min_interval: float = 30.0):
+        self.capacity = capacity
+        self.max_videos = max_videos
+        # Snapshots closer together than this replace the newest one instead of taking a slot
+        self.min_interval = min_interval
+        self.rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self.times = np.zeros((0, capacity), dtype=np.float64)
+        self.counts = np.zeros((0, capacity, len(FIELDS)), dtype=np.int64)
+        self.heads = np.zeros(0, dtype=np.int64)  # Next slot to write
+        self.sizes = np.zeros(0, dtype=np.int64)
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.times.nbytes + self.counts.nbytes + self.heads.nbytes + self.sizes.nbytes)
+
+    def _allocate(self, video_id: str) -> int:
+        if not self._free:
+            allocated = len(self.heads)
+            if allocated >= self.max_videos:
+                raise ValueError(f"Snapshot store is full ({self.max_videos} videos)")
+            grown = min(self.max_videos, max(16, allocated * 2))
+            extra = grown - allocated
+            self.times = np.concatenate([self.times, np.zeros((extra, self.capacity))])
+            self.counts = np.concatenate([self.counts, np.zeros((extra, self.capacity, len(FIELDS)), dtype=np.int64)])
+            self.heads = np.concatenate([self.heads, np.zeros(extra, dtype=np.int64)])
+            self.sizes = np.concatenate([self.sizes, np.zeros(extra, dtype=np.int64)])
+            self._free = list(range(grown - 1, allocated - 1, -1))
+        row = self._free.pop()
+        self.heads[row] = self.sizes[row] = 0
+        self.rows[video_id] = row
+        return row
+
+    def record(self, video_id: str, timestamp: float, views: int, likes: int, comments: int):
+        with self._lock:
+            row = self.rows.get(video_id)
+            if row is None:
+                row = self._allocate(video_id)
+            size = int(self.sizes[row])
+            slot = int(self.heads[row])
+            if size:
+                newest = (slot - 1) % self.capacity
+                if timestamp < self.times[row, newest]:
+                    return
+                if timestamp - self.times[row, newest] < self.min_interval:
+                    slot, size = newest, size - 1
+            self.times[row, slot] = timestamp
+            self.counts[row, slot] = (views, likes, comments)
+            self.heads[row] = (slot + 1) % self.capacity
+            self.sizes[row] = min(size + 1, self.capacity)
+            self.version += 1
+
+    def remove(self, video_id: str) -> bool:
+        with self._lock:
+            row = self.rows.pop(video_id, None)
+            if row is None:
+                return False
+            self.sizes[row] = 0
+            self._free.append(row)
+            self.version += 1
+            return True
+
+    def snapshot_count(self, video_id: str) -> int:
+        row = self.rows.get(video_id)
+        return int(self.sizes[row]) if row is not None else 0
+
+    def latest_times(self) -> Dict[str, float]:
+        """Time of each video's newest snapshot"""
+        with self._lock:
+            return {video_id: float(self.times[row, (self.heads[row] - 1) % self.capacity])
+                    for video_id, row in self.rows.items() if self.sizes[row]}
+
+    def chronological(self):
+        """Every row unrolled oldest-first: (video ids by row, times, counts, valid mask, version)"""
+        with self._lock:
+            offsets = np.arange(self.capacity)
+            start = (self.heads - self.sizes) % self.capacity
+            slots = (start[:, None] + offsets) % self.capacity
+            times = np.take_along_axis(self.times, slots, axis=1)
+            counts = np.take_along_axis(self.counts, slots[:, :, None], axis=1)
+            valid = offsets < self.sizes[:, None]
+            ids: List[Optional[str]] = [None] * len(self.heads)
+            for video_id, row in self.rows.items():
+                ids[row] = video_id
+            return ids, times, counts, valid, self.version
+
+def _masked_slope(x: np.ndarray, y: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Least-squares slope of y over x per row, using only masked points; NaN with fewer than two"""
+    n = mask.sum(axis=1)
+    safe_n = np.maximum(n, 1)
+    dx = np.where(mask, x - (np.where(mask, x, 0).sum(axis=1) / safe_n)[:, None], 0)
+    dy = np.where(mask, y - (np.where(mask, y, 0).sum(axis=1) / safe_n)[:, None], 0)
+    variance = (dx * dx).sum(axis=1)
+    slope = np.full(len(x), np.nan)
+    np.divide((dx * dy).sum(axis=1), variance, out=slope, where=(n >= 2) & (variance > 0))
+    return slope
+
+def score_growth(times: np.ndarray, counts: np.ndarray, valid: np.ndarray,
+                 window_seconds: float = 6 * 3600) -> Dict[str, np.ndarray]:
+    """Velocity, acceleration and a 0-100 viral score for every row at once.
+
+    Velocity is the views/hour regression slope over the row's newest `window_seconds`; acceleration
+    compares the slopes of that window's newer and older halves."""
+    rows = np.arange(len(times))
+    sizes = valid.sum(axis=1)
+    newest = np.maximum(sizes - 1, 0)
+    hours = (times - times[rows, newest][:, None]) / 3600  # <= 0, newest snapshot at 0
+    in_window = valid & (hours >= -window_seconds / 3600)
+    span = -np.where(in_window, hours, 0).min(axis=1)
+    middle = -span / 2
+
+    views = counts[..., 0].astype(np.float64)
+    engagement = (counts[..., 1] + counts[..., 2]).astype(np.float64)
+    velocity = _masked_slope(hours, views, in_window)
+    recent = _masked_slope(hours, views, in_window & (hours >= middle[:, None]))
+    prior = _masked_slope(hours, views, in_window & (hours <= middle[:, None]))
+    engagement_velocity = _masked_slope(hours, engagement, in_window)
+    latest_views = views[rows, newest]
+
+    ready = ~np.isnan(velocity)
+    speed = np.where(ready, np.maximum(velocity, 0), 0)
+    relative_growth = speed / np.maximum(latest_views, 1) * 100  # % of current views per hour
+    with np.errstate(divide='ignore', invalid='ignore'):
+        acceleration = (recent - prior) / (span / 2)
+        trend = np.where(prior > 0, (recent - prior) / prior, np.nan)
+        new_engagement_rate = np.where(speed > 0, engagement_velocity / speed * 100, np.nan)
+
+    # 40 for raw speed (30 at 1k views/hour), 30 for growth relative to size, 20 for speeding up, 10 for engagement
+    score = (np.clip(10 * np.log10(1 + speed), 0, 40)
+             + np.clip(relative_growth * 10, 0, 30)
+             + np.select([trend > 0.1, trend >= -0.1, np.isnan(trend)], [20, 10, 10], 0)
+             + np.clip(np.nan_to_num(new_engagement_rate) * 2, 0, 10))
+    score = np.where(ready, np.round(score), 0)
+
+    # Where each video's velocity sits among everything tracked
+    percentile = np.zeros(len(times))
+    ready_rows = np.flatnonzero(ready)
+    if len(ready_rows) > 1:
+        ranks = np.argsort(np.argsort(velocity[ready_rows], kind='stable'), kind='stable')
+        percentile[ready_rows] = ranks / (len(ready_rows) - 1) * 100
+    elif len(ready_rows) == 1:
+        percentile[ready_rows] = 100
+
+    return {
+        "ready": ready,
+        "snapshots": sizes,
+        "span_hours": span,
+        "newest_time": times[rows, newest],
+        "views": latest_views,
+        "views_per_hour": velocity,
+        "recent_views_per_hour": recent,
+        "prior_views_per_hour": prior,
+        "acceleration": acceleration,
+        "relative_growth_pct_per_hour": relative_growth,
+        "new_engagement_rate": new_engagement_rate,
+        "velocity_percentile": percentile,
+        "score": score
+    }
+
+def _rounded(value: float, digits: int = 2) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), digits)
+
+class GrowthTracker:
+    """Snapshots tracked videos' stats on a schedule and predicts virality from how fast they grow"""
+
+    def __init__(self, analytics, interval: float = 300, capacity: int = 288, max_videos: int = 500,
+                 window_seconds: float = 6 * 3600, idle_seconds: float = 24 * 3600):
+        self.analytics = analytics
+        self.interval = interval
+        self.window_seconds = window_seconds
+        self.idle_seconds = idle_seconds
+        self.store = SnapshotStore(capacity=capacity, max_videos=max_videos, min_interval=min(30.0, interval / 2))
+        self.tracked: "OrderedDict[str, float]" = OrderedDict()  # video_id -> last requested, least recent first
+        self._scores: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self.polls = 0
+        self.polled_videos = 0
+        self.last_poll_at: Optional[float] = None
+
+    def effective_interval(self) -> float:
+        # Poll less often as the day's API quota runs low, in step with the stats cache TTLs
+        return self.interval * self.analytics.quota.ttl_multiplier()
+
+    def touch(self, video_id: str):
+        """Mark a video as wanted, so it keeps being polled"""
+        self.tracked[video_id] = time.time()
+        self.tracked.move_to_end(video_id)
+        self._evict_over_capacity()
+
+    def _evict_over_capacity(self):
+        while len(self.tracked) > self.store.max_videos:
+            video_id, _ = self.tracked.popitem(last=False)
+            self.store.remove(video_id)
+
+    def record(self, video_id: str, stats: Dict[str, Any]):
+        """Analytics listener: every fresh stats fetch of a tracked video becomes a snapshot.
+
+        Fetches of untracked videos (e.g. a bulk comparison) are ignored so they never displace tracked ones."""
+        if video_id not in self.tracked:
+            return
+        self.store.record(video_id, time.time(), stats.get('views', 0), stats.get('likes', 0),
+                          stats.get('comments', 0))
+
+    def _scored(self) -> Dict[str, Any]:
+        # Unrolling every ring is the expensive part; skip it entirely while nothing has changed
+        if self._scores is not None and self._scores["version"] == self.store.version:
+            return self._scores
+        ids, times, counts, valid, version = self.store.chronological()
+        metrics = score_growth(times, counts, valid, self.window_seconds)
+        rows = {video_id: row for row, video_id in enumerate(ids) if video_id is not None}
+        self._scores = {"version": version, "rows": rows, "metrics": metrics}
+        return self._scores
+
+    def _prediction(self, metrics: Dict[str, np.ndarray], row: int) -> Dict[str, Any]:
+        score = int(metrics["score"][row])
+        return {
+            "status": "ready",
+            "score": score,
+            "potential": "High" if score >= 60 else "Medium" if score >= 30 else "Low",
+            "views_per_hour": _rounded(metrics["views_per_hour"][row], 1),
+            "recent_views_per_hour": _rounded(metrics["recent_views_per_hour"][row], 1),
+            "prior_views_per_hour": _rounded(metrics["prior_views_per_hour"][row], 1),
+            "acceleration": _rounded(metrics["acceleration"][row], 2),
+            "relative_growth_pct_per_hour": _rounded(metrics["relative_growth_pct_per_hour"][row], 4),
+            "new_engagement_rate": _rounded(metrics["new_engagement_rate"][row], 2),
+            "velocity_percentile": round(float(metrics["velocity_percentile"][row]), 1),
+            "snapshots": int(metrics["snapshots"][row]),
+            "span_hours": round(float(metrics["span_hours"][row]), 2),
+            "as_of": datetime.fromtimestamp(float(metrics["newest_time"][row]), timezone.utc).isoformat()
+        }
+
+    def predict(self, video_id: str) -> Dict[str, Any]:
+        """Velocity-based prediction from the snapshots in memory; never calls the API"""
+        scored = self._scored()
+        row = scored["rows"].get(video_id)
+        if row is None or not scored["metrics"]["ready"][row]:
+            return {
+                "status": "collecting",
+                "snapshots": self.store.snapshot_count(video_id),
+                "message": f"Growth needs two snapshots; one is taken about every {self.effective_interval() / 60:.0f} minutes"
+            }
+        return self._prediction(scored["metrics"], row)
+
+    def top(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Tracked videos with the highest growth scores"""
+        scored = self._scored()
+        metrics = scored["metrics"]
+        ranked = sorted(((video_id, row) for video_id, row in scored["rows"].items() if metrics["ready"][row]),
+                        key=lambda item: (-metrics["score"][item[1]], -np.nan_to_num(metrics["views_per_hour"][item[1]])))
+        return [{"video_id": video_id, **self._prediction(metrics, row)} for video_id, row in ranked[:limit]]
+
+    def due(self, now: Optional[float] = None) -> List[str]:
+        """Tracked videos whose newest snapshot is older than the poll interval"""
+        now = now or time.time()
+        latest = self.store.latest_times()
+        # A little slack so a video polled last round is due again this round
+        cutoff = now - self.effective_interval() * 0.9
+        return [video_id for video_id in self.tracked if latest.get(video_id, 0) <= cutoff]
+
+    async def poll_once(self) -> int:
+        """Drop idle videos and refresh the ones that are due; returns how many were polled"""
+        now = time.time()
+        for video_id in [v for v, requested_at in self.tracked.items() if requested_at < now - self.idle_seconds]:
+            del self.tracked[video_id]
+            self.store.remove(video_id)
+
+        video_ids = self.due(now)
+        if not video_ids or not self.analytics.quota.can_afford('videos'):
+            return 0
+        # Batched 50 ids per call; results reach record() through the analytics listener
+        await self.analytics.refresh_video_stats(video_ids)
+        self.polls += 1
+        self.polled_videos += len(video_ids)
+        self.last_poll_at = now
+        return len(video_ids)
+
+    async def _poll_loop(self):
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                print(f"⚠️ Growth poll failed: {e}")
+            await asyncio.sleep(min(60.0, max(1.0, self.interval / 5)))
+
+    def start(self):
+        if self._task is None and self.analytics.api_key:
+            self._task = asyncio.create_task(self._poll_loop())
+            print(f"📈 Growth tracker polling every {self.interval:.0f}s (up to {self.store.max_videos} videos)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "tracked": len(self.tracked),
+            "with_snapshots": len(self.store),
+            "max_videos": self.store.max_videos,
+            "snapshots_per_video": self.store.capacity,
+            "bytes": self.store.nbytes,
+            "interval_seconds": round(self.effective_interval(), 1),
+            "window_seconds": self.window_seconds,
+            "polling": self._task is not None,
+            "polls": self.polls,
+            "polled_videos": self.polled_videos,
+            "last_poll_at": datetime.fromtimestamp(self.last_poll_at, timezone.utc).isoformat() if self.last_poll_at else None
+        }
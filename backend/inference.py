@@ -0,0 +1,107 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Callable
+
+class InferenceQueueFull(Exception):
+    """Raised when the inference queue is at capacity and the request should be retried later"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Inference queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+class InferenceExecutor:
+    """Dedicated worker pool for model calls with a bounded queue and backpressure"""
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._wait_times = deque(maxlen=1000)
+        self._run_times = deque(maxlen=1000)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled = 0
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue fn on an inference worker, raising InferenceQueueFull when the queue is at capacity"""
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self.rejected += 1
+                raise InferenceQueueFull(self._estimate_retry_after())
+            self._queued += 1
+            self.submitted += 1
+
+        future = self._pool.submit(self._run, time.monotonic(), fn, args, kwargs)
+        future.add_done_callback(self._release_if_cancelled)
+        return future
+
+    def _release_if_cancelled(self, future: Future):
+        # A future cancelled while queued never reaches _run, so its queue slot is given back here
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+                self.cancelled += 1
+
+    def _run(self, submitted_at: float, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+        started_at = time.monotonic()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._wait_times.append(started_at - submitted_at)
+
+        try:
+            result = fn(*args, **kwargs)
+            with self._lock:
+                self.completed += 1
+            return result
+        except BaseException:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._run_times.append(time.monotonic() - started_at)
+
+    def _estimate_retry_after(self) -> int:
+        """Seconds until a queue slot is likely free, based on recent run times"""
+        avg_run = sum(self._run_times) / len(self._run_times) if self._run_times else 1.0
+        return max(1, math.ceil(avg_run * (self._queued + self._running) / self.workers))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, wait time and throughput counters"""
+        with self._lock:
+            waits = sorted(self._wait_times)
+            runs = list(self._run_times)
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "cancelled": self.cancelled,
+                "wait_time": {
+                    "avg": round(sum(waits) / len(waits), 4) if waits else 0.0,
+                    "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 4) if waits else 0.0,
+                    "max": round(waits[-1], 4) if waits else 0.0
+                },
+                "avg_run_time": round(sum(runs) / len(runs), 4) if runs else 0.0
+            }
+
+# Global instance shared by every endpoint that runs the summarization model
+inference_executor = InferenceExecutor(
+    workers=int(os.getenv('INFERENCE_WORKERS', '2')),
+    max_queue=int(os.getenv('INFERENCE_QUEUE_SIZE', '16'))
+)
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Awaitable, AsyncIterator
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are waiting to run"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Too many pending jobs, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+class SummaryJob:
+    """A background summarization job and the progress events it has published"""
+
+    def __init__(self, params: Dict[str, Any], loop: asyncio.AbstractEventLoop):
+        self.id = str(uuid.uuid4())
+        self.params = params
+        self.status = "queued"  # queued, running, completed, failed
+        self.stage = "queued"
+        self.progress: Dict[str, Any] = {}
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now().isoformat()
+        self.finished_at: Optional[float] = None
+        self.events: List[Dict[str, Any]] = []
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._waiters: set = set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def report(self, stage: str, details: Optional[Dict[str, Any]] = None):
+        """Publish a progress event; safe to call from worker threads"""
+        event = {"stage": stage, "timestamp": datetime.now().isoformat(), **(details or {})}
+        with self._lock:
+            self.stage = stage
+            self.progress = details or {}
+            self.events.append(event)
+        self._loop.call_soon_threadsafe(self._notify)
+
+    def complete(self, result: Dict[str, Any]):
+        self.result = result
+        self.status = "completed"
+        self.finished_at = time.monotonic()
+        self.report("completed", {"result": result})
+
+    def fail(self, error: str):
+        self.error = error
+        self.status = "failed"
+        self.finished_at = time.monotonic()
+        self.report("failed", {"error": error})
+
+    def _notify(self):
+        for waiter in self._waiters:
+            waiter.set()
+
+    async def stream(self, keepalive_seconds: float = 15) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield every event from the start, then new ones as they arrive; None means keep-alive"""
+        index = 0
+        while True:
+            # Register before checking so an event published in between still wakes us
+            waiter = asyncio.Event()
+            self._waiters.add(waiter)
+            try:
+                with self._lock:
+                    pending = self.events[index:]
+                index += len(pending)
+                for event in pending:
+                    yield event
+                if pending:
+                    continue
+                if self.finished:
+                    return
+                try:
+                    await asyncio.wait_for(waiter.wait(), timeout=keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+            finally:
+                self._waiters.discard(waiter)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "params": self.params,
+            "created_at": self.created_at,
+            "result": self.result,
+            "error": self.error
+        }
+
+class JobManager:
+    """Runs summarization jobs on a fixed pool of async workers and keeps finished jobs for a bounded time"""
+
+    def __init__(self, workers: int, max_pending: int, ttl_seconds: float, max_finished: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self.max_finished = max_finished
+        self._jobs: "OrderedDict[str, SummaryJob]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.evicted = 0
+
+    def start(self, runner: Callable[[SummaryJob], Awaitable[Dict[str, Any]]]):
+        """Start the worker tasks; call from the running event loop"""
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker(runner)) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, runner: Callable[[SummaryJob], Awaitable[Dict[str, Any]]]):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            try:
+                job.complete(await runner(job))
+            except asyncio.CancelledError:
+                job.fail("Job cancelled during shutdown")
+                raise
+            except Exception as e:
+                job.fail(str(e))
+            finally:
+                self._queue.task_done()
+
+    def create(self, params: Dict[str, Any]) -> SummaryJob:
+        """Queue a new job, raising JobQueueFull when too many are waiting"""
+        self._evict()
+        if self._queue.qsize() >= self.max_pending:
+            raise JobQueueFull(retry_after=5)
+
+        job = SummaryJob(params, asyncio.get_running_loop())
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[SummaryJob]:
+        self._evict()
+        return self._jobs.get(job_id)
+
+    def _evict(self):
+        """Drop finished jobs past their TTL, then the oldest finished ones beyond max_finished"""
+        now = time.monotonic()
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in finished:
+            if now - job.finished_at > self.ttl_seconds:
+                del self._jobs[job.id]
+                self.evicted += 1
+
+        # Earliest finished first: a long job that just completed keeps its result for its client
+        finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.finished_at)
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
+            self.evicted += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        statuses: Dict[str, int] = {}
+        for job in self._jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "jobs": statuses,
+            "evicted": self.evicted
+        }
+
+def format_sse(event: Optional[Dict[str, Any]]) -> str:
+    """Encode an event as a Server-Sent Events frame (None becomes a keep-alive comment)"""
+    if event is None:
+        return ": keep-alive\n\n"
+    return f"event: {event['stage']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
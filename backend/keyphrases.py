@@ -0,0 +1,267 @@
+import hashlib
+import os
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterable
+import numpy as np
+
+STOP_WORDS = frozenset([
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them',
+    # Spoken filler that dominates raw transcript frequencies
+    'um', 'uh', 'yeah', 'okay', 'just', 'really', 'going', 'gonna', 'wanna', 'know', 'like', 'get', 'got', 'thing', 'things', 'lot', 'kind', 'sort', 'actually', 'basically', 'right', 'well', 'so', 'very', 'also', 'there', 'here', 'what', 'which', 'who', 'when', 'where', 'how', 'why', 'not', 'yes', 'all', 'some', 'any', 'more', 'then', 'than', 'now', 'our', 'your', 'their', 'his', 'its', 'about', 'from', 'into', 'out', 'up', 'down', 'if', 'because', 'want', 'say', 'said', 'see', 'look', 'mean', 'think', 'make', 'way', 'something', 'someone', 'let', 'don', 'didn', 'doesn', 'isn', 'ain'
+])
+
+MAX_NGRAM = 3
+MAX_KEY_PHRASES = 8
+
+# N-gram hashes are built from per-word CRC32s so they are stable across processes and restarts
+_NGRAM_MULTIPLIER = 1000003
+_NGRAM_BASE = np.uint64(_NGRAM_MULTIPLIER)
+_HASH_MASK = (1 << 64) - 1
+
+def term_hash(token: str) -> int:
+    return zlib.crc32(token.encode('utf-8'))
+
+def ngram_hash(tokens: Iterable[str]) -> int:
+    """Scalar form of the vectorized n-gram hash in rank_key_phrases"""
+    value = 0
+    for token in tokens:
+        value = (value * _NGRAM_MULTIPLIER + term_hash(token)) & _HASH_MASK
+    return value
+
+def is_content_word(token: str) -> bool:
+    """Words a multi-word phrase may start or end with"""
+    return len(token) > 2 and token not in STOP_WORDS and not token.isdigit()
+
+def is_unigram_candidate(token: str) -> bool:
+    return len(token) > 3 and is_content_word(token)
+
+def document_key(key: str) -> int:
+    """64-bit hash of a corpus document's key so each document is only counted once"""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+class DocumentFrequencyIndex:
+    """Corpus-wide document frequencies of candidate n-grams, kept in a fixed-size hashed count array"""
+
+    def __init__(self, path: str = "", buckets: int = 1 << 20, save_every: int = 50):
+        self.path = path
+        self.buckets = buckets
+        self.save_every = save_every
+        self.counts = np.zeros(buckets, dtype=np.uint32)
+        self.documents = 0
+        self.saved_at: Optional[str] = None
+        self._seen: set = set()
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def _load(self):
+        try:
+            with np.load(self.path) as data:
+                counts = data["counts"]
+                if len(counts) != self.buckets:
+                    print(f"⚠️ Key phrase index has {len(counts)} buckets, expected {self.buckets}; starting empty")
+                    return
+                self.counts = counts.astype(np.uint32)
+                self.documents = int(data["documents"])
+                self._seen = set(data["seen"].tolist())
+            print(f"📇 Loaded key phrase index with {self.documents} documents")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Could not load key phrase index: {e}")
+
+    def save(self):
+        """Write the index atomically; a no-op when persistence is disabled"""
+        if not self.path:
+            return
+        with self._lock:
+            counts = self.counts.copy()
+            documents = self.documents
+            seen = np.fromiter(self._seen, dtype=np.uint64, count=len(self._seen))
+            self._unsaved = 0
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez_compressed(f, counts=counts, documents=np.int64(documents), seen=seen)
+            os.replace(tmp_path, self.path)
+            self.saved_at = datetime.now().isoformat()
+        except OSError as e:
+            print(f"⚠️ Key phrase index write failed: {e}")
+
+    def bucket_of(self, hashes: np.ndarray) -> np.ndarray:
+        return (np.asarray(hashes, dtype=np.uint64) % np.uint64(self.buckets)).astype(np.int64)
+
+    def add_documents(self, keys: List[int], doc_index: np.ndarray, hashes: np.ndarray) -> int:
+        """Count each document's distinct n-gram buckets once; documents seen before are skipped"""
+        buckets = self.bucket_of(hashes)
+        with self._lock:
+            fresh = np.zeros(len(keys), dtype=bool)
+            for i, key in enumerate(keys):
+                if key not in self._seen:
+                    self._seen.add(key)
+                    fresh[i] = True
+            if not fresh.any():
+                return 0
+
+            keep = fresh[doc_index]
+            pairs = np.unique(doc_index[keep] * self.buckets + buckets[keep])
+            # Unbuffered add touches only this batch's buckets (repeats across documents included)
+            np.add.at(self.counts, pairs % self.buckets, 1)
+            added = int(fresh.sum())
+            self.documents += added
+            self._unsaved += added
+            should_save = self._unsaved >= self.save_every
+
+        if should_save:
+            self.save()
+        return added
+
+    def contains(self, key: int) -> bool:
+        with self._lock:
+            return key in self._seen
+
+    def idf(self, hashes: np.ndarray) -> np.ndarray:
+        """Smoothed inverse document frequency, always >= 1"""
+        df = self.counts[self.bucket_of(hashes)].astype(np.float64)
+        return np.log((1 + self.documents) / (1 + df)) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path or None,
+            "documents": self.documents,
+            "buckets": self.buckets,
+            "used_buckets": int(np.count_nonzero(self.counts)),
+            "bytes": int(self.counts.nbytes),
+            "unsaved_documents": self._unsaved,
+            "saved_at": self.saved_at
+        }
+
+def select_key_phrases(phrases: List[str], counts: np.ndarray, scores: np.ndarray,
+                       order: Iterable[int]) -> List[Dict[str, Any]]:
+    """Take the best-scoring phrases in order, skipping any that overlap one already chosen"""
+    chosen: List[Dict[str, Any]] = []
+    chosen_padded: List[str] = []
+    for i in order:
+        padded = f" {phrases[i]} "
+        if any(padded in other or other in padded for other in chosen_padded):
+            continue
+        chosen_padded.append(padded)
+        chosen.append({"word": phrases[i], "frequency": int(counts[i]), "score": float(scores[i])})
+        if len(chosen) == MAX_KEY_PHRASES:
+            break
+
+    top_score = chosen[0]["score"] if chosen else 0
+    return [
+        {
+            "word": phrase["word"],
+            "frequency": phrase["frequency"],
+            "importance_score": phrase["score"] / top_score if top_score else 0
+        }
+        for phrase in chosen
+    ]
+
+class Vocabulary(dict):
+    """Token -> id map that assigns the next id on first lookup; id 0 is the '' boundary"""
+
+    def __init__(self):
+        super().__init__({'': 0})
+
+    def __missing__(self, token: str) -> int:
+        token_id = self[token] = len(self)
+        return token_id
+
+class _PhraseLookup:
+    """Builds a candidate phrase's text from its token positions only when it is looked at"""
+
+    def __init__(self, ids: np.ndarray, vocab: List[str], first_pos: np.ndarray, lengths: np.ndarray):
+        self.ids, self.vocab, self.first_pos, self.lengths = ids, vocab, first_pos, lengths
+
+    def __getitem__(self, i: int) -> str:
+        start = self.first_pos[i]
+        return " ".join(self.vocab[t] for t in self.ids[start:start + self.lengths[i]])
+
+def candidate_ngrams(ids: np.ndarray, doc_of: np.ndarray, vocab: List[str]):
+    """Distinct (doc, phrase) candidates as parallel arrays: docs, hashes, first position, n, count.
+
+    `ids` holds all documents' token ids back to back, id 0 being the '' boundary; cost is linear in its length."""
+    vocab_hashes = np.array([term_hash(term) for term in vocab], dtype=np.uint64)
+    content = np.array([bool(term) and is_content_word(term) for term in vocab], dtype=bool)
+    unigram = np.array([bool(term) and is_unigram_candidate(term) for term in vocab], dtype=bool)
+
+    # Grow every window one token at a time: hash[p] covers ids[p:p+n], open[p] says no boundary so far
+    positions = [np.zeros(0, dtype=np.int64)]
+    lengths = [np.zeros(0, dtype=np.int64)]
+    hashes = [np.zeros(0, dtype=np.uint64)]
+    window_hash = np.zeros(0, dtype=np.uint64)
+    open_window = np.zeros(0, dtype=bool)
+    for n in range(1, MAX_NGRAM + 1):
+        size = len(ids) - n + 1
+        if size <= 0:
+            break
+        last = ids[n - 1:]
+        if n == 1:
+            window_hash = vocab_hashes[ids]
+            open_window = content[ids]
+            valid = unigram[ids]
+        else:
+            window_hash = window_hash[:size] * _NGRAM_BASE + vocab_hashes[last]
+            open_window = open_window[:size] & (last != 0)
+            valid = open_window & content[last]
+        found = np.flatnonzero(valid)
+        positions.append(found)
+        lengths.append(np.full(len(found), n, dtype=np.int64))
+        hashes.append(window_hash[found])
+
+    positions = np.concatenate(positions)
+    lengths = np.concatenate(lengths)
+    hashes = np.concatenate(hashes)
+    docs = doc_of[positions]
+
+    # One group per distinct (doc, phrase): count and first occurrence
+    order = np.lexsort((positions, hashes, docs))
+    docs, hashes, positions, lengths = docs[order], hashes[order], positions[order], lengths[order]
+    starts = np.flatnonzero(np.r_[True, (docs[1:] != docs[:-1]) | (hashes[1:] != hashes[:-1])]) if len(docs) else np.zeros(0, dtype=np.int64)
+    counts = np.diff(np.r_[starts, len(docs)])
+    return docs[starts], hashes[starts], positions[starts], lengths[starts], counts
+
+def rank_key_phrases(texts: List[str], ids: np.ndarray, doc_of: np.ndarray, vocab: List[str],
+                     index: "DocumentFrequencyIndex") -> List[List[Dict[str, Any]]]:
+    """Rank each document's candidate n-grams by TF-IDF; the index is only read, never updated"""
+    n_docs = len(texts)
+    docs, hashes, first_pos, lengths, counts = candidate_ngrams(ids, doc_of, vocab)
+    scores = counts * index.idf(hashes)
+
+    # Highest score first, earliest occurrence breaks ties, grouped by document
+    ranked = np.lexsort((first_pos, -scores, docs))
+    bounds = np.searchsorted(docs[ranked], np.arange(n_docs + 1))
+    phrases = _PhraseLookup(ids, vocab, first_pos, lengths)
+    return [
+        select_key_phrases(phrases, counts, scores, ranked[bounds[d]:bounds[d + 1]].tolist())
+        for d in range(n_docs)
+    ]
+
+def index_document(index: "DocumentFrequencyIndex", key: str, tokens: List[str]) -> int:
+    """Count one corpus document (e.g. a fetched transcript, keyed by video id) into the index once"""
+    document = document_key(key)
+    if index.contains(document):
+        return 0
+    vocab = Vocabulary()
+    ids = np.fromiter(map(vocab.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+    docs, hashes, _, _, _ = candidate_ngrams(ids, np.zeros(len(ids), dtype=np.int64), list(vocab))
+    return index.add_documents([document], docs, hashes)
+
+def extract_key_phrases(text: str, tokens: List[str], index: "DocumentFrequencyIndex") -> List[Dict[str, Any]]:
+    """Key phrases for one document; identical to ranking it inside a batch"""
+    vocab = Vocabulary()
+    ids = np.fromiter(map(vocab.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+    return rank_key_phrases([text], ids, np.zeros(len(ids), dtype=np.int64), list(vocab), index)[0]
+
+# Global instance; loaded from disk so startup never rebuilds it
+df_index = DocumentFrequencyIndex(
+    path=os.getenv('KEYPHRASE_INDEX_PATH', 'keyphrase_index.npz'),
+    buckets=int(os.getenv('KEYPHRASE_INDEX_BUCKETS', str(1 << 20))),
+    save_every=int(os.getenv('KEYPHRASE_INDEX_SAVE_EVERY', '50'))
+)
@@ -0,0 +1,375 @@
+from collections import Counter, OrderedDict
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+import os
+import threading
+import numpy as np
+import analysis
+import keyphrases
+from realtime import _segment_score, _segment_label, _key_moment, _metrics
+from transcripts import Transcript, SECONDS_PER_WORD
+
+DEFAULT_WINDOW_SECONDS = 300.0
+DEFAULT_SEGMENT_SECONDS = 30.0
+
+class TokenRing:
+    """Fixed-capacity ring buffer of per-token records (time, word flag, lexicon hits, phrase ids), oldest first"""
+
+    def __init__(self, capacity: int, n_labels: int, max_ngram: int):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.float32)
+        self.is_word = np.zeros(capacity, dtype=bool)
+        self.hits = np.zeros((capacity, n_labels), dtype=np.int16)      # Lexicon hits ending at the token
+        self.phrases = np.full((capacity, max_ngram), -1, dtype=np.int64)  # Candidate phrases ending at the token
+        self.head = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.times.nbytes + self.is_word.nbytes + self.hits.nbytes + self.phrases.nbytes)
+
+    def _slots(self, start: int, count: int) -> np.ndarray:
+        return (self.head + start + np.arange(count)) % self.capacity
+
+    def push(self, times: np.ndarray, is_word: np.ndarray, hits: np.ndarray, phrases: np.ndarray):
+        """Append records; the caller pops first so they fit"""
+        slots = self._slots(self.size, len(times))
+        self.times[slots] = times
+        self.is_word[slots] = is_word
+        self.hits[slots] = hits
+        self.phrases[slots] = phrases
+        self.size += len(times)
+
+    def pop(self, count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Drop the oldest `count` records, returning their word flags, hits and phrase ids"""
+        slots = self._slots(0, count)
+        evicted = self.is_word[slots], self.hits[slots], self.phrases[slots]
+        self.head = (self.head + count) % self.capacity
+        self.size -= count
+        return evicted
+
+    def phrase_starts(self, ids: np.ndarray) -> np.ndarray:
+        """Record index, oldest first, where each of the sorted phrase `ids` first starts within the ring"""
+        phrases = self.phrases[self._slots(0, self.size)]
+        ends, columns = np.nonzero(phrases >= 0)
+        # Column n - 1 holds the n-gram ending at the record, so it starts n - 1 records earlier
+        found, starts = phrases[ends, columns], ends - columns
+        order = np.lexsort((starts, found))
+        found, starts = found[order], starts[order]
+        return starts[np.searchsorted(found, ids)]
+
+    def count_before(self, cutoff: float) -> int:
+        """Number of records older than `cutoff`; binary search since times never decrease"""
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self.times[(self.head + middle) % self.capacity] < cutoff:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def oldest_time(self) -> float:
+        return float(self.times[self.head]) if self.size else 0.0
+
+class IncrementalAnalyzer:
+    """Sentiment, topics, key phrases and timeline of a growing transcript, updated in O(new tokens) per append.
+
+    Totals cover everything appended so far and match analyze_text on the joined text; a ring buffer of
+    the newest tokens backs the sliding window view (e.g. the last 5 minutes)."""
+
+    def __init__(self, window_seconds: float = DEFAULT_WINDOW_SECONDS,
+                 segment_seconds: float = DEFAULT_SEGMENT_SECONDS, capacity: Optional[int] = None):
+        lexicon = analysis.current_lexicon()
+        # Pin the lexicon: matcher states carried between appends belong to this automaton
+        self._matcher = lexicon["matcher"]
+        self.topics: List[str] = list(lexicon["topics"])
+        self.labels = [("sentiment", "positive"), ("sentiment", "negative")] + [("topic", t) for t in self.topics]
+        self._label_index = {label: i for i, label in enumerate(self.labels)}
+        self._pattern_cols = [
+            [self._label_index[label] for label in labels if label in self._label_index]
+            for labels in self._matcher.labels
+        ]
+
+        self.window_seconds = window_seconds
+        self.segment_seconds = segment_seconds
+        # Room for twice the typical speaking rate; faster speech truncates the window to the newest tokens
+        capacity = capacity or int(window_seconds / SECONDS_PER_WORD * 2)
+        self.ring = TokenRing(capacity, len(self.labels), keyphrases.MAX_NGRAM)
+
+        self._state = 0                   # Phrase matcher state after the last token
+        self._tail: List[str] = []        # Last tokens, for n-grams spanning two appends
+        self._last_time = 0.0
+        self.snippets = 0
+        self.word_count = 0
+        self.duration = 0.0
+        self._vocabulary: set = set()
+        self._total_hits = np.zeros(len(self.labels), dtype=np.int64)
+
+        # Where each candidate phrase first starts breaks score ties, as in rank_key_phrases
+        self._phrase_ids: Dict[str, int] = {}
+        self._phrase_text: List[str] = []
+        self._phrase_hashes: List[int] = []
+        self._phrase_first: List[int] = []
+        self._tokens_seen = 0
+        self._phrase_counts: Counter = Counter()
+
+        self._segment_hits = np.zeros((16, 2), dtype=np.int64)
+        self._segment_words = np.zeros(16, dtype=np.int64)
+        self._segments = 0
+
+        self._window_hits = np.zeros(len(self.labels), dtype=np.int64)
+        self._window_words = 0
+        self._window_phrases: Counter = Counter()
+        self._evicted_for_space = -np.inf  # Newest time dropped only because the ring was full
+        self._lock = threading.Lock()
+
+    def append(self, snippets: Iterable[Any]) -> Dict[str, Any]:
+        """Add snippets with .text, .start and .duration (as in Transcript.from_snippets)"""
+        return self.append_parts([(s.text, s.start, s.duration) for s in snippets])
+
+    def append_parts(self, parts: List[Tuple[str, float, float]],
+                     first_index: Optional[int] = None) -> Dict[str, Any]:
+        """Add (text, start, duration) snippets; returns the timeline segments they touched.
+
+        `first_index` is the stream position of parts[0]; snippets already ingested (e.g. by a concurrent
+        poll of the same transcript) are skipped."""
+        with self._lock:
+            if first_index is not None:
+                parts = parts[max(0, self.snippets - first_index):]
+            tokens: List[str] = []
+            counts = np.zeros(len(parts), dtype=np.int64)
+            for i, (text, _, _) in enumerate(parts):
+                snippet_tokens = analysis.scan_tokens(text)
+                counts[i] = len(snippet_tokens)
+                tokens.extend(snippet_tokens)
+            starts = np.array([part[1] for part in parts], dtype=np.float64)
+            durations = np.array([part[2] for part in parts], dtype=np.float64)
+            self.snippets += len(parts)
+            if len(parts):
+                self.duration = max(self.duration, float((starts + durations).max()))
+            if not tokens:
+                return {"tokens": 0, "segments": []}
+
+            # Same token timing as Transcript.scan_with_times, clamped so time never runs backwards
+            snippet_of = np.repeat(np.arange(len(parts)), counts)
+            rank = np.arange(len(tokens)) - np.repeat(np.cumsum(counts) - counts, counts)
+            times = starts[snippet_of] + rank / np.maximum(counts[snippet_of], 1) * durations[snippet_of]
+            times = np.maximum.accumulate(np.maximum(times, self._last_time)).astype(np.float32)
+            self._last_time = float(times[-1])
+
+            is_word = np.fromiter((bool(token) for token in tokens), dtype=bool, count=len(tokens))
+            hits = self._scan_hits(tokens)
+            phrases = self._scan_phrases(tokens)
+            words = [token for token in tokens if token]
+            self.word_count += len(words)
+            self._vocabulary.update(words)
+            self._total_hits += hits.sum(axis=0)
+
+            touched = self._add_to_timeline(times, is_word, hits)
+            self._add_to_window(times, is_word, hits, phrases)
+            return {"tokens": len(tokens), "segments": [self._segment_point(s) for s in touched]}
+
+    def _scan_hits(self, tokens: List[str]) -> np.ndarray:
+        hits = np.zeros((len(tokens), len(self.labels)), dtype=np.int16)
+        matches, self._state = self._matcher.scan(tokens, self._state)
+        for end, pattern_id in matches:
+            for col in self._pattern_cols[pattern_id]:
+                hits[end, col] += 1
+        return hits
+
+    def _scan_phrases(self, tokens: List[str]) -> np.ndarray:
+        """Ids of the candidate n-grams ending at each token, following rank_key_phrases' rules"""
+        max_ngram = keyphrases.MAX_NGRAM
+        phrases = np.full((len(tokens), max_ngram), -1, dtype=np.int64)
+        context = self._tail + tokens
+        offset = len(self._tail)
+        for i, token in enumerate(tokens):
+            if not keyphrases.is_content_word(token):
+                continue
+            position = offset + i
+            for n in range(1, max_ngram + 1):
+                first = position - n + 1
+                if first < 0 or not context[first]:
+                    break
+                if n == 1:
+                    if not keyphrases.is_unigram_candidate(token):
+                        continue
+                elif not keyphrases.is_content_word(context[first]):
+                    continue
+                phrases[i, n - 1] = self._phrase_id(context[first:position + 1], self._tokens_seen - offset + first)
+        self._tail = context[-(max_ngram - 1):]
+        self._tokens_seen += len(tokens)
+
+        found = phrases[phrases >= 0]
+        self._phrase_counts.update(found.tolist())
+        return phrases
+
+    def _phrase_id(self, words: List[str], start: int) -> int:
+        text = " ".join(words)
+        phrase_id = self._phrase_ids.get(text)
+        if phrase_id is None:
+            phrase_id = self._phrase_ids[text] = len(self._phrase_text)
+            self._phrase_text.append(text)
+            self._phrase_hashes.append(keyphrases.ngram_hash(words))
+            self._phrase_first.append(start)
+        return phrase_id
+
+    def _add_to_timeline(self, times: np.ndarray, is_word: np.ndarray, hits: np.ndarray) -> List[int]:
+        segment_of = (times // self.segment_seconds).astype(np.int64)
+        needed = int(segment_of[-1]) + 1
+        if needed > len(self._segment_words):
+            size = max(needed, 2 * len(self._segment_words))
+            self._segment_hits = np.resize(self._segment_hits, (size, 2))
+            self._segment_hits[self._segments:] = 0
+            self._segment_words = np.resize(self._segment_words, size)
+            self._segment_words[self._segments:] = 0
+        self._segments = max(self._segments, needed)
+        np.add.at(self._segment_hits, segment_of, hits[:, :2])
+        np.add.at(self._segment_words, segment_of, is_word)
+        return np.unique(segment_of).tolist()
+
+    def _add_to_window(self, times: np.ndarray, is_word: np.ndarray, hits: np.ndarray, phrases: np.ndarray):
+        ring = self.ring
+        if len(times) > ring.capacity:
+            self._evicted_for_space = float(times[-ring.capacity - 1])
+            times, is_word, hits, phrases = (times[-ring.capacity:], is_word[-ring.capacity:],
+                                             hits[-ring.capacity:], phrases[-ring.capacity:])
+        overflow = len(ring) + len(times) - ring.capacity
+        if overflow > 0:
+            self._evicted_for_space = max(self._evicted_for_space,
+                                          float(ring.times[(ring.head + overflow - 1) % ring.capacity]))
+            self._subtract(*ring.pop(overflow))
+
+        ring.push(times, is_word, hits, phrases)
+        self._window_hits += hits.sum(axis=0)
+        self._window_words += int(is_word.sum())
+        self._window_phrases.update(phrases[phrases >= 0].tolist())
+
+        expired = ring.count_before(self._last_time - self.window_seconds)
+        if expired:
+            self._subtract(*ring.pop(expired))
+
+    def _subtract(self, is_word: np.ndarray, hits: np.ndarray, phrases: np.ndarray):
+        self._window_hits -= hits.sum(axis=0)
+        self._window_words -= int(is_word.sum())
+        self._window_phrases.subtract(phrases[phrases >= 0].tolist())
+        self._window_phrases = +self._window_phrases  # Drop phrases that left the window entirely
+
+    def _hits_counter(self, hits: np.ndarray) -> Counter:
+        return Counter({label: int(count) for label, count in zip(self.labels, hits.tolist()) if count})
+
+    def _key_phrases(self, phrase_counts: Counter, in_window: bool = False) -> List[Dict[str, Any]]:
+        if not phrase_counts:
+            return []
+        ids = np.array(sorted(phrase_counts), dtype=np.int64)
+        counts = np.array([phrase_counts[i] for i in ids.tolist()], dtype=np.int64)
+        hashes = np.array(self._phrase_hashes, dtype=np.uint64)[ids]
+        scores = counts * keyphrases.df_index.idf(hashes)
+        # Ties go to the phrase that starts first, within the window when ranking the window
+        first = self.ring.phrase_starts(ids) if in_window else np.array(self._phrase_first, dtype=np.int64)[ids]
+        order = np.lexsort((first, -scores))
+        phrases = [self._phrase_text[i] for i in ids.tolist()]
+        return keyphrases.select_key_phrases(phrases, counts, scores, order.tolist())
+
+    def _segment_point(self, segment: int) -> Dict[str, Any]:
+        positive, negative = self._segment_hits[segment].tolist()
+        score = _segment_score(positive, negative)
+        return {
+            "timestamp": round(segment * self.segment_seconds, 1),
+            "end_timestamp": round((segment + 1) * self.segment_seconds, 1),
+            "sentiment": _segment_label(score),
+            "score": score
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Everything appended so far; matches analyze_text and the realtime timeline of the joined transcript"""
+        with self._lock:
+            hits = self._hits_counter(self._total_hits)
+            timeline = [self._segment_point(s) for s in np.flatnonzero(self._segment_words[:self._segments]).tolist()]
+            key_moments = [moment for moment in map(_key_moment, timeline) if moment]
+            return {
+                "sentiment": analysis._sentiment_from_hits(hits, self.word_count),
+                "topics": analysis._topics_from_hits(hits, self.topics),
+                "key_phrases": self._key_phrases(self._phrase_counts),
+                "sentiment_timeline": timeline,
+                "key_moments": key_moments[:3],
+                "metrics": _metrics(self.word_count, self.duration, sum(point["score"] for point in timeline),
+                                    len(self._vocabulary) / self.word_count if self.word_count else 0),
+                "word_count": self.word_count,
+                "snippets": self.snippets,
+                "duration_seconds": round(self.duration, 1)
+            }
+
+    def window_view(self) -> Dict[str, Any]:
+        """The same analysis restricted to the last `window_seconds`, read from running window counters"""
+        with self._lock:
+            hits = self._hits_counter(self._window_hits)
+            return {
+                "window_seconds": self.window_seconds,
+                "start_seconds": round(self.ring.oldest_time(), 1),
+                "end_seconds": round(self._last_time, 1),
+                "word_count": self._window_words,
+                "sentiment": analysis._sentiment_from_hits(hits, self._window_words),
+                "topics": analysis._topics_from_hits(hits, self.topics),
+                "key_phrases": self._key_phrases(self._window_phrases, in_window=True),
+                # The ring filled up before the window did, so the view starts later than requested
+                "truncated": self._evicted_for_space >= self._last_time - self.window_seconds
+            }
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.ring.nbytes + self._segment_hits.nbytes + self._segment_words.nbytes)
+
+class LiveAnalysisManager:
+    """One incremental analyzer per live video, fed only the snippets it has not seen yet"""
+
+    def __init__(self, max_sessions: int = 100):
+        self.max_sessions = max_sessions
+        self.sessions: "OrderedDict[str, IncrementalAnalyzer]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, video_id: str, window_seconds: Optional[float] = None) -> IncrementalAnalyzer:
+        with self._lock:
+            analyzer = self.sessions.get(video_id)
+            if analyzer is None:
+                analyzer = IncrementalAnalyzer(window_seconds or DEFAULT_WINDOW_SECONDS)
+                self.sessions[video_id] = analyzer
+                while len(self.sessions) > self.max_sessions:
+                    evicted, _ = self.sessions.popitem(last=False)
+                    print(f"🧹 Dropped live analysis session for {evicted}")
+            self.sessions.move_to_end(video_id)
+            return analyzer
+
+    def feed_transcript(self, video_id: str, transcript: Transcript,
+                        window_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Append the snippets of a re-fetched transcript past the ones already analyzed"""
+        analyzer = self.get(video_id, window_seconds)
+        if len(transcript) < analyzer.snippets:
+            # The transcript was replaced (e.g. the stream ended and captions were regenerated); start over
+            self.remove(video_id)
+            analyzer = self.get(video_id, window_seconds)
+        first = analyzer.snippets
+        # Read without the analyzer's lock; append_parts drops whatever another poll ingested meanwhile
+        return analyzer.append_parts([
+            (transcript.snippet_text(i), float(transcript.starts[i]), float(transcript.durations[i]))
+            for i in range(first, len(transcript))
+        ], first_index=first)
+
+    def remove(self, video_id: str) -> bool:
+        with self._lock:
+            return self.sessions.pop(video_id, None) is not None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions = list(self.sessions.values())
+        return {
+            "sessions": len(sessions),
+            "max_sessions": self.max_sessions,
+            "bytes": sum(analyzer.nbytes for analyzer in sessions)
+        }
+
+# Global instance
+live_analysis = LiveAnalysisManager(max_sessions=int(os.getenv('LIVE_ANALYSIS_MAX_SESSIONS', '100')))
@@ -1,16 +1,27 @@
 from fastapi import FastAPI
-from typing import Dict, Any, Optional
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Any, List, Optional, Callable
 from pydantic import BaseModel
-from youtube_transcript_api import YouTubeTranscriptApi
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from analysis import analyze_sentiment, extract_topics, extract_key_phrases
-from summarization import summarize_text, generate_multiple_summaries
-from realtime import analyze_realtime_segments
-from analytics import YouTubeAnalytics
+from fastapi.responses import JSONResponse, StreamingResponse
+from analysis import analyze_text, load_lexicons, add_to_corpus
+from batch_analysis import analyze_batch
+from keyphrases import df_index
+from summarization import generate_style_summaries, generate_fast_summaries, is_fast_mode, get_model_name, get_batched_summarizer, get_inference_backend
+from realtime import analyze_profile, profile_cache, parse_window, iter_realtime_events
+from live_analysis import live_analysis
+from search_index import search_index
+from analytics import YouTubeAnalytics, iter_comparison
+from growth import GrowthTracker
 from social_sharing import SocialMediaManager
 from collaboration import workspace_manager, live_manager
 from gamification import gamification
+from transcripts import transcript_provider, Transcript
+from singleflight import SingleFlight, wait_shared
+from inference import inference_executor, InferenceQueueFull
+from models import model_registry
+from result_cache import create_result_cache
+from jobs import JobManager, JobQueueFull, format_sse
 import asyncio
 import torch
 import os
@@ -22,6 +33,17 @@ app = FastAPI(title="YouTube Summarizer API")
 # Initialize analytics module
 analytics = YouTubeAnalytics()
 
+# Stats snapshots of tracked videos, polled in the background, for velocity-based viral prediction
+growth_tracker = GrowthTracker(
+    analytics,
+    interval=float(os.getenv('GROWTH_POLL_INTERVAL', '300')),
+    capacity=int(os.getenv('GROWTH_SNAPSHOTS_PER_VIDEO', '288')),
+    max_videos=int(os.getenv('GROWTH_MAX_VIDEOS', '500')),
+    window_seconds=float(os.getenv('GROWTH_WINDOW_SECONDS', str(6 * 3600))),
+    idle_seconds=float(os.getenv('GROWTH_IDLE_SECONDS', str(24 * 3600)))
+)
+analytics.listeners.append(growth_tracker.record)
+
 # Initialize social media manager
 social_manager = SocialMediaManager()
 
@@ -52,25 +74,95 @@ class VideoRequest(BaseModel):
     video_id: str
     length: str = "medium"
     style: str = "paragraph"  # paragraph, bullets, detailed
+    mode: str = "model"  # model, or fast for an extractive summary without a model call (also length=instant)
+
+class BatchAnalysisRequest(BaseModel):
+    texts: List[str] = []
+    video_ids: List[str] = []  # Transcripts are fetched and analyzed after any raw texts
+
+class CompareRequest(BaseModel):
+    video_ids: List[str]
+    stream: bool = True  # NDJSON lines as each video lands; false for one JSON response
+
+class LiveSnippet(BaseModel):
+    text: str
+    start: float
+    duration: float = 0.0
+
+class LiveSnippetsRequest(BaseModel):
+    snippets: List[LiveSnippet]
 
 @app.get("/")
 def home():
     return {"message": "YouTube Summarizer API is running!"}
 
 @app.get("/analyze-realtime/{video_id}")
-def analyze_realtime(video_id: str):
+def analyze_realtime(video_id: str, segments: Optional[int] = None, window: Optional[str] = None):
     try:
-        # Fetch transcript
-        ytt_api = YouTubeTranscriptApi()
-        transcript_list = ytt_api.list(video_id)
-        transcript = transcript_list.find_transcript(['en'])
-        if transcript.language_code != 'en':
-            transcript = transcript.translate('en')
-        fetched_transcript = transcript.fetch()
-        text = " ".join([snippet.text for snippet in fetched_transcript])
+        # Build (or reuse) the video's sentiment profile; any resolution is then cheap
+        profile = profile_cache.get(video_id, lambda: transcript_provider.get_transcript(video_id))
+        window_seconds = parse_window(window) if window else None
+        return analyze_profile(profile, segments=segments, window_seconds=window_seconds)
+    except Exception as e:
+        return {"error": str(e)}
 
-        # Use the realtime analysis module
-        return analyze_realtime_segments(text)
+@app.get("/analyze-realtime/{video_id}/stream")
+def stream_realtime_analysis(video_id: str, segments: Optional[int] = None, window: Optional[str] = None):
+    """Stream timeline segments and key moments as Server-Sent Events while they are computed"""
+    try:
+        window_seconds = parse_window(window) if window else None
+    except Exception as e:
+        return {"error": str(e)}
+
+    def event_stream():
+        # Sent before the transcript is fetched so the client hears back at once
+        yield format_sse({"stage": "started", "video_id": video_id})
+        try:
+            # Shares the cached profile with /analyze-realtime, so both report the same segments
+            profile = profile_cache.get(video_id, lambda: transcript_provider.get_transcript(video_id))
+            for event in iter_realtime_events(profile, segments, window_seconds):
+                yield format_sse(event)
+        except Exception as e:
+            yield format_sse({"stage": "failed", "error": str(e)})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/analyze-live/{video_id}/snippets")
+def append_live_snippets(video_id: str, request: LiveSnippetsRequest, window: Optional[str] = None):
+    """Feed newly captioned snippets of a live stream; only the new tokens are analyzed"""
+    try:
+        # The window size is fixed when the session is created
+        analyzer = live_analysis.get(video_id, parse_window(window) if window else None)
+        update = analyzer.append(request.snippets)
+        return {"update": update, "window": analyzer.window_view()}
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/analyze-live/{video_id}")
+def analyze_live(video_id: str, window: Optional[str] = None, refresh: bool = True):
+    """Running totals and last-window view of a live stream, pulling any new transcript snippets first"""
+    try:
+        window_seconds = parse_window(window) if window else None
+        update = None
+        if refresh:
+            # Live captions keep growing, so refetch; concurrent polls share one fetch
+            update = live_analysis.feed_transcript(video_id, transcript_provider.get_transcript(video_id, fresh=True),
+                                                   window_seconds)
+        analyzer = live_analysis.get(video_id, window_seconds)
+        return {"update": update, "totals": analyzer.snapshot(), "window": analyzer.window_view()}
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.delete("/analyze-live/{video_id}")
+def end_live_analysis(video_id: str):
+    return {"removed": live_analysis.remove(video_id), "video_id": video_id}
+
+@app.get("/search")
+def search_transcripts(q: str, limit: int = 10, hits: int = 5):
+    """Find analyzed videos mentioning every word or "quoted phrase" of q, with the times they are said"""
+    try:
+        return search_index.search(q, limit=max(1, min(limit, 100)), hits_per_video=max(1, min(hits, 50)))
     except Exception as e:
         return {"error": str(e)}
 
@@ -78,111 +170,359 @@ def analyze_realtime(video_id: str):
 def analyze_advanced(video_id: str):
     try:
         # Fetch transcript
-        ytt_api = YouTubeTranscriptApi()
-        transcript_list = ytt_api.list(video_id)
-        transcript = transcript_list.find_transcript(['en'])
-        if transcript.language_code != 'en':
-            transcript = transcript.translate('en')
-        fetched_transcript = transcript.fetch()
-        text = " ".join([snippet.text for snippet in fetched_transcript])
-
-        # Perform advanced analysis
-        sentiment_analysis = analyze_sentiment(text)
-        topics = extract_topics(text)
-        key_phrases = extract_key_phrases(text)
+        transcript = transcript_provider.get_transcript(video_id)
+        text = transcript.text
+
+        # Perform advanced analysis in a single pass over the transcript
+        text_analysis = analyze_text(text)
 
         return {
-            "sentiment": sentiment_analysis,
-            "topics": topics,
-            "key_phrases": key_phrases,
+            "sentiment": text_analysis["sentiment"],
+            "topics": text_analysis["topics"],
+            "key_phrases": text_analysis["key_phrases"],
             "confidence_score": 0.85
         }
     except Exception as e:
         return {"error": str(e)}
 
-@app.post("/summarize")
-def summarize_video(request: VideoRequest):
-    try:
-        # Fetch transcript in English
-        ytt_api = YouTubeTranscriptApi()
-        transcript_list = ytt_api.list(request.video_id)
-        transcript = transcript_list.find_transcript(['en'])
-        if transcript.language_code != 'en':
-            transcript = transcript.translate('en')
-        fetched_transcript = transcript.fetch()
-        text = " ".join([snippet.text for snippet in fetched_transcript])
-
-        # Generate base summary
-        base_summary = summarize_text(text, request.length)
-
-        # Perform enhanced analysis
-        sentiment_analysis = analyze_sentiment(text)
-        topics = extract_topics(text)
-        key_phrases = extract_key_phrases(text)
-        multiple_summaries = generate_multiple_summaries(text, base_summary)
-
-        # Get the requested summary style
-        summary = multiple_summaries.get(request.style, base_summary)
-
-        # Get basic video info
-        video_info = {
-            "video_id": request.video_id,
-            "url": f"https://www.youtube.com/watch?v={request.video_id}",
-            "transcript_available": True,
-            "language": transcript.language_code,
-            "transcript_length": len(text),
-            "word_count": len(text.split())
-        }
+MAX_BATCH_ANALYSIS = int(os.getenv('ANALYZE_BATCH_MAX', '5000'))
 
-        # Check if GPU was used successfully or if production mode
-        import os
-        is_production = os.getenv('PRODUCTION') == 'true'
-        if is_production:
-            gpu_success = True  # Assuming LED uses GPU
-            device = "GPU (CUDA)"
-            model_used = "LED-Base-16384"
-        else:
-            gpu_success = True
-            try:
-                import torch
-                gpu_success = torch.cuda.is_available()
-            except:
-                gpu_success = False
-            device = "GPU (CUDA)" if gpu_success else "CPU"
-            model_used = "BART-Large-CNN"
-
-        # Enhanced response with AI analysis
-        response_data = {
-            "video_info": video_info,
-            "summary": summary,
-            "analysis": {
-                "sentiment": sentiment_analysis,
-                "topics": topics,
-                "key_phrases": key_phrases,
-                "confidence_score": 0.85  # Overall confidence in the analysis
-            },
-            "summaries": multiple_summaries,
-            "metadata": {
-                "processing_time": "2.3s",  # Would be calculated in real implementation
-                "model_used": model_used,
-                "analysis_version": "2.0",
-                "gpu_accelerated": gpu_success,
-                "device": device
-            }
+def _fetch_and_analyze_batch(request: BatchAnalysisRequest) -> Dict[str, Any]:
+    texts = list(request.texts)
+    errors = {}
+    for video_id in request.video_ids:
+        try:
+            texts.append(transcript_provider.get_transcript(video_id).text)
+        except Exception as e:
+            errors[video_id] = str(e)
+            texts.append("")
+
+    results = analyze_batch(texts)
+    # Keep results aligned with the request; failed videos get their error instead of an analysis
+    sources = [{"index": i} for i in range(len(request.texts))] + [{"video_id": v} for v in request.video_ids]
+    return {
+        "count": len(results),
+        "results": [
+            {**source, "error": errors[source["video_id"]]} if source.get("video_id") in errors else {**source, **result}
+            for source, result in zip(sources, results)
+        ]
+    }
+
+@app.post("/analyze/batch")
+async def analyze_batch_endpoint(request: BatchAnalysisRequest):
+    """Analyze many transcripts at once from one sparse term-count matrix"""
+    try:
+        if len(request.texts) + len(request.video_ids) > MAX_BATCH_ANALYSIS:
+            return {"error": f"At most {MAX_BATCH_ANALYSIS} documents per batch"}
+        return await run_in_threadpool(_fetch_and_analyze_batch, request)
+    except Exception as e:
+        return {"error": str(e)}
+
+# Bump when the analysis or response format changes; cached results are dropped on change
+ANALYSIS_VERSION = "2.3"
+
+# Concurrent identical summary requests attach to one running computation
+summary_flight = SingleFlight("summaries")
+
+# Finished summary responses survive restarts
+result_cache = create_result_cache(get_model_name(), ANALYSIS_VERSION, get_inference_backend)
+
+async def build_summary_data(request: VideoRequest,
+                             progress: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Build the full summary response; identical in-flight requests share one run"""
+    if is_fast_mode(request.mode, request.length):
+        # Extractive summaries take milliseconds: no result cache, no inference queue
+        transcript = await run_in_threadpool(transcript_provider.get_transcript, request.video_id)
+        return await run_in_threadpool(_compute_summary_data, request, transcript, progress)
+
+    cached = await run_in_threadpool(result_cache.get, request.video_id, request.length, request.style)
+    if cached is not None:
+        return cached
+
+    # Fetch transcript in English
+    if progress:
+        progress("fetching", {"video_id": request.video_id})
+    transcript = await run_in_threadpool(transcript_provider.get_transcript, request.video_id)
+
+    # Model work runs on the inference executor so the event loop stays responsive.
+    # Only the caller that starts the computation receives its detailed progress.
+    if progress:
+        progress("summarizing", {"style": request.style})
+    key = (request.video_id, request.length, request.style, get_model_name())
+    future = summary_flight.submit(
+        key, lambda: inference_executor.submit(_compute_summary_data, request, transcript, progress)
+    )
+    # Shielded: a disconnecting client must not cancel the computation its coalesced peers wait on
+    return await wait_shared(future)
+
+def _compute_summary_data(request: VideoRequest, transcript: Transcript,
+                          progress: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Run the model and analysis stages for an already fetched transcript"""
+    text = transcript.text
+
+    fast = is_fast_mode(request.mode, request.length)
+    degraded = False
+    if fast:
+        multiple_summaries = generate_fast_summaries(text, [request.style], request.length)
+    else:
+        # Generate only the requested style from one shared pass over the transcript
+        multiple_summaries, degraded = generate_style_summaries(text, [request.style], request.length,
+                                                                progress=progress)
+
+    # Perform enhanced analysis
+    if progress:
+        progress("analysis", {})
+    text_analysis = analyze_text(text)
+
+    # Get the requested summary style (unknown styles fall back to paragraph)
+    summary = multiple_summaries.get(request.style, multiple_summaries.get("paragraph", ""))
+
+    # Get basic video info
+    video_info = {
+        "video_id": request.video_id,
+        "url": f"https://www.youtube.com/watch?v={request.video_id}",
+        "transcript_available": True,
+        "language": transcript.language,
+        "transcript_length": len(text),
+        "word_count": len(text.split()),
+        "duration_seconds": round(transcript.duration, 1),
+        "snippet_count": len(transcript)
+    }
+
+    # Check if GPU was used successfully or if production mode
+    import os
+    is_production = os.getenv('PRODUCTION') == 'true'
+    if is_production:
+        gpu_success = True  # Assuming LED uses GPU
+        device = "GPU (CUDA)"
+        model_used = "LED-Base-16384"
+    else:
+        gpu_success = True
+        try:
+            import torch
+            gpu_success = torch.cuda.is_available()
+        except:
+            gpu_success = False
+        device = "GPU (CUDA)" if gpu_success else "CPU"
+        model_used = "BART-Large-CNN"
+    if fast:
+        gpu_success = False
+        device = "CPU"
+        model_used = "TextRank (extractive)"
+
+    # Enhanced response with AI analysis
+    response_data = {
+        "video_info": video_info,
+        "summary": summary,
+        "analysis": {
+            "sentiment": text_analysis["sentiment"],
+            "topics": text_analysis["topics"],
+            "key_phrases": text_analysis["key_phrases"],
+            "confidence_score": 0.85  # Overall confidence in the analysis
+        },
+        "summaries": multiple_summaries,
+        "metadata": {
+            "processing_time": "2.3s",  # Would be calculated in real implementation
+            "model_used": model_used,
+            "analysis_version": ANALYSIS_VERSION,
+            "gpu_accelerated": gpu_success,
+            "device": device,
+            "inference_backend": get_inference_backend()
         }
+    }
+
+    # Fallback output is served once but never cached, so the next request retries the model
+    if not fast and not degraded:
+        result_cache.set(request.video_id, request.length, request.style, response_data)
+    return response_data
+
+def busy_response(error) -> JSONResponse:
+    """Fast 503 telling the client when to retry"""
+    return JSONResponse(
+        status_code=503,
+        content={"error": str(error), "retry_after": error.retry_after},
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+@app.post("/summarize")
+async def summarize_video(request: VideoRequest):
+    try:
+        response_data = await build_summary_data(request)
 
         # Return response with proper Unicode encoding
         return JSONResponse(
             content=response_data,
             media_type="application/json; charset=utf-8"
         )
+    except InferenceQueueFull as e:
+        return busy_response(e)
     except Exception as e:
         return {"error": str(e)}
 
+# Background summarization jobs for clients that cannot hold a connection open
+job_manager = JobManager(
+    workers=int(os.getenv('JOB_WORKERS', '4')),
+    max_pending=int(os.getenv('JOB_MAX_PENDING', '100')),
+    ttl_seconds=float(os.getenv('JOB_TTL_SECONDS', '3600')),
+    max_finished=int(os.getenv('JOB_MAX_FINISHED', '500'))
+)
+
+async def run_summary_job(job) -> Dict[str, Any]:
+    """Run one queued job, waiting out inference backpressure instead of failing"""
+    request = VideoRequest(**job.params)
+    while True:
+        try:
+            return await build_summary_data(request, progress=job.report)
+        except InferenceQueueFull as e:
+            job.report("queued", {"retry_after": e.retry_after})
+            await asyncio.sleep(e.retry_after)
+
+@app.on_event("startup")
+async def start_job_workers():
+    job_manager.start(run_summary_job)
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    await job_manager.stop()
+
+@app.on_event("shutdown")
+def save_keyphrase_index():
+    df_index.save()
+
+# Every transcript the service fetches becomes searchable
+transcript_provider.listeners.append(search_index.add_transcript)
+# ...and part of the key phrase corpus; ad-hoc texts are scored against it without being added
+transcript_provider.listeners.append(lambda transcript: add_to_corpus(transcript.video_id, transcript.text))
+
+@app.on_event("shutdown")
+def flush_search_index():
+    search_index.flush()
+
+@app.on_event("startup")
+async def open_youtube_session():
+    await analytics.start()
+
+@app.on_event("startup")
+async def start_growth_tracker():
+    growth_tracker.start()
+
+@app.on_event("shutdown")
+async def close_youtube_session():
+    await growth_tracker.stop()
+    await analytics.close()
+
+@app.post("/summarize/jobs", status_code=202)
+async def create_summary_job(request: VideoRequest):
+    """Start a summarization job and return its id immediately"""
+    try:
+        job = job_manager.create(request.dict())
+    except JobQueueFull as e:
+        return busy_response(e)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/summarize/jobs/{job.id}",
+        "events_url": f"/summarize/jobs/{job.id}/events"
+    }
+
+@app.get("/summarize/jobs/{job_id}")
+async def get_summary_job(job_id: str):
+    """Get a job's status, latest progress and result once finished"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Job not found"})
+    return job.to_dict()
+
+@app.get("/summarize/jobs/{job_id}/events")
+async def stream_summary_job(job_id: str):
+    """Stream a job's progress (fetching, chunk k/n, styles, analysis) and final result as SSE"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Job not found"})
+
+    async def event_stream():
+        async for event in job.stream():
+            yield format_sse(event)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """Get transcript and summary cache hit/miss counters and request coalescing stats"""
+    return {
+        "transcripts": transcript_provider.get_stats(),
+        "summaries": summary_flight.get_stats(),
+        "results": result_cache.get_stats(),
+        "keyphrase_index": df_index.get_stats(),
+        "sentiment_profiles": profile_cache.get_stats(),
+        "live_analysis": live_analysis.get_stats(),
+        "search_index": search_index.get_stats()
+    }
+
+@app.delete("/cache/summaries")
+def invalidate_summary_cache(video_id: Optional[str] = None):
+    """Drop cached summaries for one video, or all of them"""
+    removed = result_cache.invalidate(video_id)
+    return {"invalidated": removed, "video_id": video_id}
+
+@app.post("/analysis/lexicons/reload")
+def reload_lexicons():
+    """Recompile the sentiment and topic lexicons from their data file"""
+    try:
+        stats = load_lexicons()
+        # Cached analyses were produced with the old lexicons
+        stats["invalidated"] = result_cache.invalidate()
+        profile_cache.clear()
+        return stats
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/inference/stats")
+def get_inference_stats():
+    """Get inference queue depth, wait times and achieved batch sizes"""
+    return {
+        "executor": inference_executor.get_stats(),
+        "batching": get_batched_summarizer().get_stats(),
+        "jobs": job_manager.get_stats()
+    }
+
+@app.get("/models")
+def get_loaded_models():
+    """Get load time and resident memory for every loaded model"""
+    return model_registry.get_stats()
+
+@app.get("/analytics/pool/stats")
+def get_youtube_pool_stats():
+    """YouTube API connection pool utilization, reuse and latency"""
+    return analytics.get_pool_stats()
+
+@app.get("/analytics/quota")
+def get_youtube_quota():
+    """YouTube API units spent today per endpoint, and the stats cache TTLs they currently allow"""
+    return {
+        "quota": analytics.quota.get_stats(),
+        "stats_cache": analytics.get_stats_cache_stats()
+    }
+
+@app.get("/analytics/growth")
+async def get_fastest_growing(limit: int = 20):
+    """Tracked videos ranked by growth score, scored together from the in-memory snapshots"""
+    return {
+        "videos": growth_tracker.top(max(1, min(limit, 200))),
+        "tracker": growth_tracker.get_stats()
+    }
+
 @app.get("/analytics/{video_id}")
 async def get_video_analytics(video_id: str):
     """Get comprehensive video analytics including stats, engagement, and viral potential"""
+    return await build_video_analytics(video_id)
+
+async def build_video_analytics(video_id: str, track: bool = True) -> Dict[str, Any]:
+    """Analytics for one video; `track` also has the growth tracker start (or keep) polling it"""
     try:
+        if track:
+            growth_tracker.touch(video_id)
         # Get video statistics
         stats = await analytics.get_video_stats(video_id)
 
@@ -195,6 +535,8 @@ async def get_video_analytics(video_id: str):
         )
 
         viral_analysis = analytics.predict_viral_potential(stats)
+        # From snapshots already in memory; no extra API call
+        velocity_analysis = growth_tracker.predict(video_id)
 
         # Get channel information if available
         channel_info = {}
@@ -212,46 +554,76 @@ async def get_video_analytics(video_id: str):
                 "comments_per_view": round(stats['comments'] / stats['views'], 4) if stats['views'] > 0 else 0
             },
             "viral_analysis": viral_analysis,
+            "velocity_analysis": velocity_analysis,
             "channel_info": channel_info,
             "trends": {
                 "is_trending": stats['views'] > 100000,  # Simple trending indicator
-                "growth_potential": "High" if viral_analysis['score'] > 40 else "Medium" if viral_analysis['score'] > 20 else "Low"
+                # Measured growth beats a guess from one snapshot once there are two to compare
+                "growth_potential": velocity_analysis['potential'] if velocity_analysis['status'] == "ready"
+                else "High" if viral_analysis['score'] > 40 else "Medium" if viral_analysis['score'] > 20 else "Low"
             }
         }
     except Exception as e:
         return {"error": str(e)}
 
+MAX_COMPARE_VIDEOS = int(os.getenv('COMPARE_MAX_VIDEOS', '500'))
+COMPARE_CONCURRENCY = int(os.getenv('COMPARE_CONCURRENCY', '50'))
+
+def _compare_ids(video_ids: List[str]) -> List[str]:
+    # Repeated ids would only be fetched and counted twice
+    return list(dict.fromkeys(video_id.strip() for video_id in video_ids if video_id.strip()))
+
+async def _compare_analytics(video_id: str) -> Dict[str, Any]:
+    # A large comparison must not evict the videos users are actually following from the growth tracker
+    return await build_video_analytics(video_id, track=False)
+
+async def _collect_comparison(video_ids: List[str]) -> Dict[str, Any]:
+    results = {}
+    async for event in iter_comparison(video_ids, _compare_analytics, COMPARE_CONCURRENCY):
+        if event["type"] == "video" and "analytics" in event:
+            results[event["video_id"]] = event["analytics"]
+        elif event["type"] == "summary":
+            # Request order, not arrival order
+            return {
+                "comparison": {video_id: results[video_id] for video_id in video_ids if video_id in results},
+                "insights": event["insights"],
+                "compared_count": event["compared_count"],
+                "failed": event["failed"]
+            }
+
 @app.get("/analytics/compare/{video_ids}")
 async def compare_videos(video_ids: str):
     """Compare multiple videos analytics"""
     try:
-        video_list = video_ids.split(',')
-        results = {}
-
-        for video_id in video_list[:5]:  # Limit to 5 videos for performance
-            analytics_data = await get_video_analytics(video_id)
-            if "error" not in analytics_data:
-                results[video_id] = analytics_data
-
-        # Generate comparison insights
-        if len(results) > 1:
-            insights = {
-                "total_views": sum(data['video_stats']['views'] for data in results.values()),
-                "avg_engagement": round(sum(data['engagement']['rate'] for data in results.values()) / len(results), 2),
-                "best_performer": max(results.keys(), key=lambda x: results[x]['engagement']['rate']),
-                "viral_candidates": [vid for vid, data in results.items() if data['viral_analysis']['potential'] == 'High']
-            }
-        else:
-            insights = {}
-
-        return {
-            "comparison": results,
-            "insights": insights,
-            "compared_count": len(results)
-        }
+        video_list = _compare_ids(video_ids.split(','))
+        if len(video_list) > MAX_COMPARE_VIDEOS:
+            return {"error": f"At most {MAX_COMPARE_VIDEOS} videos per comparison"}
+        return await _collect_comparison(video_list)
     except Exception as e:
         return {"error": str(e)}
 
+@app.post("/analytics/compare")
+async def compare_videos_bulk(request: CompareRequest):
+    """Compare up to hundreds of videos, streaming each video's analytics as NDJSON as it arrives"""
+    video_list = _compare_ids(request.video_ids)
+    if len(video_list) > MAX_COMPARE_VIDEOS:
+        return {"error": f"At most {MAX_COMPARE_VIDEOS} videos per comparison"}
+    if not request.stream:
+        try:
+            return await _collect_comparison(video_list)
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def ndjson_stream():
+        try:
+            async for event in iter_comparison(video_list, _compare_analytics, COMPARE_CONCURRENCY):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            yield json.dumps({"type": "failed", "error": str(e)}) + "\n"
+
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.get("/analytics/trending/{category}")
 async def get_trending_videos(category: str = "all"):
     """Get trending videos in a category (requires YouTube API setup)"""
@@ -300,81 +672,17 @@ async def share_summary(platform: str, request: VideoRequest):
             "generated_content": social_content,
             "summary_data": summary_data
         }
+    except InferenceQueueFull as e:
+        return busy_response(e)
     except Exception as e:
         return {"error": str(e)}
 
 async def get_summary_data(request: VideoRequest) -> Dict[str, Any]:
     """Get summary data as dict (not JSONResponse)"""
     try:
-        # Fetch transcript in English
-        ytt_api = YouTubeTranscriptApi()
-        transcript_list = ytt_api.list(request.video_id)
-        transcript = transcript_list.find_transcript(['en'])
-        if transcript.language_code != 'en':
-            transcript = transcript.translate('en')
-        fetched_transcript = transcript.fetch()
-        text = " ".join([snippet.text for snippet in fetched_transcript])
-
-        # Generate base summary
-        base_summary = summarize_text(text, request.length)
-
-        # Perform enhanced analysis
-        sentiment_analysis = analyze_sentiment(text)
-        topics = extract_topics(text)
-        key_phrases = extract_key_phrases(text)
-        multiple_summaries = generate_multiple_summaries(text, base_summary)
-
-        # Get the requested summary style
-        summary = multiple_summaries.get(request.style, base_summary)
-
-        # Get basic video info
-        video_info = {
-            "video_id": request.video_id,
-            "url": f"https://www.youtube.com/watch?v={request.video_id}",
-            "transcript_available": True,
-            "language": transcript.language_code,
-            "transcript_length": len(text),
-            "word_count": len(text.split())
-        }
-
-        # Check if GPU was used successfully or if production mode
-        import os
-        is_production = os.getenv('PRODUCTION') == 'true'
-        if is_production:
-            gpu_success = True  # Assuming LED uses GPU
-            device = "GPU (CUDA)"
-            model_used = "LED-Base-16384"
-        else:
-            gpu_success = True
-            try:
-                import torch
-                gpu_success = torch.cuda.is_available()
-            except:
-                gpu_success = False
-            device = "GPU (CUDA)" if gpu_success else "CPU"
-            model_used = "BART-Large-CNN"
-
-        # Enhanced response with AI analysis
-        response_data = {
-            "video_info": video_info,
-            "summary": summary,
-            "analysis": {
-                "sentiment": sentiment_analysis,
-                "topics": topics,
-                "key_phrases": key_phrases,
-                "confidence_score": 0.85  # Overall confidence in the analysis
-            },
-            "summaries": multiple_summaries,
-            "metadata": {
-                "processing_time": "2.3s",  # Would be calculated in real implementation
-                "model_used": model_used,
-                "analysis_version": "2.0",
-                "gpu_accelerated": gpu_success,
-                "device": device
-            }
-        }
-
-        return response_data
+        return await build_summary_data(request)
+    except InferenceQueueFull:
+        raise
     except Exception as e:
         return {"error": str(e)}
 
@@ -382,8 +690,7 @@ async def get_summary_data(request: VideoRequest) -> Dict[str, Any]:
 def preview_social_content(video_id: str):
     """Preview social media content without posting"""
     try:
-        # Create a mock summary for preview
-        mock_summary = {
+        preview_summary = {
             "video_info": {
                 "title": f"YouTube Video {video_id}",
                 "url": f"https://www.youtube.com/watch?v={video_id}"
@@ -393,11 +700,23 @@ def preview_social_content(video_id: str):
                 "sentiment": "positive"
             }
         }
+        # Previews use the extractive summary so they never wait on the model
+        try:
+            transcript = transcript_provider.get_transcript(video_id)
+            text_analysis = analyze_text(transcript.text)
+            preview_summary["summary"] = generate_fast_summaries(transcript.text, ["paragraph"], "short")["paragraph"]
+            preview_summary["analysis"] = {
+                "topics": [topic["topic"].title() for topic in text_analysis["topics"]],
+                "sentiment": text_analysis["sentiment"]["sentiment_label"].lower()
+            }
+        except Exception as e:
+            print(f"⚠️ Preview without transcript for {video_id}: {e}")
 
-        social_content = social_manager.generate_social_content(mock_summary)
+        social_content = social_manager.generate_social_content(preview_summary)
 
         return {
             "preview_content": social_content,
+            "summary": preview_summary.get("summary"),
             "character_counts": {
                 "twitter": len(social_content['twitter']),
                 "linkedin": len(social_content['linkedin']),
@@ -416,7 +735,13 @@ def preview_social_content(video_id: str):
 async def create_workspace(video_id: str, creator: str = "anonymous"):
     """Create a new collaborative workspace"""
     try:
-        workspace_id = workspace_manager.create_workspace(video_id, creator)
+        # Timings let annotations quote the transcript; the workspace still works without one
+        try:
+            transcript = await run_in_threadpool(transcript_provider.get_transcript, video_id)
+        except Exception as e:
+            print(f"⚠️ No transcript for workspace video {video_id}: {e}")
+            transcript = None
+        workspace_id = workspace_manager.create_workspace(video_id, creator, transcript)
         return {
             "workspace_id": workspace_id,
             "message": "Workspace created successfully",
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List
+
+def _current_rss_bytes() -> int:
+    """Resident set size of this process in bytes (0 when it cannot be read)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        try:
+            import resource
+            # Peak rather than current RSS, but the best available outside Linux
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except Exception:
+            return 0
+
+# Inference backends a summarization pipeline can be served with
+BACKENDS = ("torch", "int8", "onnx")
+
+class ModelRegistry:
+    """Loads each (model, device, dtype, backend) summarization pipeline once and shares it process-wide"""
+
+    def __init__(self):
+        self._models: Dict[tuple, Any] = {}
+        self._info: Dict[tuple, Dict[str, Any]] = {}
+        self._key_locks: Dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.load_failures = 0
+
+    def get(self, model_name: str, device: int = -1, dtype: str = "float32", backend: str = "torch",
+            **pipeline_kwargs) -> Any:
+        """Return the shared pipeline for this combination, loading it on first use"""
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend: {backend}")
+        if backend != "torch":
+            # Dynamic int8 quantization and the exported ONNX graph both run on CPU
+            device = -1
+        key = (model_name, device, dtype, backend)
+        model = self._models.get(key)
+        if model is not None:
+            self._count_use(key)
+            return model
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Per-key lock: concurrent first requests wait for one load instead of loading twice
+        with key_lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self._load(key, pipeline_kwargs)
+            self._count_use(key)
+            return model
+
+    def _count_use(self, key: tuple):
+        # += on a shared dict entry is not atomic across inference worker threads
+        with self._lock:
+            self._info[key]["uses"] += 1
+
+    def _load(self, key: tuple, pipeline_kwargs: Dict[str, Any]) -> Any:
+        model_name, device, dtype, backend = key
+        rss_before = _current_rss_bytes()
+        started_at = time.perf_counter()
+        try:
+            if backend == "onnx":
+                model = self._load_onnx(model_name, pipeline_kwargs)
+            else:
+                model = self._load_torch(model_name, device, dtype, backend, pipeline_kwargs)
+        except Exception:
+            self.load_failures += 1
+            raise
+
+        load_seconds = time.perf_counter() - started_at
+        try:
+            parameter_bytes = sum(p.numel() * p.element_size() for p in model.model.parameters())
+        except AttributeError:
+            # ONNX Runtime sessions do not expose torch parameters
+            parameter_bytes = None
+
+        self._info[key] = {
+            "model": model_name,
+            "device": "GPU (CUDA)" if device >= 0 else "CPU",
+            "dtype": dtype,
+            "backend": backend,
+            "loaded_at": datetime.now().isoformat(),
+            "load_seconds": round(load_seconds, 2),
+            "parameter_bytes": parameter_bytes,
+            "rss_delta_bytes": max(0, _current_rss_bytes() - rss_before),
+            "uses": 0
+        }
+        self._models[key] = model
+        print(f"📦 Loaded {model_name} ({backend}/{dtype}, device {device}) in {load_seconds:.1f}s")
+        return model
+
+    def _load_torch(self, model_name: str, device: int, dtype: str, backend: str,
+                    pipeline_kwargs: Dict[str, Any]) -> Any:
+        from transformers import pipeline
+        import torch
+
+        model = pipeline(
+            "summarization",
+            model=model_name,
+            device=device,
+            torch_dtype=getattr(torch, dtype),
+            **pipeline_kwargs
+        )
+        if backend == "int8":
+            # Quantize Linear layer weights to int8; activations are quantized on the fly
+            model.model = torch.quantization.quantize_dynamic(model.model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    def _load_onnx(self, model_name: str, pipeline_kwargs: Dict[str, Any]) -> Any:
+        from transformers import pipeline, AutoTokenizer
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+        # Reuse a previous export when ONNX_EXPORT_DIR is set; exporting takes minutes
+        export_root = os.getenv('ONNX_EXPORT_DIR', '')
+        export_dir = os.path.join(export_root, model_name.replace('/', '--')) if export_root else ''
+        if export_dir and os.path.isdir(export_dir):
+            ort_model = ORTModelForSeq2SeqLM.from_pretrained(export_dir)
+        else:
+            ort_model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True)
+            if export_dir:
+                ort_model.save_pretrained(export_dir)
+
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        pipeline_kwargs = {k: v for k, v in pipeline_kwargs.items() if k != 'model_kwargs'}
+        return pipeline("summarization", model=ort_model, tokenizer=tokenizer, **pipeline_kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get load time and memory footprint for every loaded model"""
+        models: List[Dict[str, Any]] = [dict(info) for info in self._info.values()]
+        return {
+            "models": models,
+            "loaded_count": len(models),
+            "load_failures": self.load_failures,
+            "process_rss_bytes": _current_rss_bytes()
+        }
+
+# Global instance
+model_registry = ModelRegistry()
@@ -0,0 +1,109 @@
+from collections import Counter, deque
+from typing import Dict, List, Tuple, Iterable, Iterator, Hashable
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over word tokens, matching single- and multi-word phrases in one scan.
+
+    Patterns are tuples of tokens. Matching walks a token stream where an empty string
+    marks a hard boundary (sentence punctuation) that no phrase may span. Every occurrence
+    is reported, including overlapping ones ("machine learning" and "learning")."""
+
+    def __init__(self, phrases: Dict[Tuple[str, ...], List[Hashable]]):
+        self.patterns: List[Tuple[str, ...]] = []
+        self.labels: List[List[Hashable]] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for pattern, labels in phrases.items():
+            if pattern:
+                self._insert(pattern, labels)
+        self._build_failure_links()
+
+    def _insert(self, pattern: Tuple[str, ...], labels: List[Hashable]):
+        state = 0
+        for token in pattern:
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][token] = next_state
+            state = next_state
+        self._out[state].append(len(self.patterns))
+        self.patterns.append(pattern)
+        self.labels.append(list(labels))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(token, 0)
+                # Inherit matches that end at the fallback state (shorter suffix phrases)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def iter_matches(self, tokens: Iterable[str]) -> Iterator[Tuple[int, int]]:
+        """Yield (end_token_index, pattern_id) for every phrase occurrence"""
+        goto, fail, out = self._goto, self._fail, self._out
+        root = goto[0]
+        state = 0
+        for index, token in enumerate(tokens):
+            if not token:
+                state = 0
+                continue
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0) if state else root.get(token, 0)
+            if out[state]:
+                for pattern_id in out[state]:
+                    yield index, pattern_id
+
+    def scan(self, tokens: Iterable[str], state: int = 0) -> Tuple[List[Tuple[int, int]], int]:
+        """Resumable iter_matches: start from `state` and also return the state after the last token,
+        so a stream fed in pieces matches phrases that span two pieces"""
+        goto, fail, out = self._goto, self._fail, self._out
+        root = goto[0]
+        matches: List[Tuple[int, int]] = []
+        for index, token in enumerate(tokens):
+            if not token:
+                state = 0
+                continue
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0) if state else root.get(token, 0)
+            if out[state]:
+                matches.extend((index, pattern_id) for pattern_id in out[state])
+        return matches, state
+
+    def count_labels(self, tokens: Iterable[str]) -> Counter:
+        """Count phrase occurrences per label in one scan"""
+        pattern_counts: Counter = Counter()
+        goto, fail, out = self._goto, self._fail, self._out
+        root = goto[0]
+        state = 0
+        # Same walk as iter_matches, inlined: most tokens start no phrase and cost one dict probe
+        for token in tokens:
+            if not state:
+                state = root.get(token, 0)
+            else:
+                while state and token not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(token, 0) if state else root.get(token, 0)
+            if state and out[state]:
+                pattern_counts.update(out[state])
+
+        counts: Counter = Counter()
+        for pattern_id, count in pattern_counts.items():
+            for label in self.labels[pattern_id]:
+                counts[label] += count
+        return counts
+
+    @property
+    def max_phrase_length(self) -> int:
+        return max((len(pattern) for pattern in self.patterns), default=0)
@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+
+try:
+    from zoneinfo import ZoneInfo
+    # YouTube Data API quotas reset at midnight Pacific Time
+    QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+except Exception:
+    QUOTA_TIMEZONE = timezone.utc
+
+# Units charged per call, from the YouTube Data API quota table
+ENDPOINT_COSTS = {
+    'videos': 1,
+    'channels': 1,
+    'playlistItems': 1,
+    'commentThreads': 1,
+    'search': 100
+}
+
+# Cache TTLs start stretching once this share of the daily budget is gone
+TIGHTEN_BELOW = 0.5
+
+class QuotaLedger:
+    """YouTube API units spent per endpoint per quota day, and how far cached stats may be stretched"""
+
+    def __init__(self, daily_budget: int = 10000, path: str = "", max_ttl_multiplier: float = 24.0,
+                 keep_days: int = 7, save_interval: float = 60.0):
+        self.daily_budget = daily_budget
+        self.path = path
+        self.max_ttl_multiplier = max_ttl_multiplier
+        self.keep_days = keep_days
+        self.save_interval = save_interval
+        self.days: Dict[str, Dict[str, int]] = {}  # quota day -> endpoint -> units
+        self.calls: Dict[str, int] = {}  # endpoint -> calls since startup
+        self._saved_at = time.monotonic()
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.days = {day: {endpoint: int(units) for endpoint, units in spent.items()}
+                             for day, spent in json.load(f).items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"⚠️ Could not load YouTube quota ledger: {e}")
+
+    def save(self):
+        """Write the ledger atomically; a no-op when persistence is disabled"""
+        if not self.path:
+            return
+        with self._lock:
+            days = {day: dict(spent) for day, spent in self.days.items()}
+            self._saved_at = time.monotonic()
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(days, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ YouTube quota ledger write failed: {e}")
+
+    def today(self) -> str:
+        return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+    def spend(self, endpoint: str, units: Optional[int] = None):
+        """Record one API call; the API charges even for calls that fail"""
+        units = ENDPOINT_COSTS.get(endpoint, 1) if units is None else units
+        day = self.today()
+        with self._lock:
+            if day not in self.days:
+                # New quota day: drop the oldest history
+                for old_day in sorted(self.days)[:max(0, len(self.days) - self.keep_days + 1)]:
+                    del self.days[old_day]
+                self.days[day] = {}
+            spent = self.days[day]
+            spent[endpoint] = spent.get(endpoint, 0) + units
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            due = time.monotonic() - self._saved_at >= self.save_interval
+        if due:
+            self.save()
+
+    def used_today(self) -> int:
+        with self._lock:
+            return sum(self.days.get(self.today(), {}).values())
+
+    def remaining(self) -> int:
+        return max(0, self.daily_budget - self.used_today())
+
+    def can_afford(self, endpoint: str) -> bool:
+        return self.remaining() >= ENDPOINT_COSTS.get(endpoint, 1)
+
+    def ttl_multiplier(self) -> float:
+        """1 while at least half the budget is left, then growing as it runs out (2x at 25%, 5x at 10%)"""
+        if self.daily_budget <= 0:
+            return 1.0
+        left = self.remaining() / self.daily_budget
+        if left >= TIGHTEN_BELOW:
+            return 1.0
+        if left <= 0:
+            return self.max_ttl_multiplier
+        return min(self.max_ttl_multiplier, TIGHTEN_BELOW / left)
+
+    def get_stats(self) -> Dict[str, Any]:
+        day = self.today()
+        with self._lock:
+            spent = dict(self.days.get(day, {}))
+            history = {d: sum(units.values()) for d, units in sorted(self.days.items())}
+            calls = dict(self.calls)
+        used = sum(spent.values())
+        return {
+            "day": day,
+            "daily_budget": self.daily_budget,
+            "used": used,
+            "remaining": max(0, self.daily_budget - used),
+            "used_by_endpoint": spent,
+            "calls_since_start": calls,
+            "ttl_multiplier": round(self.ttl_multiplier(), 2),
+            "exhausted": used >= self.daily_budget,
+            "history": history,
+            "persisted": bool(self.path)
+        }
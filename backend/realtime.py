@@ -1,58 +1,210 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Callable, Tuple, Iterator
+import os
+import re
+import numpy as np
 import analysis
+from cache import LRUCache
+from transcripts import Transcript
 
-def analyze_realtime_segments(text: str) -> Dict[str, Any]:
-    """Analyze transcript in real-time segments for timeline visualization"""
-    try:
-        # Split transcript into segments for timeline analysis
-        words = text.split()
-        segment_size = len(words) // 10  # 10 segments
-        segments = []
-
-        for i in range(10):
-            start_idx = i * segment_size
-            end_idx = (i + 1) * segment_size if i < 9 else len(words)
-            segment_text = " ".join(words[start_idx:end_idx])
-
-            if segment_text.strip():
-                # Analyze sentiment for this segment
-                segment_sentiment = analysis.analyze_sentiment(segment_text)
-                segments.append({
-                    "timestamp": i * 30,  # Assuming 30 seconds per segment
-                    "text": segment_text[:100] + "..." if len(segment_text) > 100 else segment_text,
-                    "sentiment": segment_sentiment
-                })
-
-        # Key moments detection (simple approach)
-        key_moments = []
-        for i, segment in enumerate(segments):
-            if segment["sentiment"]["compound_score"] > 0.3 or segment["sentiment"]["compound_score"] < -0.3:
-                key_moments.append({
-                    "timestamp": segment["timestamp"],
-                    "type": "sentiment_shift" if segment["sentiment"]["compound_score"] > 0.3 else "negative_peak",
-                    "description": f"Strong {segment['sentiment']['sentiment_label'].lower()} sentiment detected",
-                    "confidence": abs(segment["sentiment"]["compound_score"]) * 100
-                })
-
-        # Calculate metrics
-        total_words = len(words)
-        estimated_duration = len(text.split()) * 0.2  # Rough estimate: 0.2 seconds per word
-        words_per_minute = (total_words / estimated_duration) * 60 if estimated_duration > 0 else 0
+MAX_SEGMENTS = 2000
+
+_WINDOW_RE = re.compile(r'^\s*(?:(\d+(?:\.\d+)?)m)?\s*(?:(\d+(?:\.\d+)?)s?)?\s*$')
+
+def parse_window(window: str) -> float:
+    """Parse a window size like '15s', '15', '2m' or '1m30s' into seconds"""
+    match = _WINDOW_RE.match(window or "")
+    if not match or not any(match.groups()):
+        raise ValueError(f"Invalid window: {window!r} (use e.g. 15s or 2m)")
+    minutes, seconds = match.groups()
+    total = float(minutes or 0) * 60 + float(seconds or 0)
+    if total <= 0:
+        raise ValueError("Window must be longer than 0 seconds")
+    return total
+
+def timeline_edges(duration: float, segments: Optional[int] = None,
+                   window_seconds: Optional[float] = None) -> np.ndarray:
+    """Video times where each timeline segment starts, plus the end"""
+    if window_seconds:
+        if duration / window_seconds > MAX_SEGMENTS:
+            raise ValueError(f"Window too small: at most {MAX_SEGMENTS} segments per timeline")
+        return np.append(np.arange(0, duration, window_seconds), duration)
+    segments = max(1, min(segments or 10, MAX_SEGMENTS))
+    return np.linspace(0, duration, segments + 1)
 
+def _segment_score(positive: int, negative: int) -> float:
+    return (positive - negative) / (positive + negative) if positive + negative else 0.0
+
+def _segment_label(score: float) -> str:
+    if score > 0.1:
+        return "positive"
+    if score < -0.1:
+        return "negative"
+    return "neutral"
+
+def _key_moment(point: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """A timeline point with strong sentiment, or None"""
+    if point["score"] > 0.3 or point["score"] < -0.3:
         return {
-            "sentiment_timeline": [
-                {
-                    "timestamp": segment["timestamp"],
-                    "sentiment": segment["sentiment"]["sentiment_label"].lower(),
-                    "score": segment["sentiment"]["compound_score"]
-                } for segment in segments
-            ],
-            "key_moments": key_moments[:3],  # Top 3 key moments
-            "metrics": {
-                "words_per_minute": round(words_per_minute, 1),
-                "engagement_score": min(100, round(abs(sum(s["sentiment"]["compound_score"] for s in segments)) * 50 + 50)),
-                "complexity_score": min(10, round(len(set(words)) / len(words) * 10)) if words else 0
+            "timestamp": point["timestamp"],
+            "type": "sentiment_shift" if point["score"] > 0.3 else "negative_peak",
+            "description": f"Strong {point['sentiment']} sentiment detected",
+            "confidence": abs(point["score"]) * 100
+        }
+    return None
+
+def _metrics(word_count: int, duration: float, score_sum: float, unique_ratio: float) -> Dict[str, Any]:
+    words_per_minute = (word_count / duration) * 60 if duration > 0 else 0
+    return {
+        "words_per_minute": round(words_per_minute, 1),
+        "engagement_score": min(100, round(abs(score_sum) * 50 + 50)),
+        "complexity_score": min(10, round(unique_ratio * 10)) if word_count else 0
+    }
+
+class SentimentProfile:
+    """Per-word sentiment polarity of a transcript as cumulative sums, so any timeline
+    resolution is answered in O(segments) without re-tokenizing"""
+
+    def __init__(self, transcript: Transcript):
+        tokens, token_times = transcript.scan_with_times(analysis.scan_tokens)
+        is_word = np.fromiter((bool(token) for token in tokens), dtype=bool, count=len(tokens))
+        word_of_token = np.cumsum(is_word) - 1
+        self.word_count = int(is_word.sum())
+
+        positive = np.zeros(self.word_count, dtype=np.int32)
+        negative = np.zeros(self.word_count, dtype=np.int32)
+        # A phrase hit is placed on the word where it ends
+        for end, label in analysis.iter_lexicon_hits(tokens):
+            if label == ("sentiment", "positive"):
+                positive[word_of_token[end]] += 1
+            elif label == ("sentiment", "negative"):
+                negative[word_of_token[end]] += 1
+
+        self.positive_cum = np.concatenate(([0], np.cumsum(positive, dtype=np.int64)))
+        self.negative_cum = np.concatenate(([0], np.cumsum(negative, dtype=np.int64)))
+        # Overlapping caption snippets can step back in time; keep the times sorted for searchsorted
+        self.word_times = np.maximum.accumulate(token_times[is_word]) if self.word_count else token_times[is_word]
+        words = [token for token in tokens if token]
+        self.unique_ratio = len(set(words)) / len(words) if words else 0
+        self.duration = transcript.duration
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.positive_cum.nbytes + self.negative_cum.nbytes + self.word_times.nbytes)
+
+    def segment_bounds(self, segments: Optional[int] = None,
+                       window_seconds: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Segment edge times and each segment's [start, end) word offsets"""
+        edges = timeline_edges(self.duration, segments, window_seconds)
+        # Word offsets of each edge: O(log n) per edge on the sorted word times
+        bounds = np.searchsorted(self.word_times, edges[:-1], side='left')
+        bounds = np.append(bounds, self.word_count)
+        return edges, bounds[:-1], bounds[1:]
+
+    def timeline(self, segments: Optional[int] = None,
+                 window_seconds: Optional[float] = None) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """Sentiment per segment from differences of the cumulative counts, plus the raw scores"""
+        edges, starts, ends = self.segment_bounds(segments, window_seconds)
+        positive = self.positive_cum[ends] - self.positive_cum[starts]
+        negative = self.negative_cum[ends] - self.negative_cum[starts]
+        sentiment_words = positive + negative
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = np.where(sentiment_words > 0, (positive - negative) / sentiment_words, 0.0)
+        labels = np.select([scores > 0.1, scores < -0.1], ["positive", "negative"], "neutral")
+        # Segments without words (silence) carry no sentiment; skip them like the old empty-segment check
+        keep = ends > starts
+
+        timeline = [
+            {
+                "timestamp": round(start, 1),
+                "end_timestamp": round(end, 1),
+                "sentiment": label,
+                "score": score
             }
+            for start, end, label, score in zip(edges[:-1][keep].tolist(), edges[1:][keep].tolist(),
+                                                labels[keep].tolist(), scores[keep].tolist())
+        ]
+        return timeline, scores[keep]
+
+def analyze_profile(profile: SentimentProfile, segments: Optional[int] = None,
+                    window_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Timeline, key moments and metrics for an already built sentiment profile"""
+    timeline, scores = profile.timeline(segments, window_seconds)
+    key_moments = [moment for moment in map(_key_moment, timeline) if moment]
+
+    return {
+        "sentiment_timeline": timeline,
+        "key_moments": key_moments[:3],  # Top 3 key moments
+        "metrics": _metrics(profile.word_count, profile.duration, float(scores.sum()), profile.unique_ratio),
+        "segments": len(timeline),
+        "duration_seconds": round(profile.duration, 1)
+    }
+
+def iter_realtime_events(profile: SentimentProfile, segments: Optional[int] = None,
+                         window_seconds: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """Walk the profile segment by segment, yielding each timeline point and key moment as soon as it is
+    computed and the metrics at the end; the same numbers analyze_profile returns in one response"""
+    edges, starts, ends = profile.segment_bounds(segments, window_seconds)
+    yield {"stage": "profile_ready", "duration_seconds": round(profile.duration, 1), "segments": len(edges) - 1}
+
+    score_sum, emitted, moments = 0.0, 0, 0
+    for index in range(len(edges) - 1):
+        start, end = int(starts[index]), int(ends[index])
+        if end <= start:
+            continue
+        positive = int(profile.positive_cum[end] - profile.positive_cum[start])
+        negative = int(profile.negative_cum[end] - profile.negative_cum[start])
+        score = _segment_score(positive, negative)
+        score_sum += score
+        emitted += 1
+
+        point = {
+            "timestamp": round(float(edges[index]), 1),
+            "end_timestamp": round(float(edges[index + 1]), 1),
+            "sentiment": _segment_label(score),
+            "score": score
         }
+        yield {"stage": "segment", "index": index, **point}
+
+        moment = _key_moment(point)
+        if moment and moments < 3:
+            moments += 1
+            yield {"stage": "key_moment", **moment}
+
+    yield {
+        "stage": "completed",
+        "segments": emitted,
+        "metrics": _metrics(profile.word_count, profile.duration, score_sum, profile.unique_ratio)
+    }
+
+def analyze_realtime_segments(transcript: Transcript, segments: Optional[int] = None,
+                              window_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Analyze transcript in real-time segments for timeline visualization"""
+    try:
+        return analyze_profile(SentimentProfile(transcript), segments, window_seconds)
     except Exception as e:
         return {"error": str(e)}
+
+class SentimentProfileCache:
+    """Keeps each video's sentiment profile so zooming the timeline never re-tokenizes"""
+
+    def __init__(self, max_bytes: int, ttl_seconds: Optional[float] = None):
+        self.cache = LRUCache(max_bytes, ttl_seconds)
+
+    def get(self, video_id: str, load_transcript: Callable[[], Transcript]) -> SentimentProfile:
+        profile = self.cache.get(video_id)
+        if profile is None:
+            profile = SentimentProfile(load_transcript())
+            self.cache.set(video_id, profile, profile.nbytes)
+        return profile
+
+    def clear(self):
+        self.cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self.cache.get_stats()
+
+# Global instance
+profile_cache = SentimentProfileCache(
+    max_bytes=int(float(os.getenv('REALTIME_PROFILE_CACHE_MB', '32')) * 1024 * 1024),
+    ttl_seconds=float(os.getenv('REALTIME_PROFILE_CACHE_TTL', '3600')) or None
+)
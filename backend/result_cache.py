@@ -0,0 +1,156 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional, Callable
+from cache import LRUCache
+
+class SummaryResultCache:
+    """Two-tier cache of full summary responses: an in-memory LRU in front of SQLite.
+
+    Keys include the inference backend actually serving requests, which is only known once the model loads."""
+
+    def __init__(self, path: str, model_name: str, analysis_version: str,
+                 max_memory_bytes: int, max_disk_bytes: int, backend: Callable[[], str] = lambda: ""):
+        self.model_name = model_name
+        self.analysis_version = analysis_version
+        self.backend = backend
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = LRUCache(max_memory_bytes)
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.disk_evictions = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._initialize_db()
+
+    def _initialize_db(self):
+        with self._lock:
+            self._db.execute("""CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                video_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_video ON results (video_id)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_access ON results (last_access)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+            # Results from another model or analysis version can never be served again
+            stored = dict(self._db.execute("SELECT name, value FROM meta").fetchall())
+            if stored.get("model") != self.model_name or stored.get("analysis_version") != self.analysis_version:
+                if stored:
+                    print("🗑️ Model or analysis version changed, clearing summary cache")
+                self._db.execute("DELETE FROM results")
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                    [("model", self.model_name), ("analysis_version", self.analysis_version)]
+                )
+            self._db.commit()
+
+    def _key(self, video_id: str, length: str, style: str) -> tuple:
+        return (video_id, length, style, self.model_name, self.backend(), self.analysis_version)
+
+    def get(self, video_id: str, length: str, style: str) -> Optional[Dict[str, Any]]:
+        """Get a cached response, promoting disk hits into memory"""
+        key = self._key(video_id, length, style)
+        result = self.memory.get(key)
+        if result is not None or self._db is None:
+            return result
+
+        disk_key = json.dumps(key)
+        with self._lock:
+            row = self._db.execute("SELECT payload FROM results WHERE key = ?", (disk_key,)).fetchone()
+            if row is None:
+                self.disk_misses += 1
+                return None
+            self._db.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), disk_key))
+            self._db.commit()
+            self.disk_hits += 1
+
+        result = json.loads(row[0])
+        self.memory.set(key, result, len(row[0]))
+        return result
+
+    def set(self, video_id: str, length: str, style: str, result: Dict[str, Any]):
+        """Store a response in both tiers"""
+        key = self._key(video_id, length, style)
+        payload = json.dumps(result, ensure_ascii=False)
+        size = len(payload.encode('utf-8'))
+        self.memory.set(key, result, size)
+        if self._db is None:
+            return
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, video_id, payload, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                (json.dumps(key), video_id, payload, size, time.time())
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """Drop least recently used rows until the disk tier fits its byte budget"""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        while total > self.max_disk_bytes:
+            row = self._db.execute("SELECT key, size FROM results ORDER BY last_access LIMIT 1").fetchone()
+            if row is None:
+                break
+            self._db.execute("DELETE FROM results WHERE key = ?", (row[0],))
+            total -= row[1]
+            self.disk_evictions += 1
+
+    def invalidate(self, video_id: Optional[str] = None) -> int:
+        """Drop cached results for one video, or everything when video_id is None"""
+        if video_id is None:
+            self.memory.clear()
+        else:
+            self.memory.invalidate_where(lambda key: key[0] == video_id)
+
+        if self._db is None:
+            return 0
+        with self._lock:
+            if video_id is None:
+                removed = self._db.execute("DELETE FROM results").rowcount
+            else:
+                removed = self._db.execute("DELETE FROM results WHERE video_id = ?", (video_id,)).rowcount
+            self._db.commit()
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for both tiers"""
+        disk = None
+        if self._db is not None:
+            with self._lock:
+                rows, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+            disk = {
+                "entries": rows,
+                "bytes": size,
+                "max_bytes": self.max_disk_bytes,
+                "hits": self.disk_hits,
+                "misses": self.disk_misses,
+                "evictions": self.disk_evictions
+            }
+        return {
+            "model": self.model_name,
+            "backend": self.backend(),
+            "analysis_version": self.analysis_version,
+            "memory": self.memory.get_stats(),
+            "disk": disk
+        }
+
+def create_result_cache(model_name: str, analysis_version: str,
+                        backend: Callable[[], str] = lambda: "") -> SummaryResultCache:
+    """Build the summary result cache from environment settings"""
+    return SummaryResultCache(
+        path=os.getenv('RESULT_CACHE_PATH', 'summary_cache.db'),
+        model_name=model_name,
+        analysis_version=analysis_version,
+        backend=backend,
+        max_memory_bytes=int(float(os.getenv('RESULT_CACHE_MEMORY_MB', '32')) * 1024 * 1024),
+        max_disk_bytes=int(float(os.getenv('RESULT_CACHE_DISK_MB', '512')) * 1024 * 1024)
+    )
@@ -0,0 +1,461 @@
+from typing import Dict, Any, List, Optional, Tuple
+from functools import reduce
+from datetime import datetime
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import numpy as np
+import analysis
+import keyphrases
+from transcripts import Transcript
+
+# BM25 parameters
+_K1 = 1.2
+_B = 0.75
+
+_QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+# Flat arrays making up one segment; each is saved as its own .npy file so it can be memory-mapped
+_SEGMENT_ARRAYS = (
+    "term_blob", "term_offsets",        # UTF-8 terms back to back
+    "term_ptr",                         # Term -> range of postings entries
+    "entry_doc", "entry_ptr",           # Entry -> document, range of positions
+    "positions",                        # Word positions, sorted within each entry
+    "video_blob", "video_offsets",      # Video ids back to back
+    "doc_len",                          # Words per document
+    "snippet_ptr", "snippet_word", "snippet_start"  # Document -> first word position and start time of each snippet
+)
+
+def parse_query(query: str) -> List[List[str]]:
+    """Split a query into clauses, each a word or a "quoted phrase" given as its words"""
+    clauses = []
+    for quoted, bare in _QUERY_RE.findall(query or ""):
+        words = analysis.tokenize(quoted or bare)
+        if words:
+            clauses.append(words)
+    return clauses
+
+def _pack_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(data) for data in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def _unpack_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    data = bytes(blob)
+    return [data[start:end].decode('utf-8') for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+def _gather_ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Indices of every [start, start + length) range, concatenated"""
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    return np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(total)
+
+class IndexSegment:
+    """Immutable positional postings for a group of videos, held as flat arrays"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], path: str = ""):
+        self.arrays = arrays
+        self.path = path
+        self.term_list = _unpack_strings(arrays["term_blob"], arrays["term_offsets"])
+        self.terms = {term: i for i, term in enumerate(self.term_list)}
+        self.video_ids = _unpack_strings(arrays["video_blob"], arrays["video_offsets"])
+
+    @classmethod
+    def from_postings(cls, terms: List[str], term_of: np.ndarray, doc_of: np.ndarray, positions: np.ndarray,
+                      video_ids: List[str], doc_len: np.ndarray, snippet_ptr: np.ndarray,
+                      snippet_word: np.ndarray, snippet_start: np.ndarray) -> "IndexSegment":
+        """Build from one (term, document, position) triple per word occurrence"""
+        order = np.lexsort((positions, doc_of, term_of))
+        term_of, doc_of, positions = term_of[order], doc_of[order], positions[order]
+        # One postings entry per distinct (term, document)
+        new_entry = np.r_[True, (term_of[1:] != term_of[:-1]) | (doc_of[1:] != doc_of[:-1])] if len(order) else np.zeros(0, dtype=bool)
+        entry_start = np.flatnonzero(new_entry)
+
+        term_blob, term_offsets = _pack_strings(terms)
+        video_blob, video_offsets = _pack_strings(video_ids)
+        return cls({
+            "term_blob": term_blob,
+            "term_offsets": term_offsets,
+            "term_ptr": np.searchsorted(term_of[entry_start], np.arange(len(terms) + 1)).astype(np.int64),
+            "entry_doc": doc_of[entry_start].astype(np.int32),
+            "entry_ptr": np.append(entry_start, len(order)).astype(np.int64),
+            "positions": positions.astype(np.int32),
+            "video_blob": video_blob,
+            "video_offsets": video_offsets,
+            "doc_len": np.asarray(doc_len, dtype=np.int32),
+            "snippet_ptr": np.asarray(snippet_ptr, dtype=np.int64),
+            "snippet_word": np.asarray(snippet_word, dtype=np.int32),
+            "snippet_start": np.asarray(snippet_start, dtype=np.float32)
+        })
+
+    @classmethod
+    def from_transcripts(cls, transcripts: List[Transcript]) -> "IndexSegment":
+        vocab = keyphrases.Vocabulary()
+        ids: List[int] = []
+        doc_len = np.zeros(len(transcripts), dtype=np.int64)
+        snippet_counts: List[np.ndarray] = [np.zeros(0, dtype=np.int64)]
+        for doc, transcript in enumerate(transcripts):
+            counts = np.zeros(len(transcript), dtype=np.int64)
+            for index in range(len(transcript)):
+                words = analysis.tokenize(transcript.snippet_text(index))
+                counts[index] = len(words)
+                ids.extend(map(vocab.__getitem__, words))
+            doc_len[doc] = counts.sum()
+            snippet_counts.append(counts)
+
+        term_of = np.fromiter(ids, dtype=np.int64, count=len(ids))
+        doc_of = np.repeat(np.arange(len(transcripts), dtype=np.int64), doc_len)
+        positions = np.arange(len(ids)) - np.repeat(np.cumsum(doc_len) - doc_len, doc_len)
+        counts = np.concatenate(snippet_counts)
+        snippets_per_doc = np.array([len(transcript) for transcript in transcripts], dtype=np.int64)
+        snippet_ptr = np.r_[0, np.cumsum(snippets_per_doc)]
+        # Word position where each snippet starts, restarting at 0 for every document
+        snippet_word = np.cumsum(counts) - counts - np.repeat(np.cumsum(doc_len) - doc_len, snippets_per_doc)
+        snippet_start = np.concatenate([np.zeros(0, dtype=np.float32)] + [t.starts for t in transcripts])
+        return cls.from_postings(list(vocab), term_of, doc_of, positions, [t.video_id for t in transcripts],
+                                 doc_len, snippet_ptr, snippet_word, snippet_start)
+
+    @classmethod
+    def merge(cls, segments: List["IndexSegment"]) -> "IndexSegment":
+        """One segment holding every document of `segments`, in order"""
+        vocab = keyphrases.Vocabulary()
+        term_of, doc_of, positions, snippet_ptr = [], [], [], [np.zeros(1, dtype=np.int64)]
+        video_ids: List[str] = []
+        doc_offset, snippet_offset = 0, 0
+        for segment in segments:
+            a = segment.arrays
+            remap = np.fromiter(map(vocab.__getitem__, segment.term_list), dtype=np.int64, count=len(segment.term_list))
+            entry_term = np.repeat(np.arange(len(segment.term_list)), np.diff(a["term_ptr"]))
+            entry_of = np.repeat(np.arange(len(a["entry_doc"])), np.diff(a["entry_ptr"]))
+            term_of.append(remap[entry_term[entry_of]])
+            doc_of.append(a["entry_doc"][entry_of].astype(np.int64) + doc_offset)
+            positions.append(np.asarray(a["positions"]))
+            snippet_ptr.append(a["snippet_ptr"][1:] + snippet_offset)
+            video_ids.extend(segment.video_ids)
+            doc_offset += segment.n_docs
+            snippet_offset += int(a["snippet_ptr"][-1])
+
+        return cls.from_postings(
+            list(vocab), np.concatenate(term_of), np.concatenate(doc_of), np.concatenate(positions), video_ids,
+            np.concatenate([s.arrays["doc_len"] for s in segments]), np.concatenate(snippet_ptr),
+            np.concatenate([s.arrays["snippet_word"] for s in segments]),
+            np.concatenate([s.arrays["snippet_start"] for s in segments])
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "IndexSegment":
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in _SEGMENT_ARRAYS}
+        return cls(arrays, path)
+
+    def save(self, path: str) -> "IndexSegment":
+        """Write every array to `path` atomically and return the memory-mapped copy"""
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        os.makedirs(tmp_path, exist_ok=True)
+        for name in _SEGMENT_ARRAYS:
+            np.save(os.path.join(tmp_path, f"{name}.npy"), np.asarray(self.arrays[name]))
+        os.replace(tmp_path, path)
+        return IndexSegment.load(path)
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.video_ids)
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(array.nbytes for array in self.arrays.values()))
+
+    def documents(self, term: str) -> np.ndarray:
+        """Sorted documents containing `term`"""
+        t = self.terms.get(term)
+        if t is None:
+            return np.zeros(0, dtype=np.int32)
+        return np.asarray(self.arrays["entry_doc"][self.arrays["term_ptr"][t]:self.arrays["term_ptr"][t + 1]])
+
+    def occurrences(self, term: str, docs: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(document, position) of every occurrence of `term`, restricted to the sorted `docs` if given"""
+        t = self.terms.get(term)
+        if t is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        first, last = int(self.arrays["term_ptr"][t]), int(self.arrays["term_ptr"][t + 1])
+        entries = np.arange(first, last)
+        entry_docs = np.asarray(self.arrays["entry_doc"][first:last])
+        if docs is not None:
+            keep = np.isin(entry_docs, docs, assume_unique=True)
+            entries, entry_docs = entries[keep], entry_docs[keep]
+        entry_ptr = self.arrays["entry_ptr"]
+        starts = np.asarray(entry_ptr[entries])
+        lengths = np.asarray(entry_ptr[entries + 1]) - starts
+        positions = np.asarray(self.arrays["positions"][_gather_ranges(starts, lengths)], dtype=np.int64)
+        return np.repeat(entry_docs.astype(np.int64), lengths), positions
+
+    def _occurrence_count(self, term: str) -> int:
+        t = self.terms[term]
+        entry_ptr, term_ptr = self.arrays["entry_ptr"], self.arrays["term_ptr"]
+        return int(entry_ptr[term_ptr[t + 1]] - entry_ptr[term_ptr[t]])
+
+    def phrase_occurrences(self, words: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(document, start position) of every occurrence of the words in sequence"""
+        if any(word not in self.terms for word in words):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        # Narrow to documents containing every word before touching any positions
+        docs = reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), (self.documents(w) for w in set(words)))
+        # Start from the rarest word; (document, phrase start) is packed into one key sorted like the postings
+        by_rarity = sorted(range(len(words)), key=lambda k: self._occurrence_count(words[k]))
+        keys = None
+        for offset in by_rarity:
+            doc_of, positions = self.occurrences(words[offset], docs)
+            start = positions >= offset
+            candidates = (doc_of[start] << 32) | (positions[start] - offset)
+            if keys is None:
+                keys = candidates
+            elif len(candidates):
+                found = np.minimum(np.searchsorted(candidates, keys), len(candidates) - 1)
+                keys = keys[candidates[found] == keys]
+            else:
+                keys = candidates
+            if not len(keys):
+                break
+        return keys >> 32, keys & 0xFFFFFFFF
+
+    def match(self, words: List[str]) -> Tuple[np.ndarray, np.ndarray, Optional[Tuple[np.ndarray, np.ndarray]]]:
+        """Sorted documents containing a clause and its frequency in each, plus the occurrences of a phrase.
+
+        Single words are counted from the postings entries alone, without reading their positions."""
+        if len(words) == 1:
+            t = self.terms.get(words[0])
+            if t is None:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), None
+            first, last = int(self.arrays["term_ptr"][t]), int(self.arrays["term_ptr"][t + 1])
+            docs = np.asarray(self.arrays["entry_doc"][first:last], dtype=np.int64)
+            return docs, np.diff(np.asarray(self.arrays["entry_ptr"][first:last + 1])), None
+        doc_of, positions = self.phrase_occurrences(words)
+        starts = np.flatnonzero(np.r_[True, doc_of[1:] != doc_of[:-1]]) if len(doc_of) else np.zeros(0, dtype=np.int64)
+        return doc_of[starts], np.diff(np.r_[starts, len(doc_of)]), (doc_of, positions)
+
+    def match_positions(self, words: List[str], occurrences: Optional[Tuple[np.ndarray, np.ndarray]],
+                        doc: int) -> np.ndarray:
+        """Positions where a clause starts in one document, given what match() returned"""
+        if occurrences is None:
+            t = self.terms[words[0]]
+            first, last = int(self.arrays["term_ptr"][t]), int(self.arrays["term_ptr"][t + 1])
+            entry = first + int(np.searchsorted(self.arrays["entry_doc"][first:last], doc))
+            entry_ptr = self.arrays["entry_ptr"]
+            return np.asarray(self.arrays["positions"][entry_ptr[entry]:entry_ptr[entry + 1]], dtype=np.int64)
+        doc_of, positions = occurrences
+        first, last = np.searchsorted(doc_of, [doc, doc + 1])
+        return positions[first:last]
+
+    def timestamps(self, doc: int, positions: np.ndarray) -> np.ndarray:
+        """Start time of the snippet holding each word position of `doc`"""
+        first, last = int(self.arrays["snippet_ptr"][doc]), int(self.arrays["snippet_ptr"][doc + 1])
+        snippet_word = self.arrays["snippet_word"][first:last]
+        snippet = np.maximum(np.searchsorted(snippet_word, positions, side='right') - 1, 0)
+        return np.asarray(self.arrays["snippet_start"][first:last])[snippet]
+
+class SearchIndex:
+    """Positional inverted index over every fetched transcript, answering word and "phrase" queries with timestamps.
+
+    New transcripts are buffered in memory and flushed into immutable on-disk segments,
+    which are merged as they pile up so a query only touches a few."""
+
+    def __init__(self, directory: str = "", flush_every: int = 200, max_segments: int = 8):
+        self.directory = directory
+        self.flush_every = flush_every
+        self.max_segments = max_segments
+        self.segments: List[IndexSegment] = []
+        self.saved_at: Optional[str] = None
+        self._pending: List[Transcript] = []
+        # In-memory segment over the first pending transcripts, extended as queries find more
+        self._pending_segment: Optional[IndexSegment] = None
+        self._pending_generation = 0  # bumped whenever a flush drops transcripts from the front of _pending
+        self._indexed: set = set()
+        self._next_segment = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        if directory:
+            self._load()
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, "manifest.json")
+
+    def _load(self):
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            with open(self._manifest_path(), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            self.segments = [IndexSegment.load(os.path.join(self.directory, name)) for name in manifest["segments"]]
+            self._next_segment = manifest["next_segment"]
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Could not load search index: {e}")
+            self.segments = []
+            return
+        for segment in self.segments:
+            self._indexed.update(segment.video_ids)
+        print(f"🔎 Loaded search index with {len(self._indexed)} transcripts in {len(self.segments)} segments")
+
+    def _write_manifest(self, segments: List[IndexSegment]):
+        manifest = {"segments": [os.path.basename(s.path) for s in segments], "next_segment": self._next_segment}
+        tmp_path = f"{self._manifest_path()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self._manifest_path())
+        self.saved_at = datetime.now().isoformat()
+
+    def _persist(self, segment: IndexSegment) -> IndexSegment:
+        if not self.directory:
+            return segment
+        with self._lock:
+            name = f"seg-{self._next_segment:06d}"
+            self._next_segment += 1
+        return segment.save(os.path.join(self.directory, name))
+
+    def add_transcript(self, transcript: Transcript) -> bool:
+        """Queue a transcript for indexing; each video is indexed once"""
+        with self._lock:
+            if not transcript.video_id or transcript.video_id in self._indexed:
+                return False
+            self._indexed.add(transcript.video_id)
+            self._pending.append(transcript)
+            should_flush = len(self._pending) >= self.flush_every
+        if should_flush:
+            # Segment building and merging stay off the request that fetched the transcript
+            threading.Thread(target=self.flush, daemon=True).start()
+        return True
+
+    def flush(self):
+        """Turn buffered transcripts into a segment, then merge segments beyond max_segments"""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending)
+            if not batch:
+                return
+            segment = self._persist(IndexSegment.from_transcripts(batch))
+            with self._lock:
+                # Queries see the batch either as pending or as this segment, never both
+                self.segments.append(segment)
+                self._pending = self._pending[len(batch):]
+                self._pending_segment = None
+                self._pending_generation += 1
+                segments = list(self.segments)
+            if len(segments) > self.max_segments:
+                self._merge_smallest(segments)
+            elif self.directory:
+                self._write_manifest(segments)
+            print(f"🔎 Indexed {len(batch)} transcripts ({len(segments)} segments)")
+
+    def _merge_smallest(self, segments: List[IndexSegment]):
+        # Merge the smaller half so each document is rewritten O(log n) times overall
+        by_size = sorted(segments, key=lambda s: s.n_docs)
+        chosen = by_size[:max(2, len(segments) // 2)]
+        merged = self._persist(IndexSegment.merge(chosen))
+        with self._lock:
+            self.segments = [s for s in self.segments if s not in chosen] + [merged]
+            segments = list(self.segments)
+        if self.directory:
+            self._write_manifest(segments)
+            for segment in chosen:
+                shutil.rmtree(segment.path, ignore_errors=True)
+
+    def _searchable_segments(self) -> List[IndexSegment]:
+        with self._lock:
+            segments = list(self.segments)
+            pending = list(self._pending)
+            pending_segment = self._pending_segment
+            generation = self._pending_generation
+        if not pending:
+            return segments
+
+        covered = pending_segment.n_docs if pending_segment else 0
+        if covered < len(pending):
+            # Only transcripts added since the last query are tokenized, outside the lock so adds never wait on it
+            fresh = IndexSegment.from_transcripts(pending[covered:])
+            pending_segment = IndexSegment.merge([pending_segment, fresh]) if pending_segment else fresh
+            with self._lock:
+                current = self._pending_segment.n_docs if self._pending_segment else 0
+                if generation == self._pending_generation and pending_segment.n_docs > current:
+                    self._pending_segment = pending_segment
+        return segments + [pending_segment]
+
+    def search(self, query: str, limit: int = 10, hits_per_video: int = 5) -> Dict[str, Any]:
+        """Videos containing every clause of the query, BM25-ranked, with the times each match is spoken"""
+        started = time.perf_counter()
+        clauses = parse_query(query)
+        if not clauses:
+            raise ValueError("Query has no searchable words")
+        segments = self._searchable_segments()
+        n_docs = sum(segment.n_docs for segment in segments)
+        total_len = sum(int(np.asarray(segment.arrays["doc_len"]).sum()) for segment in segments)
+        avg_len = total_len / n_docs if n_docs else 1.0
+
+        # matches[c][s]: (docs, frequency, phrase occurrences) of clause c in segment s
+        matches = [[segment.match(words) for segment in segments] for words in clauses]
+        idf = [np.log(1 + (n_docs - df + 0.5) / (df + 0.5)) for df in
+               (sum(len(docs) for docs, _, _ in clause) for clause in matches)]
+
+        scored: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        for s, segment in enumerate(segments):
+            docs = reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), (matches[c][s][0] for c in range(len(clauses))))
+            if not len(docs):
+                continue
+            norm = _K1 * (1 - _B + _B * np.asarray(segment.arrays["doc_len"])[docs] / avg_len)
+            score = np.zeros(len(docs))
+            for c in range(len(clauses)):
+                clause_docs, tf, _ = matches[c][s]
+                tf = tf[np.searchsorted(clause_docs, docs)]
+                score += idf[c] * tf * (_K1 + 1) / (tf + norm)
+            scored.append((np.full(len(docs), s), docs, score))
+
+        results = []
+        total = sum(len(docs) for _, docs, _ in scored)
+        if scored:
+            seg_of, docs, scores = (np.concatenate(column) for column in zip(*scored))
+            top = np.argpartition(-scores, limit - 1)[:limit] if len(scores) > limit else np.arange(len(scores))
+            # Equal scores are ordered by video id so results do not depend on how segments were merged
+            ranked = sorted(zip(seg_of[top].tolist(), docs[top].tolist(), scores[top].tolist()),
+                            key=lambda hit: (-hit[2], segments[hit[0]].video_ids[hit[1]]))
+            for s, doc, score in ranked:
+                positions = np.concatenate([segments[s].match_positions(words, matches[c][s][2], doc)
+                                            for c, words in enumerate(clauses)])
+                times = np.unique(segments[s].timestamps(doc, positions))
+                results.append({
+                    "video_id": segments[s].video_ids[doc],
+                    "score": round(score, 4),
+                    "matches": len(positions),
+                    "timestamps": [round(t, 1) for t in times[:hits_per_video].tolist()]
+                })
+
+        return {
+            "query": query,
+            "clauses": [" ".join(words) for words in clauses],
+            "total_videos": total,
+            "results": results,
+            "took_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            segments = list(self.segments)
+            pending = len(self._pending)
+        return {
+            "directory": self.directory or None,
+            "videos": len(self._indexed),
+            "segments": len(segments),
+            "pending": pending,
+            "positions": sum(len(segment.arrays["positions"]) for segment in segments),
+            "bytes": sum(segment.nbytes for segment in segments),
+            "saved_at": self.saved_at
+        }
+
+# Global instance; segments are memory-mapped from disk so startup never rebuilds them
+search_index = SearchIndex(
+    directory=os.getenv('SEARCH_INDEX_DIR', 'search_index'),
+    flush_every=int(os.getenv('SEARCH_INDEX_FLUSH_EVERY', '200')),
+    max_segments=int(os.getenv('SEARCH_INDEX_MAX_SEGMENTS', '8'))
+)
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, Callable, Hashable
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one running computation"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn once per key; callers arriving while it runs wait for the same result"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.executions += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def submit(self, key: Hashable, launch: Callable[[], Future]) -> Future:
+        """Start launch() once per key and hand every caller the same Future"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.shared += 1
+                return future
+            future = launch()
+            self._calls[key] = future
+            self.executions += 1
+
+        # Registered outside the lock: an already finished future runs the callback immediately
+        future.add_done_callback(lambda f: self._forget(key, f))
+        return future
+
+    def _forget(self, key: Hashable, future: Future):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get execution and coalescing counters"""
+        with self._lock:
+            return {
+                "name": self.name,
+                "in_flight": len(self._calls),
+                "executions": self.executions,
+                "shared": self.shared
+            }
+
+async def wait_shared(future: Future) -> Any:
+    """Await a future other callers may share; cancelling this waiter leaves the shared work running"""
+    return await asyncio.shield(asyncio.wrap_future(future))
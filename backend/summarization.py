@@ -1,44 +1,57 @@
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional, Callable, Tuple
+from batching import BatchingSummarizer
+import extractive
+from models import model_registry
+import itertools
+import math
 import os
+import re
 
 # Initialize the summarizer with GPU support
 _summarizer = None
 is_production = os.getenv('PRODUCTION') == 'true'
+inference_backend = os.getenv('INFERENCE_BACKEND', 'torch')  # torch, int8 or onnx
+_summarizer_backend = inference_backend  # Becomes "torch" if the configured backend fails to load
+
+def get_model_name() -> str:
+    """Name of the summarization model selected for this deployment"""
+    return "allenai/led-base-16384" if is_production else "facebook/bart-large-cnn"
+
+def get_inference_backend() -> str:
+    """Inference backend the summarizer was loaded with (the configured one until it loads)"""
+    return _summarizer_backend
 
 def get_summarizer():
-    global _summarizer
+    global _summarizer, _summarizer_backend
     if _summarizer is None:
-        from transformers import pipeline
         import torch
 
         # Check for CUDA disable flag
         disable_cuda = os.getenv('DISABLE_CUDA') == 'true'
 
         # Determine model and device based on production flag and CUDA availability
-        model_name = "allenai/led-base-16384" if is_production else "facebook/bart-large-cnn"
+        model_name = get_model_name()
         device = -1 if disable_cuda or not torch.cuda.is_available() else 0
         print(f"🤖 Using device: {'GPU (CUDA)' if device == 0 else 'CPU'}")
         print(f"🤖 Using model: {model_name}")
+        print(f"🤖 Using inference backend: {inference_backend}")
 
         try:
-            _summarizer = pipeline(
-                "summarization",
-                model=model_name,
+            _summarizer = model_registry.get(
+                model_name,
                 device=device,
-                torch_dtype=torch.float32,  # Use float32 for both CPU and GPU to avoid precision issues
+                dtype="float32",  # Use float32 for both CPU and GPU to avoid precision issues
+                backend=inference_backend,
                 model_kwargs={"low_cpu_mem_usage": True} if device == 0 else {}
             )
+            _summarizer_backend = inference_backend
             print("✅ Model loaded successfully!")
         except Exception as e:
             print(f"⚠️  Model loading failed: {e}")
             print("🔄 Falling back to CPU with BART...")
             try:
-                _summarizer = pipeline(
-                    "summarization",
-                    model="facebook/bart-large-cnn",
-                    device=-1,
-                    torch_dtype=torch.float32
-                )
+                _summarizer = get_cpu_fallback_summarizer()
+                _summarizer_backend = "torch"
                 print("✅ CPU model loaded successfully!")
             except Exception as fallback_error:
                 print(f"⚠️  CPU fallback also failed: {fallback_error}")
@@ -46,10 +59,174 @@ def get_summarizer():
 
     return _summarizer
 
-def generate_multiple_summaries(text: str, base_summary: str) -> Dict[str, str]:
-    """Generate summaries in different styles with GPU error handling"""
-    import torch  # Import torch for dtype usage
+def get_cpu_fallback_summarizer():
+    """Shared CPU BART pipeline used by every fallback path"""
+    return model_registry.get("facebook/bart-large-cnn", device=-1, dtype="float32")
+
+# Concurrent generation calls are gathered into batched forward passes
+_batched_summarizer = BatchingSummarizer(
+    get_summarizer,
+    max_batch_size=int(os.getenv('SUMMARY_BATCH_SIZE', '8')),
+    max_wait_ms=float(os.getenv('SUMMARY_BATCH_WAIT_MS', '20'))
+)
+
+def get_batched_summarizer() -> BatchingSummarizer:
+    """Batching front-end to the summarization pipeline, called like the pipeline itself"""
+    return _batched_summarizer
 
+# Map-reduce settings for transcripts longer than one context window
+CHUNK_SUMMARY_MAX_LENGTH = 120
+CHUNK_SUMMARY_MIN_LENGTH = 30
+MAX_MAP_CHUNKS = int(os.getenv('SUMMARY_MAX_CHUNKS', '48'))
+MAX_REDUCE_DEPTH = 4
+_WORDS_PER_PIECE = 64
+
+DETAILED_PROMPT = """Provide a detailed analysis of this video transcript. Include:
+
+1. Main topic and core message
+2. Key insights and important takeaways
+3. Practical applications and lessons learned
+4. Any specific examples or case studies mentioned
+5. Actionable advice or recommendations
+
+Transcript:
+{text}
+
+Detailed Analysis:"""
+
+def _iter_pieces(text: str) -> Iterator[str]:
+    """Yield sentence-sized pieces of text, capped at a fixed number of words"""
+    words = []
+    for match in re.finditer(r'\S+', text):
+        word = match.group()
+        words.append(word)
+        if len(words) >= _WORDS_PER_PIECE or word[-1] in '.!?':
+            yield ' '.join(words)
+            words = []
+    if words:
+        yield ' '.join(words)
+
+def iter_token_chunks(text: str, tokenizer, max_tokens: int) -> Iterator[str]:
+    """Lazily split text into chunks of at most max_tokens tokenizer tokens"""
+    chunk: List[str] = []
+    chunk_tokens = 0
+    for piece in _iter_pieces(text):
+        piece_tokens = len(tokenizer.encode(piece, add_special_tokens=False))
+        if chunk and chunk_tokens + piece_tokens > max_tokens:
+            yield ' '.join(chunk)
+            chunk = []
+            chunk_tokens = 0
+        chunk.append(piece)
+        chunk_tokens += piece_tokens
+    if chunk:
+        yield ' '.join(chunk)
+
+def _chunk_budget(tokenizer, max_chunk_size: int) -> int:
+    """Tokens per chunk, leaving room for the special tokens the model adds"""
+    model_max = getattr(tokenizer, 'model_max_length', max_chunk_size) or max_chunk_size
+    return min(max_chunk_size, model_max - tokenizer.num_special_tokens_to_add())
+
+def condense_text(text: str, tokenizer, max_chunk_size: int = 1000, reserve_tokens: int = 0,
+                  progress: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> str:
+    """Map-reduce the text until it fits one model window, leaving reserve_tokens free for a prompt"""
+    summarizer = get_batched_summarizer()
+    budget = max(32, _chunk_budget(tokenizer, max_chunk_size) - reserve_tokens)
+
+    for level in range(MAX_REDUCE_DEPTH):
+        # Stop reducing once the text fits in a single window
+        chunks = iter_token_chunks(text, tokenizer, budget)
+        first_chunk = next(chunks, "")
+        second_chunk = next(chunks, None)
+        if second_chunk is None:
+            break
+
+        chunks = itertools.chain([first_chunk, second_chunk], chunks)
+        estimated_total = _estimate_chunks(text, budget)
+        if estimated_total > MAX_MAP_CHUNKS:
+            # Too many chunks to map within the latency bound: shrink every chunk to its most central
+            # sentences first, so all of the transcript still reaches the model
+            print(f"✂️ {estimated_total} chunks exceed {MAX_MAP_CHUNKS}; condensing each extractively before mapping")
+            text = _extractive_condense(chunks, MAX_MAP_CHUNKS / estimated_total)
+            chunks = iter_token_chunks(text, tokenizer, budget)
+            estimated_total = _estimate_chunks(text, budget)
+
+        chunk_summaries = []
+        batch = []
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) >= summarizer.max_batch_size:
+                chunk_summaries.extend(_summarize_chunks(summarizer, batch))
+                batch = []
+                if progress:
+                    progress("chunks", {"completed": len(chunk_summaries),
+                                        "total": max(estimated_total, len(chunk_summaries)), "level": level})
+        if batch:
+            chunk_summaries.extend(_summarize_chunks(summarizer, batch))
+        if progress:
+            progress("chunks", {"completed": len(chunk_summaries), "total": len(chunk_summaries), "level": level})
+
+        text = ' '.join(chunk_summaries)
+
+    return text
+
+def _estimate_chunks(text: str, budget: int) -> int:
+    # ~1.4 subword tokens per word; only sizes the progress total and the latency guard
+    return max(2, math.ceil(sum(1 for _ in re.finditer(r'\S+', text)) * 1.4 / budget))
+
+def _extractive_condense(chunks: Iterator[str], keep_ratio: float) -> str:
+    """Keep the top `keep_ratio` of each chunk's sentences (TextRank, in order); no chunk is dropped"""
+    condensed = []
+    for chunk in chunks:
+        sentences, order = extractive.rank_sentences(chunk)
+        if sentences:
+            count = max(1, round(len(sentences) * keep_ratio))
+            condensed.append(' '.join(extractive.top_sentences(sentences, order, count)))
+    return ' '.join(condensed)
+
+def summarize_long_text(text: str, max_length: int, min_length: int, max_chunk_size: int = 1000,
+                        prompt: str = "{text}") -> List[Dict[str, str]]:
+    """Map-reduce summarization over token-bounded chunks; returns the same shape as a pipeline call"""
+    tokenizer = get_summarizer().tokenizer
+    prompt_tokens = len(tokenizer.encode(prompt.format(text=""), add_special_tokens=False))
+    condensed = condense_text(text, tokenizer, max_chunk_size, prompt_tokens)
+    return get_batched_summarizer()(prompt.format(text=condensed), max_length=max_length, min_length=min_length, do_sample=False)
+
+def _summarize_chunks(summarizer: BatchingSummarizer, chunks: List[str]) -> List[str]:
+    """Summarize one batch of chunks together"""
+    outputs = summarizer.summarize_many(
+        chunks,
+        max_length=CHUNK_SUMMARY_MAX_LENGTH,
+        min_length=CHUNK_SUMMARY_MIN_LENGTH,
+        do_sample=False
+    )
+    return [output[0]['summary_text'] for output in outputs if output and 'summary_text' in output[0]]
+
+def format_bullets(key_points_text: str) -> str:
+    """Turn extracted key points into up to five bullet lines"""
+    # Create more insightful bullet points
+    bullets = []
+    sentences = key_points_text.split('. ')
+
+    for sentence in sentences[:5]:
+        if len(sentence.strip()) > 10:
+            # Make bullets more actionable
+            clean_sentence = sentence.strip().lstrip('123456789.-•* ')
+            if not clean_sentence.startswith(('Key points:', 'The video', 'This video')):
+                bullets.append(f"• {clean_sentence}")
+
+    # Add some standard insightful bullets if we don't have enough
+    if len(bullets) < 3:
+        bullets.extend([
+            "• Focus on practical application rather than theory",
+            "• Build skills through consistent daily practice",
+            "• Learn by doing real projects",
+            "• Start with fundamentals before advanced topics"
+        ])
+
+    return '\n'.join(bullets[:5])
+
+def generate_multiple_summaries(text: str, base_summary: str, max_chunk_size: int = 1000) -> Dict[str, str]:
+    """Generate summaries in different styles with GPU error handling"""
     try:
         summaries = {
             "paragraph": base_summary,
@@ -61,45 +238,20 @@ def generate_multiple_summaries(text: str, base_summary: str) -> Dict[str, str]:
         if len(text) > 100:
             try:
                 # Extract key points and create intelligent bullets
-                key_points_text = get_summarizer()(f"Extract 5 key points from: {text[:1500]}", max_length=120, min_length=40, do_sample=False)
+                key_points_text = summarize_long_text(text, max_length=120, min_length=40, max_chunk_size=max_chunk_size,
+                                                      prompt="Extract 5 key points from: {text}")
                 if key_points_text and len(key_points_text) > 0 and 'summary_text' in key_points_text[0]:
                     key_points_text = key_points_text[0]['summary_text']
                 else:
                     raise ValueError("Failed to extract key points")
 
-                # Create more insightful bullet points
-                bullets = []
-                sentences = key_points_text.split('. ')
-
-                for sentence in sentences[:5]:
-                    if len(sentence.strip()) > 10:
-                        # Make bullets more actionable
-                        clean_sentence = sentence.strip().lstrip('123456789.-•* ')
-                        if not clean_sentence.startswith(('Key points:', 'The video', 'This video')):
-                            bullets.append(f"• {clean_sentence}")
-
-                # Add some standard insightful bullets if we don't have enough
-                if len(bullets) < 3:
-                    bullets.extend([
-                        "• Focus on practical application rather than theory",
-                        "• Build skills through consistent daily practice",
-                        "• Learn by doing real projects",
-                        "• Start with fundamentals before advanced topics"
-                    ])
-
-                summaries["bullets"] = '\n'.join(bullets[:5])
+                summaries["bullets"] = format_bullets(key_points_text)
 
             except Exception as gpu_error:
                 print(f"⚠️ GPU bullet summary failed: {gpu_error}")
                 # Try CPU fallback with better error handling
                 try:
-                    from transformers import pipeline
-                    cpu_summarizer = pipeline(
-                        "summarization",
-                        model="facebook/bart-large-cnn",
-                        device=-1,
-                        torch_dtype=torch.float32
-                    )
+                    cpu_summarizer = get_cpu_fallback_summarizer()
                     basic = cpu_summarizer(text[:1000], max_length=80, min_length=25, do_sample=False)
                     if basic and len(basic) > 0 and 'summary_text' in basic[0]:
                         sentences = basic[0]['summary_text'].split('. ')
@@ -126,22 +278,9 @@ def generate_multiple_summaries(text: str, base_summary: str) -> Dict[str, str]:
         # Generate detailed summary
         if len(text) > 200:
             try:
-                # Create comprehensive detailed summary
-                detailed_prompt = f"""Provide a detailed analysis of this video transcript. Include:
-
-1. Main topic and core message
-2. Key insights and important takeaways
-3. Practical applications and lessons learned
-4. Any specific examples or case studies mentioned
-5. Actionable advice or recommendations
-
-Transcript:
-{text}
-
-Detailed Analysis:"""
-
-                # Safely get the summary result
-                result = get_summarizer()(detailed_prompt, max_length=300, min_length=100, do_sample=False)
+                # Create comprehensive detailed summary over the whole transcript
+                result = summarize_long_text(text, max_length=300, min_length=100, max_chunk_size=max_chunk_size,
+                                             prompt=DETAILED_PROMPT)
                 if result and len(result) > 0 and 'summary_text' in result[0]:
                     detailed_summary = result[0]['summary_text']
                     summaries["detailed"] = detailed_summary
@@ -152,13 +291,7 @@ Detailed Analysis:"""
                 print(f"⚠️  GPU detailed summary failed: {gpu_error}")
                 # Try CPU fallback for detailed summary
                 try:
-                    from transformers import pipeline
-                    cpu_summarizer = pipeline(
-                        "summarization",
-                        model="facebook/bart-large-cnn",
-                        device=-1,
-                        torch_dtype=torch.float32
-                    )
+                    cpu_summarizer = get_cpu_fallback_summarizer()
                     detailed_length = min(200, len(text) // 10)  # Adaptive length
                     result = cpu_summarizer(text[:1500], max_length=detailed_length, min_length=50, do_sample=False)
                     if result and len(result) > 0 and 'summary_text' in result[0]:
@@ -179,40 +312,32 @@ Detailed Analysis:"""
     except Exception as e:
         return {"paragraph": base_summary, "bullets": "", "detailed": ""}
 
-def create_smart_summary(text: str, length: str = "medium") -> str:
-    """Create a comprehensive summary with programmatic analysis and insights"""
-    try:
-        # Get basic summary from model
-        result = get_summarizer()(text[:2000], max_length=100, min_length=30, do_sample=False)
-        if result and len(result) > 0 and 'summary_text' in result[0]:
-            basic_summary = result[0]['summary_text']
-        else:
-            raise ValueError("Failed to generate basic summary")
-
-        # Analyze text programmatically for better insights
-        text_lower = text.lower()
-
-        # Detect topic categories
-        topics = []
-        if any(word in text_lower for word in ['python', 'programming', 'code', 'coding']):
-            topics.append("Programming/Development")
-        if any(word in text_lower for word in ['business', 'entrepreneur', 'startup', 'company']):
-            topics.append("Business/Entrepreneurship")
-        if any(word in text_lower for word in ['health', 'fitness', 'exercise', 'diet']):
-            topics.append("Health & Fitness")
-        if any(word in text_lower for word in ['learning', 'education', 'study', 'skill']):
-            topics.append("Education/Learning")
-        if any(word in text_lower for word in ['motivation', 'success', 'goal', 'achievement']):
-            topics.append("Personal Development")
-
-        topic_str = ", ".join(topics) if topics else "General Content"
-
-        # Extract key actionable items
-        action_words = ['practice', 'learn', 'build', 'create', 'implement', 'apply', 'focus', 'start']
-        advice_indicators = [word for word in action_words if word in text_lower]
-
-        # Create structured output with proper formatting
-        structured_output = f"""📌 TOPIC CATEGORY: {topic_str}
+def format_structured_summary(basic_summary: str, text: str) -> str:
+    """Wrap a model summary in the structured topic/insight layout"""
+    # Analyze text programmatically for better insights
+    text_lower = text.lower()
+
+    # Detect topic categories
+    topics = []
+    if any(word in text_lower for word in ['python', 'programming', 'code', 'coding']):
+        topics.append("Programming/Development")
+    if any(word in text_lower for word in ['business', 'entrepreneur', 'startup', 'company']):
+        topics.append("Business/Entrepreneurship")
+    if any(word in text_lower for word in ['health', 'fitness', 'exercise', 'diet']):
+        topics.append("Health & Fitness")
+    if any(word in text_lower for word in ['learning', 'education', 'study', 'skill']):
+        topics.append("Education/Learning")
+    if any(word in text_lower for word in ['motivation', 'success', 'goal', 'achievement']):
+        topics.append("Personal Development")
+
+    topic_str = ", ".join(topics) if topics else "General Content"
+
+    # Extract key actionable items
+    action_words = ['practice', 'learn', 'build', 'create', 'implement', 'apply', 'focus', 'start']
+    advice_indicators = [word for word in action_words if word in text_lower]
+
+    # Create structured output with proper formatting
+    structured_output = f"""📌 TOPIC CATEGORY: {topic_str}
 
 🎯 MAIN MESSAGE:
 {basic_summary.strip()}
@@ -232,21 +357,26 @@ def create_smart_summary(text: str, length: str = "medium") -> str:
 ✨ VALUE PROPOSITION:
 This video delivers practical, actionable guidance that viewers can immediately apply to improve their skills and achieve better results in their chosen field.""".strip()
 
-        return structured_output
+    return structured_output
+
+def create_smart_summary(text: str, length: str = "medium", max_chunk_size: int = 1000) -> str:
+    """Create a comprehensive summary with programmatic analysis and insights"""
+    try:
+        # Get basic summary from model
+        result = summarize_long_text(text, max_length=100, min_length=30, max_chunk_size=max_chunk_size)
+        if result and len(result) > 0 and 'summary_text' in result[0]:
+            basic_summary = result[0]['summary_text']
+        else:
+            raise ValueError("Failed to generate basic summary")
+
+        return format_structured_summary(basic_summary, text)
 
     except Exception as e:
         print(f"⚠️ Smart summarization failed: {e}")
         # Enhanced fallback with better error handling
         try:
             # Try CPU fallback first
-            from transformers import pipeline
-            import torch
-            cpu_summarizer = pipeline(
-                "summarization",
-                model="facebook/bart-large-cnn",
-                device=-1,
-                torch_dtype=torch.float32
-            )
+            cpu_summarizer = get_cpu_fallback_summarizer()
             basic = cpu_summarizer(text[:1500], max_length=80, min_length=25, do_sample=False)
             if basic and len(basic) > 0 and 'summary_text' in basic[0]:
                 return f"""📝 SUMMARY: {basic[0]['summary_text'].strip()}
@@ -300,9 +430,90 @@ def enhance_summary_with_insights(base_summary: str, original_text: str) -> str:
 def summarize_text(text: str, length: str = "medium", max_chunk_size: int = 1000) -> str:
     """Generate intelligent summary with explanations and insights"""
     # Use smart summarization for better results
-    base_summary = create_smart_summary(text, length)
+    base_summary = create_smart_summary(text, length, max_chunk_size)
 
     # Add insightful enhancements
     enhanced_summary = enhance_summary_with_insights(base_summary, text)
 
     return enhanced_summary
+
+# Decoding budget and prompt for each style derived from the shared condensed text
+STYLE_DECODING = {
+    "paragraph": {"max_length": 100, "min_length": 30, "prompt": "{text}", "min_chars": 0},
+    "bullets": {"max_length": 120, "min_length": 40, "prompt": "Extract 5 key points from: {text}", "min_chars": 100},
+    "detailed": {"max_length": 300, "min_length": 100, "prompt": DETAILED_PROMPT, "min_chars": 200}
+}
+
+def generate_style_summaries(text: str, styles: List[str], length: str = "medium", max_chunk_size: int = 1000,
+                             progress: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Tuple[Dict[str, str], bool]:
+    """Condense the transcript once and derive only the requested styles from the shared chunk summaries.
+
+    Also returns whether the shared pass failed and the summaries came from the fallback path."""
+    styles = [style for style in STYLE_DECODING if style in styles] or ["paragraph"]
+    # Match the legacy path, which skips bullets/detailed for very short transcripts
+    active = [style for style in styles if len(text) > STYLE_DECODING[style]["min_chars"]]
+
+    try:
+        tokenizer = get_summarizer().tokenizer
+        reserve_tokens = max(
+            [len(tokenizer.encode(STYLE_DECODING[style]["prompt"].format(text=""), add_special_tokens=False))
+             for style in active] or [0]
+        )
+        condensed = condense_text(text, tokenizer, max_chunk_size, reserve_tokens, progress)
+
+        if progress:
+            progress("styles", {"styles": active})
+
+        # Submit every style's final pass before waiting so they queue together
+        summarizer = get_batched_summarizer()
+        futures = {
+            style: summarizer.submit(
+                STYLE_DECODING[style]["prompt"].format(text=condensed),
+                max_length=STYLE_DECODING[style]["max_length"],
+                min_length=STYLE_DECODING[style]["min_length"],
+                do_sample=False
+            )
+            for style in active
+        }
+        raw = {style: future.result()[0]['summary_text'] for style, future in futures.items()}
+    except Exception as e:
+        print(f"⚠️ Shared summary pass failed, falling back to per-style generation: {e}")
+        base_summary = summarize_text(text, length, max_chunk_size)
+        summaries = generate_multiple_summaries(text, base_summary, max_chunk_size)
+        return {style: summaries.get(style, "") for style in styles}, True
+
+    summaries = {style: "" for style in styles}
+    if "paragraph" in raw:
+        summaries["paragraph"] = enhance_summary_with_insights(format_structured_summary(raw["paragraph"], text), text)
+    if "bullets" in raw:
+        summaries["bullets"] = format_bullets(raw["bullets"])
+    if "detailed" in raw:
+        summaries["detailed"] = raw["detailed"]
+    return summaries, False
+
+# Sentences taken per summary length by the extractive fast path
+FAST_SENTENCES = {"short": 3, "medium": 5, "long": 8, "instant": 5}
+
+def is_fast_mode(mode: str, length: str) -> bool:
+    """mode=fast or length=instant selects the extractive path"""
+    return mode == "fast" or length == "instant"
+
+def generate_fast_summaries(text: str, styles: List[str], length: str = "medium") -> Dict[str, str]:
+    """Build the requested styles from TextRank-ranked transcript sentences, without any model call"""
+    styles = [style for style in STYLE_DECODING if style in styles] or ["paragraph"]
+    sentences, order = extractive.rank_sentences(text)
+    count = FAST_SENTENCES.get(length, FAST_SENTENCES["medium"])
+
+    summaries = {style: "" for style in styles}
+    if not sentences:
+        return summaries
+    if "paragraph" in styles:
+        paragraph = " ".join(extractive.top_sentences(sentences, order, count))
+        summaries["paragraph"] = enhance_summary_with_insights(format_structured_summary(paragraph, text), text)
+    # Same minimum transcript sizes as the model path
+    if "bullets" in styles and len(text) > STYLE_DECODING["bullets"]["min_chars"]:
+        points = extractive.top_sentences(sentences, order, 5)
+        summaries["bullets"] = format_bullets(". ".join(point.rstrip('.!? ') for point in points))
+    if "detailed" in styles and len(text) > STYLE_DECODING["detailed"]["min_chars"]:
+        summaries["detailed"] = " ".join(extractive.top_sentences(sentences, order, count * 2))
+    return summaries
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Keep the module-level indexes in memory so tests never read or write files in the working tree
+for variable in ('KEYPHRASE_INDEX_PATH', 'SEARCH_INDEX_DIR', 'YOUTUBE_QUOTA_LEDGER_PATH'):
+    os.environ[variable] = ''
+
+# Tests import the backend modules directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
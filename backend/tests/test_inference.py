@@ -0,0 +1,51 @@
+import asyncio
+import threading
+
+from inference import InferenceExecutor
+from singleflight import SingleFlight, wait_shared
+
+def test_cancelled_waiter_leaves_shared_work_running():
+    executor = InferenceExecutor(workers=1, max_queue=4)
+    flight = SingleFlight("test")
+    release = threading.Event()
+
+    async def scenario():
+        blocker = executor.submit(release.wait)  # keeps the worker busy so the shared call stays queued
+        launch = lambda: executor.submit(lambda: "summary")
+        first = asyncio.ensure_future(wait_shared(flight.submit("key", launch)))
+        second = asyncio.ensure_future(wait_shared(flight.submit("key", launch)))
+        await asyncio.sleep(0.01)
+
+        first.cancel()
+        await asyncio.sleep(0.01)
+        release.set()
+        result = await asyncio.wait_for(second, timeout=5)
+        await asyncio.wrap_future(blocker)
+        return first, result
+
+    first, result = asyncio.run(scenario())
+    assert first.cancelled()
+    assert result == "summary"
+    stats = executor.get_stats()
+    assert stats["queue_depth"] == 0
+    assert stats["completed"] == 2
+    assert stats["cancelled"] == 0
+
+def test_cancelling_a_queued_call_releases_its_slot():
+    executor = InferenceExecutor(workers=1, max_queue=2)
+    started, release = threading.Event(), threading.Event()
+    blocker = executor.submit(lambda: started.set() or release.wait())
+    started.wait(timeout=5)  # the worker is busy and the blocker no longer holds a queue slot
+    queued = [executor.submit(lambda: None) for _ in range(2)]
+
+    assert all(future.cancel() for future in queued)
+    stats = executor.get_stats()
+    assert stats["queue_depth"] == 0
+    assert stats["cancelled"] == 2
+
+    # The freed slots accept new work
+    follow_up = executor.submit(lambda: "ok")
+    release.set()
+    assert follow_up.result(timeout=5) == "ok"
+    blocker.result(timeout=5)
+    assert executor.get_stats()["queue_depth"] == 0
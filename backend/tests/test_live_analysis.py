@@ -0,0 +1,25 @@
+import random
+
+import analysis
+from live_analysis import IncrementalAnalyzer
+
+WORDS = ("the app code was good great bad data model learning rate is a very slow fast and "
+         "python tutorial network test").split()
+
+def _live_key_phrases(snippets):
+    analyzer = IncrementalAnalyzer()
+    for i, text in enumerate(snippets):
+        analyzer.append_parts([(text, i * 2.0, 2.0)])
+    return analyzer.snapshot()["key_phrases"]
+
+def test_key_phrase_ties_match_analyze_text():
+    text = "the app code was good"
+    assert _live_key_phrases([text]) == analysis.analyze_text(text)["key_phrases"]
+
+def test_key_phrases_match_analyze_text_across_appends():
+    rng = random.Random(0)
+    for _ in range(200):
+        snippets = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 8)))
+                    + rng.choice(["", "", ".", ","]) for _ in range(rng.randint(1, 6))]
+        expected = analysis.analyze_text(" ".join(snippets))["key_phrases"]
+        assert _live_key_phrases(snippets) == expected, snippets
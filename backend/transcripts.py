@@ -0,0 +1,216 @@
+from typing import Dict, Any, Optional, List, Tuple, Callable, Iterable
+from youtube_transcript_api import YouTubeTranscriptApi
+from cache import LRUCache, DiskStore
+from singleflight import SingleFlight
+import numpy as np
+import os
+
+# Speaking rate assumed when a transcript has no timing information
+SECONDS_PER_WORD = 0.2
+
+class Transcript:
+    """Array-backed transcript: one text buffer plus per-snippet character offsets and float32 timings.
+
+    Snippet i is text[offsets[i]:offsets[i + 1] - 1] (snippets are joined by single spaces) and is
+    spoken from starts[i] for durations[i] seconds. A video time maps to its snippet in O(log n)."""
+
+    __slots__ = ("video_id", "language", "text", "offsets", "starts", "durations")
+
+    def __init__(self, video_id: str, language: str, text: str, offsets: np.ndarray,
+                 starts: np.ndarray, durations: np.ndarray):
+        self.video_id = video_id
+        self.language = language
+        self.text = text
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.starts = np.asarray(starts, dtype=np.float32)
+        self.durations = np.asarray(durations, dtype=np.float32)
+
+    @classmethod
+    def from_snippets(cls, video_id: str, language: str, snippets: Iterable[Any]) -> "Transcript":
+        """Build from objects with .text, .start and .duration (youtube-transcript-api snippets)"""
+        parts: List[str] = []
+        offsets: List[int] = []
+        starts: List[float] = []
+        durations: List[float] = []
+        position = 0
+        for snippet in snippets:
+            offsets.append(position)
+            parts.append(snippet.text)
+            starts.append(snippet.start)
+            durations.append(snippet.duration)
+            position += len(snippet.text) + 1
+        return cls(video_id, language, " ".join(parts), offsets, starts, durations)
+
+    @classmethod
+    def from_text(cls, text: str, video_id: str = "", language: str = "en") -> "Transcript":
+        """Wrap untimed text as one snippet, estimating its duration from the word count"""
+        return cls(video_id, language, text, [0], [0.0], [len(text.split()) * SECONDS_PER_WORD])
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Transcript":
+        if "starts" not in data:
+            # Disk entries written before timings were kept
+            return cls.from_text(data["text"], data.get("video_id", ""), data.get("language", "en"))
+        return cls(data["video_id"], data["language"], data["text"],
+                   data["offsets"], data["starts"], data["durations"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "video_id": self.video_id,
+            "language": self.language,
+            "text": self.text,
+            "offsets": self.offsets.tolist(),
+            "starts": self.starts.tolist(),
+            "durations": self.durations.tolist()
+        }
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @property
+    def duration(self) -> float:
+        """Seconds from the start of the video to the end of the last snippet"""
+        if not len(self.offsets):
+            return 0.0
+        return float(self.starts[-1] + self.durations[-1])
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.text.encode('utf-8')) + self.offsets.nbytes + self.starts.nbytes + self.durations.nbytes
+
+    def snippet_text(self, index: int) -> str:
+        end = self.offsets[index + 1] - 1 if index + 1 < len(self.offsets) else len(self.text)
+        return self.text[self.offsets[index]:end]
+
+    def snippet_at_time(self, seconds: float) -> int:
+        """Index of the snippet being spoken at a video time"""
+        return int(np.clip(np.searchsorted(self.starts, seconds, side='right') - 1, 0, max(len(self.starts) - 1, 0)))
+
+    def text_at_time(self, seconds: float, context: int = 0) -> str:
+        """Snippet text around a video time, with `context` neighbouring snippets on each side"""
+        if not len(self.offsets):
+            return ""
+        index = self.snippet_at_time(seconds)
+        first, last = max(0, index - context), min(len(self.offsets) - 1, index + context)
+        end = self.offsets[last + 1] - 1 if last + 1 < len(self.offsets) else len(self.text)
+        return self.text[self.offsets[first]:end]
+
+    def scan_with_times(self, scan: Callable[[str], List[str]]) -> Tuple[List[str], np.ndarray]:
+        """Tokenize snippet by snippet, returning all tokens and each token's start time.
+
+        Since snippets are joined by spaces, the tokens equal scan(self.text) for word-level scanners."""
+        tokens: List[str] = []
+        counts = np.zeros(len(self.offsets), dtype=np.int64)
+        for index in range(len(self.offsets)):
+            snippet_tokens = scan(self.snippet_text(index))
+            counts[index] = len(snippet_tokens)
+            tokens.extend(snippet_tokens)
+
+        # Spread each snippet's tokens evenly across its duration
+        snippet_of = np.repeat(np.arange(len(counts)), counts)
+        rank = np.arange(len(tokens)) - np.repeat(np.cumsum(counts) - counts, counts)
+        fraction = rank / np.maximum(counts[snippet_of], 1)
+        times = self.starts[snippet_of] + fraction * self.durations[snippet_of]
+        return tokens, times.astype(np.float32)
+
+class TranscriptProvider:
+    """Fetches English transcripts once and serves repeat requests from cache"""
+
+    def __init__(self):
+        max_mb = float(os.getenv('TRANSCRIPT_CACHE_MB', '64'))
+        ttl = float(os.getenv('TRANSCRIPT_CACHE_TTL', '3600'))
+        cache_dir = os.getenv('TRANSCRIPT_CACHE_DIR', '')
+        disk_ttl = float(os.getenv('TRANSCRIPT_DISK_TTL', str(7 * 24 * 3600)))
+
+        self.memory = LRUCache(int(max_mb * 1024 * 1024), ttl)
+        self.disk: Optional[DiskStore] = DiskStore(cache_dir, disk_ttl) if cache_dir else None
+        self.fetches = 0
+        self.fetch_errors = 0
+        # Concurrent misses for the same video share one fetch
+        self._flight = SingleFlight("transcripts")
+        # Called with every transcript loaded from disk or YouTube (e.g. to index it for search)
+        self.listeners: List[Callable[[Transcript], None]] = []
+
+    def get_transcript(self, video_id: str, fresh: bool = False) -> Transcript:
+        """Get the timed transcript for a video, fetching only on a cache miss.
+
+        `fresh` always refetches (e.g. growing live captions) and overwrites the cached copies."""
+        if fresh:
+            # Own key: a fresh caller must not be handed a concurrent cache-tier load
+            return self._flight.do((video_id, "fresh"), self._refresh, video_id)
+
+        transcript = self.memory.get(video_id)
+        if transcript is not None:
+            return transcript
+
+        return self._flight.do(video_id, self._load, video_id)
+
+    def _refresh(self, video_id: str) -> Transcript:
+        transcript = self._fetch(video_id)
+        self._remember(video_id, transcript)
+        if self.disk:
+            self.disk.save(video_id, transcript.to_dict())
+        self._notify(transcript)
+        return transcript
+
+    def _load(self, video_id: str) -> Transcript:
+        """Load a transcript from the disk tier or YouTube and populate the memory tier"""
+        if self.disk:
+            stored = self.disk.load(video_id)
+            if stored is not None:
+                transcript = Transcript.from_dict(stored)
+                self._remember(video_id, transcript)
+                self._notify(transcript)
+                return transcript
+
+        transcript = self._fetch(video_id)
+        self._remember(video_id, transcript)
+        if self.disk:
+            self.disk.save(video_id, transcript.to_dict())
+        self._notify(transcript)
+        return transcript
+
+    def _notify(self, transcript: Transcript):
+        for listener in self.listeners:
+            try:
+                listener(transcript)
+            except Exception as e:
+                print(f"⚠️ Transcript listener failed for {transcript.video_id}: {e}")
+
+    def _fetch(self, video_id: str) -> Transcript:
+        """Fetch the transcript from YouTube, translating to English when needed"""
+        self.fetches += 1
+        try:
+            ytt_api = YouTubeTranscriptApi()
+            transcript_list = ytt_api.list(video_id)
+            transcript = transcript_list.find_transcript(['en'])
+            if transcript.language_code != 'en':
+                transcript = transcript.translate('en')
+            fetched_transcript = transcript.fetch()
+        except Exception:
+            self.fetch_errors += 1
+            raise
+
+        return Transcript.from_snippets(video_id, transcript.language_code, fetched_transcript)
+
+    def _remember(self, video_id: str, transcript: Transcript):
+        self.memory.set(video_id, transcript, transcript.nbytes)
+
+    def invalidate(self, video_id: str):
+        """Forget a cached transcript in every tier"""
+        self.memory.invalidate(video_id)
+        if self.disk:
+            self.disk.delete(video_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss counters for sizing"""
+        return {
+            "memory": self.memory.get_stats(),
+            "disk": self.disk.get_stats() if self.disk else None,
+            "fetches": self.fetches,
+            "fetch_errors": self.fetch_errors,
+            "coalescing": self._flight.get_stats()
+        }
+
+# Global instance
+transcript_provider = TranscriptProvider()